@@ -0,0 +1,111 @@
+"""
+Measures the per-message cost of decrypting the provider API key of a chat message:
+legacy cryptocode secrets, vault secrets and hits of the `DecryptedSecretCache`, as
+well as encrypting a secret with the vault.
+
+Run from the backend directory:
+
+    python -m benchmarks.credentials --messages 200 --json report.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import List
+from uuid import uuid4
+
+import cryptocode
+from src.auth.encrypt import DecryptedSecretCache, settings, vault
+
+
+@dataclass
+class CaseResult:
+    case: str
+    messages: int
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+
+
+def summarize(case: str, durations: List[float]) -> CaseResult:
+    durations_ms = sorted(duration * 1000 for duration in durations)
+    return CaseResult(
+        case=case,
+        messages=len(durations_ms),
+        mean_ms=statistics.fmean(durations_ms),
+        p50_ms=durations_ms[len(durations_ms) // 2],
+        p99_ms=durations_ms[min(int(len(durations_ms) * 0.99), len(durations_ms) - 1)],
+    )
+
+
+def measure(messages: int, func, *args) -> List[float]:
+    durations = []
+    for _ in range(messages):
+        started = time.perf_counter()
+        func(*args)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+async def run(messages: int) -> List[CaseResult]:
+    secret = "sk-" + uuid4().hex
+    legacy_secret = cryptocode.encrypt(secret, settings.SECRET_KEY)
+    vault_secret = vault.encrypt(secret)
+    user_id = uuid4()
+
+    cache = DecryptedSecretCache(ttl_seconds=300, max_size=100)
+    await cache.decrypt(user_id, "openai", vault_secret)
+    cached = []
+    for _ in range(messages):
+        started = time.perf_counter()
+        await cache.decrypt(user_id, "openai", vault_secret)
+        cached.append(time.perf_counter() - started)
+
+    return [
+        summarize("legacy_decrypt", measure(messages, vault.decrypt, legacy_secret)),
+        summarize("vault_decrypt", measure(messages, vault.decrypt, vault_secret)),
+        summarize("vault_encrypt", measure(messages, vault.encrypt, secret)),
+        summarize("cache_hit", cached),
+    ]
+
+
+def main(args: argparse.Namespace) -> None:
+    results = asyncio.run(run(args.messages))
+    print(f"{'case':>16} {'mean ms':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for result in results:
+        print(
+            f"{result.case:>16} {result.mean_ms:>10.4f} "
+            f"{result.p50_ms:>10.4f} {result.p99_ms:>10.4f}"
+        )
+    print(
+        f"saving per message: {results[0].mean_ms - results[1].mean_ms:.3f} ms "
+        f"by the vault, {results[0].mean_ms - results[3].mean_ms:.3f} ms by the cache"
+    )
+
+    if args.report_path:
+        with open(args.report_path, "w") as f:
+            json.dump(
+                {
+                    "benchmark": "llm_credential_cache",
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": [asdict(result) for result in results],
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--messages", type=int, default=200, help="Chat messages per case"
+    )
+    parser.add_argument("--json", dest="report_path", default=None)
+    main(parser.parse_args())
@@ -7,7 +7,7 @@ from typing import Optional
 import tenacity
 import uvicorn
 import websockets
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 from genai_session.session import GenAISession
@@ -18,9 +18,12 @@ from src.middleware.pagination import PaginationMiddleware
 from src.routes.api import api_router
 from src.routes.files.routes import files_router
 from src.routes.websocket import ws_router
+from src.schemas.api.chat.dto import ChatWriteBehindStatsDTO
+from src.utils.frontend_registry import FrontendRegistry, get_frontend_pubsub
 from src.utils.jobs import run_startup_jobs
 from src.utils.message_handler_validator import message_handler_validator
 from src.utils.setup_logger import init_logging
+from src.utils.write_behind import ChatWriteBehind
 
 init_logging()
 settings = get_settings()
@@ -49,13 +52,23 @@ async def lifespan(app: FastAPI):
         await run_startup_jobs()
 
         app.state.genai_session = session
-        app.state.frontend_ws = None
+        app.state.frontend_registry = FrontendRegistry(pubsub=get_frontend_pubsub())
+        await app.state.frontend_registry.start()
+        app.state.chat_writer = None
+        if settings.CHAT_WRITE_BEHIND:
+            app.state.chat_writer = ChatWriteBehind(
+                max_size=settings.CHAT_WRITE_BEHIND_QUEUE_SIZE,
+                batch_size=settings.CHAT_WRITE_BEHIND_BATCH_SIZE,
+                flush_interval=settings.CHAT_WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+                durability=settings.CHAT_WRITE_BEHIND_DURABILITY,
+            )
+            app.state.chat_writer.start()
 
         @session.bind()
         async def message_handler(
             agent_context: GenAIContext,
             message_type: str,
-            agent_uuid: str,
+            agent_uuid: Optional[str] = None,
             session_id: Optional[str] = None,
             request_id: Optional[str] = None,
             log_level: Optional[str] = None,
@@ -64,6 +77,9 @@ async def lifespan(app: FastAPI):
             agent_description: Optional[str] = "",
             agent_input_schema: Optional[dict] = None,
             agent_jwt: Optional[str] = None,
+            logs: Optional[list[dict]] = None,
+            agent_user_id: Optional[str] = None,
+            event: Optional[dict] = None,
         ):
             await message_handler_validator(
                 session=session,
@@ -78,6 +94,9 @@ async def lifespan(app: FastAPI):
                 message_type=message_type,
                 state=app.state,
                 jwt_token=agent_jwt,
+                logs=logs,
+                agent_user_id=agent_user_id,
+                event=event,
             )
 
         logger.info("GenAI Session started")
@@ -108,6 +127,11 @@ async def lifespan(app: FastAPI):
         events_task = asyncio.create_task(genai_event_handler())
         yield
 
+        if app.state.chat_writer:
+            # chat messages still queued are written before the process exits
+            await app.state.chat_writer.stop()
+        await app.state.frontend_registry.stop()
+
         events_task.cancel()
         await events_task
 
@@ -139,5 +163,16 @@ async def redirect_to_docs(request: Request):
     return RedirectResponse("/docs")
 
 
+@app.get("/metrics/chat-write-behind", response_model=ChatWriteBehindStatsDTO)
+async def chat_write_behind_stats(request: Request):
+    """
+    Depth and lag of the queue persisting chat messages in write-behind mode
+    """
+    chat_writer: Optional[ChatWriteBehind] = request.app.state.chat_writer
+    if not chat_writer:
+        raise HTTPException(status_code=404, detail="Chat write-behind is disabled")
+    return chat_writer.stats()
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", log_config=None, host="0.0.0.0", reload=True, port=8000)
@@ -0,0 +1,78 @@
+"""Re-encrypt provider API keys with the vault
+
+Revision ID: 0d1ac422004e
+Revises: 046a06a0b0a4
+Create Date: 2026-10-18 10:12:41.208315
+
+"""
+
+import logging
+from typing import Sequence, Union
+
+import cryptocode
+import sqlalchemy as sa
+from alembic import op
+from src.auth.encrypt import vault
+from src.core.settings import get_settings
+
+# revision identifiers, used by Alembic.
+revision: str = "0d1ac422004e"
+down_revision: Union[str, None] = "046a06a0b0a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger(f"alembic.{__name__}")
+
+modelproviders = sa.table(
+    "modelproviders",
+    sa.column("id", sa.UUID()),
+    sa.column("api_key", sa.String()),
+)
+
+
+def upgrade() -> None:
+    """Re-encrypt legacy cryptocode API keys and keys of inactive vault keys with the active vault key."""
+    connection = op.get_bind()
+    providers = connection.execute(
+        sa.select(modelproviders.c.id, modelproviders.c.api_key)
+    ).all()
+    for provider_id, api_key in providers:
+        if not api_key or not vault.needs_reencryption(api_key):
+            continue
+        try:
+            reencrypted = vault.reencrypt(api_key)
+        except ValueError:
+            # e.g. written under a rotated key, left as is for the user to enter again
+            logger.warning(
+                f"Skipping API key of model provider {provider_id}, it can not be decrypted"
+            )
+            continue
+        connection.execute(
+            modelproviders.update()
+            .where(modelproviders.c.id == provider_id)
+            .values(api_key=reencrypted)
+        )
+
+
+def downgrade() -> None:
+    """Encrypt API keys with cryptocode again."""
+    secret_key = get_settings().SECRET_KEY
+    connection = op.get_bind()
+    providers = connection.execute(
+        sa.select(modelproviders.c.id, modelproviders.c.api_key)
+    ).all()
+    for provider_id, api_key in providers:
+        if not api_key or vault.is_legacy(api_key):
+            continue
+        try:
+            secret = vault.decrypt(api_key)
+        except ValueError:
+            logger.warning(
+                f"Skipping API key of model provider {provider_id}, it can not be decrypted"
+            )
+            continue
+        connection.execute(
+            modelproviders.update()
+            .where(modelproviders.c.id == provider_id)
+            .values(api_key=cryptocode.encrypt(secret, secret_key))
+        )
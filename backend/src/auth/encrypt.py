@@ -1,15 +1,115 @@
-import cryptocode
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from uuid import UUID
+
+from src.auth.vault import DEFAULT_KEY_ID, Vault
 from src.core.settings import get_settings
 
 settings = get_settings()
 
+vault = Vault(
+    keys={DEFAULT_KEY_ID: settings.SECRET_KEY, **settings.VAULT_KEYS},
+    active_key_id=settings.VAULT_ACTIVE_KEY_ID,
+    legacy_key=settings.SECRET_KEY,
+)
+
 
 def encrypt_secret(secret: str) -> str:
-    return cryptocode.encrypt(secret, settings.SECRET_KEY)
+    return vault.encrypt(secret)
 
 
 def decrypt_secret(encrypted_secret: str) -> str:
-    decrypted_secret = cryptocode.decrypt(encrypted_secret, settings.SECRET_KEY)
-    if not decrypted_secret:
-        raise ValueError("Decryption failed. Invalid key or data.")
-    return decrypted_secret
+    return vault.decrypt(encrypted_secret)
+
+
+@dataclass
+class _DecryptedSecret:
+    encrypted_secret: str
+    secret: bytearray
+    expires_at: float
+
+
+class DecryptedSecretCache:
+    """
+    In-process cache of decrypted provider API keys per user and provider.
+
+    Decrypting a legacy cryptocode secret derives the key with scrypt, which takes
+    tens of milliseconds of CPU; vault secrets take microseconds but are cached alike.
+    Entries are only used while the encrypted value they were decrypted from is
+    unchanged, so a key changed by another worker is decrypted again; routes changing
+    providers or configs also invalidate entries explicitly.
+    Evicted secrets are overwritten with zeros (copies handed out as `str` can not be).
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        """
+        Args:
+            ttl_seconds (float): How long a decrypted secret is kept, 0 disables the cache.
+            max_size (int): Maximum amount of secrets kept.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._secrets: OrderedDict[Tuple[str, str], _DecryptedSecret] = OrderedDict()
+
+    async def decrypt(
+        self, user_id: UUID, provider_name: str, encrypted_secret: str
+    ) -> str:
+        """
+        Returns the decrypted secret, decrypting it in a thread if it is not cached.
+
+        Raises:
+            ValueError: If the secret can not be decrypted.
+        """
+        key = (str(user_id), provider_name)
+        now = time.monotonic()
+        if cached := self._secrets.get(key):
+            if cached.encrypted_secret == encrypted_secret and cached.expires_at > now:
+                self._secrets.move_to_end(key)
+                return cached.secret.decode()
+            self._evict(key)
+
+        if vault.is_legacy(encrypted_secret):
+            # scrypt releases the GIL, the event loop keeps running meanwhile
+            secret = await asyncio.to_thread(decrypt_secret, encrypted_secret)
+        else:
+            secret = decrypt_secret(encrypted_secret)
+        if self.ttl_seconds > 0:
+            self._evict(key)
+            self._secrets[key] = _DecryptedSecret(
+                encrypted_secret=encrypted_secret,
+                secret=bytearray(secret.encode()),
+                expires_at=now + self.ttl_seconds,
+            )
+            while len(self._secrets) > self.max_size:
+                self._evict(next(iter(self._secrets)))
+        return secret
+
+    def invalidate(self, user_id: UUID, provider_name: Optional[str] = None):
+        """
+        Drops the secret of a provider of the user, all of the user's if no provider is given.
+        """
+        if provider_name is not None:
+            self._evict((str(user_id), provider_name))
+            return
+        for key in [key for key in self._secrets if key[0] == str(user_id)]:
+            self._evict(key)
+
+    def clear(self):
+        for key in list(self._secrets):
+            self._evict(key)
+
+    def __len__(self) -> int:
+        return len(self._secrets)
+
+    def _evict(self, key: Tuple[str, str]):
+        if cached := self._secrets.pop(key, None):
+            cached.secret[:] = bytes(len(cached.secret))
+
+
+credential_cache = DecryptedSecretCache(
+    ttl_seconds=settings.LLM_CREDENTIAL_CACHE_TTL_SECONDS,
+    max_size=settings.LLM_CREDENTIAL_CACHE_SIZE,
+)
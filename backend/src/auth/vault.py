@@ -0,0 +1,110 @@
+import base64
+import hashlib
+from typing import Dict, Optional
+
+import cryptocode
+from Cryptodome.Cipher import AES
+from Cryptodome.Random import get_random_bytes
+
+# prefix of secrets encrypted by the vault, legacy cryptocode secrets have none
+VAULT_PREFIX = "gv1"
+# id of the key derived from SECRET_KEY
+DEFAULT_KEY_ID = "default"
+
+NONCE_SIZE = 12
+TAG_SIZE = 16
+
+
+class Vault:
+    """
+    Authenticated encryption of secrets stored in the database, like provider API keys.
+
+    Secrets are encrypted with AES-256-GCM and stored as `gv1:<key id>:<base64>`, the
+    key id is authenticated along with the ciphertext. Data keys are derived from the
+    configured secrets with scrypt once per key id and cached, so encryption and
+    decryption take microseconds. New secrets are encrypted with the active key,
+    secrets of the other configured keys stay readable until they are re-encrypted.
+
+    Secrets encrypted with cryptocode before the vault existed are still decrypted,
+    paying the key derivation on every call until they are migrated.
+    """
+
+    def __init__(self, keys: Dict[str, str], active_key_id: str, legacy_key: str):
+        """
+        Args:
+            keys (Dict[str, str]): Secrets the data keys are derived from, by key id.
+            active_key_id (str): Id of the key new secrets are encrypted with.
+            legacy_key (str): Password of secrets encrypted with cryptocode.
+        """
+        for key_id in keys:
+            if not key_id or ":" in key_id:
+                raise ValueError(f"Invalid vault key id '{key_id}'")
+        if active_key_id not in keys:
+            raise ValueError(f"Active vault key '{active_key_id}' is not configured")
+        self.keys = keys
+        self.active_key_id = active_key_id
+        self.legacy_key = legacy_key
+        self._data_keys: Dict[str, bytes] = {}
+
+    def encrypt(self, secret: str, key_id: Optional[str] = None) -> str:
+        key_id = key_id or self.active_key_id
+        header = f"{VAULT_PREFIX}:{key_id}"
+        nonce = get_random_bytes(NONCE_SIZE)
+        cipher = AES.new(self._data_key(key_id), AES.MODE_GCM, nonce=nonce)
+        cipher.update(header.encode())
+        ciphertext, tag = cipher.encrypt_and_digest(secret.encode())
+        payload = base64.urlsafe_b64encode(nonce + ciphertext + tag).decode()
+        return f"{header}:{payload}"
+
+    def decrypt(self, encrypted_secret: str) -> str:
+        """
+        Raises:
+            ValueError: If the secret is malformed, was encrypted with an unknown key
+                or fails authentication.
+        """
+        if self.is_legacy(encrypted_secret):
+            secret = cryptocode.decrypt(encrypted_secret, self.legacy_key)
+            if not secret:
+                raise ValueError("Decryption failed. Invalid key or data.")
+            return secret
+
+        header, _, payload = encrypted_secret.rpartition(":")
+        key_id = header.partition(":")[2]
+        if key_id not in self.keys:
+            raise ValueError(f"Decryption failed. Unknown key '{key_id}'.")
+        try:
+            data = base64.urlsafe_b64decode(payload)
+            cipher = AES.new(
+                self._data_key(key_id), AES.MODE_GCM, nonce=data[:NONCE_SIZE]
+            )
+            cipher.update(header.encode())
+            return cipher.decrypt_and_verify(
+                data[NONCE_SIZE:-TAG_SIZE], data[-TAG_SIZE:]
+            ).decode()
+        except (ValueError, TypeError) as e:
+            raise ValueError("Decryption failed. Invalid key or data.") from e
+
+    def is_legacy(self, encrypted_secret: str) -> bool:
+        return not encrypted_secret.startswith(f"{VAULT_PREFIX}:")
+
+    def needs_reencryption(self, encrypted_secret: str) -> bool:
+        """
+        Whether the secret is not encrypted with the active key.
+        """
+        return not encrypted_secret.startswith(f"{VAULT_PREFIX}:{self.active_key_id}:")
+
+    def reencrypt(self, encrypted_secret: str) -> str:
+        return self.encrypt(self.decrypt(encrypted_secret))
+
+    def _data_key(self, key_id: str) -> bytes:
+        if data_key := self._data_keys.get(key_id):
+            return data_key
+        data_key = self._data_keys[key_id] = hashlib.scrypt(
+            self.keys[key_id].encode(),
+            salt=f"genai-vault:{key_id}".encode(),
+            n=2**14,
+            r=8,
+            p=1,
+            dklen=32,
+        )
+        return data_key
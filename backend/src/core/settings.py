@@ -1,8 +1,9 @@
 from functools import lru_cache
-from typing import Optional, Self
+from typing import Dict, Literal, Optional, Self
 
 from pydantic import Field, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from src.utils.enums import WriteBehindDurability
 
 
 class Settings(BaseSettings):
@@ -44,6 +45,38 @@ class Settings(BaseSettings):
 
     CELERY_BEAT_INTERVAL_MINUTES: int = Field(default=10)
 
+    # messages of one frontend websocket processed concurrently, reading pauses at the cap
+    FRONTEND_WS_MAX_IN_FLIGHT: int = Field(default=8)
+    # frames waiting for the writer of a frontend websocket
+    FRONTEND_WS_SEND_QUEUE_SIZE: int = Field(default=1000)
+    # time budget of a frontend message, carried as a deadline through the router and
+    # the master agent, which drop work whose caller has given up
+    FRONTEND_REQUEST_TIMEOUT_SECONDS: float = Field(default=600.0)
+
+    # secrets stored in the database are encrypted with the active vault key, other
+    # keys stay readable for rotation; the "default" key is derived from SECRET_KEY
+    VAULT_KEYS: Dict[str, str] = Field(default={})
+    VAULT_ACTIVE_KEY_ID: str = Field(default="default")
+
+    # decrypted provider API keys are cached per user and provider, 0 disables it
+    LLM_CREDENTIAL_CACHE_TTL_SECONDS: float = Field(default=300.0)
+    LLM_CREDENTIAL_CACHE_SIZE: int = Field(default=10_000)
+
+    # frames of frontend sessions (agent logs) are shared between backend workers
+    # through this pub/sub, "memory" is a single process stand-in for tests
+    FRONTEND_PUBSUB_BACKEND: Literal["none", "memory", "redis"] = Field(default="none")
+    FRONTEND_PUBSUB_REDIS_URI: str = Field(default="redis://genai-redis:6379/2")
+
+    # master agent replies are persisted after the response is sent to the frontend,
+    # they may be missing from the chat history for up to the flush interval
+    CHAT_WRITE_BEHIND: bool = Field(default=False)
+    CHAT_WRITE_BEHIND_DURABILITY: WriteBehindDurability = Field(
+        default=WriteBehindDurability.buffer
+    )
+    CHAT_WRITE_BEHIND_QUEUE_SIZE: int = Field(default=10_000)
+    CHAT_WRITE_BEHIND_BATCH_SIZE: int = Field(default=100)
+    CHAT_WRITE_BEHIND_FLUSH_INTERVAL_SECONDS: float = Field(default=0.05)
+
     @model_validator(mode="after")
     def build_database_uri(self) -> Self:
         if not self.SQLALCHEMY_ASYNC_DATABASE_URI:
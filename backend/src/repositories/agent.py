@@ -4,7 +4,7 @@ from uuid import UUID
 from fastapi import HTTPException
 from mcp.types import Tool, ToolAnnotations
 from pydantic import BaseModel
-from sqlalchemy import and_, select, text, update
+from sqlalchemy import and_, case, func, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.auth.jwt import TokenLifespanType, create_access_token, validate_token
 from src.models import A2ACard, Agent, AgentWorkflow, MCPTool, User
@@ -269,6 +269,39 @@ class AgentRepository(CRUDBase[Agent, AgentCreate, AgentUpdate]):
         )
         return q.scalars().first()  # one jwt per one agent per user
 
+    async def register_verified_agent(
+        self,
+        db: AsyncSession,
+        agent_id: str,
+        user_id: str,
+        agent_name: str,
+        agent_in: AgentUpdate,
+    ) -> Optional[Agent]:
+        """
+        Marks an agent whose JWT has already been verified by the router as active
+        with a single UPDATE ... RETURNING, without loading the agent first.
+        The alias is kept while the agent name does not change.
+        """
+        previous_name = func.regexp_replace(self.model.alias, "_[^_]*$", "")
+        q = await db.execute(
+            update(self.model)
+            .where(and_(self.model.id == agent_id, self.model.creator_id == user_id))
+            .values(
+                name=agent_in.name,
+                description=agent_in.description,
+                input_parameters=agent_in.input_parameters,
+                is_active=True,
+                alias=case(
+                    (previous_name == agent_name, self.model.alias),
+                    else_=generate_alias(agent_name),
+                ),
+            )
+            .returning(self.model)
+        )
+        agent = q.scalars().first()
+        await db.commit()
+        return agent
+
     async def get_agent_by_id(
         self, db: AsyncSession, agent_id: UUID, user_model: User
     ) -> Optional[Agent]:
@@ -639,9 +672,11 @@ LIMIT :limit OFFSET :offset;
                         name=col["name"],
                         description=col["description"],
                         inputSchema=col["json_data1"],
-                        annotations=ToolAnnotations(**col["json_data2"])
-                        if col["json_data2"]
-                        else None,
+                        annotations=(
+                            ToolAnnotations(**col["json_data2"])
+                            if col["json_data2"]
+                            else None
+                        ),
                     ),
                     aliased_title=col["alias"],
                 )
@@ -726,9 +761,11 @@ LIMIT :limit OFFSET :offset;
         return ActiveAgentsDTO(
             count_active_connections=len(response),
             active_connections=[
-                resp_model.model_dump(exclude_none=True)
-                if isinstance(resp_model, BaseModel)
-                else resp_model
+                (
+                    resp_model.model_dump(exclude_none=True)
+                    if isinstance(resp_model, BaseModel)
+                    else resp_model
+                )
                 for resp_model in response
             ],
         )
@@ -1,12 +1,26 @@
 import copy
-from uuid import UUID
+from typing import List, Optional
+from uuid import UUID, uuid4
 
 from fastapi import HTTPException
-from sqlalchemy import and_, select
+from sqlalchemy import (
+    ColumnElement,
+    Insert,
+    and_,
+    cast,
+    exists,
+    func,
+    insert,
+    literal,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
-from src.models import ChatConversation, ChatMessage, User
+from src.models import ChatConversation, ChatMessage, File, User
 from src.repositories.base import CRUDBase
 from src.schemas.api.chat.dto import BaseChatDTO, ChatDetailsDTO, ListChatsDTO
 from src.schemas.api.chat.schemas import (
@@ -15,6 +29,7 @@ from src.schemas.api.chat.schemas import (
     GetChatMessage,
     UpdateConversation,
 )
+from src.schemas.api.files.dto import FileDTO
 from src.utils.helpers import prettify_integrity_error_details
 from src.utils.pagination import paginate
 
@@ -93,6 +108,13 @@ class ChatRepository(
         )
         return q.scalars().first()
 
+    async def get_chat_owner_id(
+        self, db: AsyncSession, session_id: str
+    ) -> Optional[UUID]:
+        return await db.scalar(
+            select(self.model.creator_id).where(self.model.session_id == session_id)
+        )
+
     async def get_chat_history_by_session_id(
         self, db: AsyncSession, user_model: User, session_id: str
     ):
@@ -195,31 +217,186 @@ class ChatRepository(
         session_id: str,
         request_id: str,
         message_in: BaseChatMessage,
+        with_history: bool = False,
     ):
-        user = copy.deepcopy(user_model)
+        """
+        Appends a message to the chat of the user.
 
-        chat = await self.get_chat_history_by_session_id(
-            db=db, user_model=user_model, session_id=session_id
+        Returns:
+            The new message, or the whole chat history if 'with_history' is set.
+        """
+        user = copy.deepcopy(user_model) if with_history else user_model
+
+        new_message = await self.append_message(
+            db=db,
+            user_id=user_model.id,
+            session_id=session_id,
+            request_id=request_id,
+            message_in=message_in,
         )
-        if not chat:
+        if not new_message:
             raise HTTPException(
                 detail=f"Chat with session_id: '{session_id}' does not exist",
                 status_code=400,
             )
 
-        new_message = ChatMessage(
-            sender_type=message_in.sender_type,
-            content=message_in.content,
-            conversation_id=session_id,
-            request_id=request_id,
-        )
-        db.add(new_message)
-        await db.commit()
-        await db.refresh(new_message)
+        if not with_history:
+            return new_message
 
         return await self.get_chat_history(
             db=db, user_model=user, session_id=session_id
         )
 
+    async def append_message(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        session_id: str,
+        request_id: str,
+        message_in: BaseChatMessage,
+    ) -> Optional[GetChatMessage]:
+        """
+        Inserts a message into the chat of the user with a single statement, without
+        loading the chat or its messages.
+
+        Returns:
+            The new message, None if the user has no chat with the session_id.
+        """
+        # the message is only inserted if the chat is selected
+        conversation = (
+            select(self.model.session_id)
+            .where(
+                and_(
+                    self.model.session_id == session_id,
+                    self.model.creator_id == user_id,
+                )
+            )
+            .subquery("conversation")
+        )
+        q = await db.execute(
+            self._insert_message(
+                conversation_id=conversation.c.session_id,
+                request_id=request_id,
+                message_in=message_in,
+            ).returning(
+                ChatMessage.sender_type,
+                ChatMessage.content,
+                ChatMessage.request_id,
+                ChatMessage.created_at,
+            )
+        )
+        row = q.first()
+        await db.commit()
+        if not row:
+            return None
+        return GetChatMessage(**row._mapping)
+
+    @staticmethod
+    def _insert_message(
+        conversation_id: ColumnElement, request_id: str, message_in: BaseChatMessage
+    ) -> Insert:
+        """
+        INSERT ... SELECT of a chat message into the conversation selected by
+        'conversation_id', nothing is inserted if no conversation is selected.
+        """
+        return insert(ChatMessage).from_select(
+            ["id", "sender_type", "content", "conversation_id", "request_id"],
+            select(
+                literal(uuid4(), ChatMessage.id.type),
+                cast(
+                    literal(message_in.sender_type, ChatMessage.sender_type.type),
+                    ChatMessage.sender_type.type,
+                ),
+                literal(message_in.content),
+                conversation_id,
+                literal(request_id, ChatMessage.request_id.type),
+            ),
+        )
+
+    async def prepare_user_message(
+        self,
+        db: AsyncSession,
+        user_model: User,
+        session_id: str,
+        request_id: str,
+        message_in: BaseChatMessage,
+        file_ids: List[str],
+    ) -> Optional[List[FileDTO]]:
+        """
+        Prepares a frontend message for the master agent with a single statement:
+        upserts the chat of the session, attaches the files to the request and inserts
+        the user message, all in one transaction.
+
+        Args:
+            db: The database session.
+            user_model: The user sending the message.
+            session_id: session_id of the websocket connection.
+            request_id: request_id of the message.
+            message_in: The user message.
+            file_ids: list of the uuid file_ids sent with the message
+
+        Returns:
+            List of attached files metadata,
+            None if the session_id belongs to a chat of another user.
+        """
+        # the chat is only returned when it was created or belongs to the user
+        chat = (
+            pg_insert(ChatConversation)
+            .values(
+                session_id=session_id,
+                title=message_in.content[:20],
+                creator_id=user_model.id,
+            )
+            .on_conflict_do_update(
+                index_elements=[ChatConversation.session_id],
+                set_={"updated_at": func.now()},
+                where=ChatConversation.creator_id == user_model.id,
+            )
+            .returning(ChatConversation.session_id)
+            .cte("chat")
+        )
+        message = (
+            self._insert_message(
+                conversation_id=chat.c.session_id,
+                request_id=request_id,
+                message_in=message_in,
+            )
+            .returning(ChatMessage.id)
+            .cte("message")
+        )
+        columns = [chat.c.session_id.label("chat_session_id")]
+        from_clause = chat.join(message, true())
+
+        files = None
+        if file_ids:
+            files = (
+                update(File)
+                .where(
+                    and_(
+                        File.id.in_(file_ids),
+                        File.creator_id == user_model.id,
+                        exists(select(chat.c.session_id)),
+                    )
+                )
+                .values(session_id=session_id, request_id=request_id)
+                .returning(*File.__table__.c)
+                .cte("files")
+            )
+            columns.extend(files.c)
+            from_clause = from_clause.outerjoin(files, true())
+
+        rows = (await db.execute(select(*columns).select_from(from_clause))).all()
+        await db.commit()
+        if not rows:
+            return None
+        if files is None:
+            return []
+
+        return [
+            FileDTO(**{column.name: row._mapping[column] for column in files.c})
+            for row in rows
+            if row._mapping[files.c.id] is not None
+        ]
+
 
 chat_repo = ChatRepository(ChatConversation)
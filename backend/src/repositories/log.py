@@ -1,9 +1,9 @@
 from typing import Optional
-from src.schemas.ws.log import LogCreate, LogUpdate, LogEntryDTO
+from src.schemas.ws.log import LogCreate, LogUpdate, LogEntry, LogEntryDTO
 from src.repositories.base import CRUDBase
 from src.models import Log
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 
 
 class LogRepository(CRUDBase[Log, LogCreate, LogUpdate]):
@@ -19,5 +19,20 @@ class LogRepository(CRUDBase[Log, LogCreate, LogUpdate]):
         q = await db.execute(select(self.model).where(self.model.request_id == id_))
         return [LogEntryDTO(**log.__dict__) for log in q.scalars().all()]
 
+    async def create_many(
+        self, db: AsyncSession, objs_in: list[LogCreate]
+    ) -> list[LogEntry]:
+        """Inserts all logs with a single statement and commit."""
+        if not objs_in:
+            return []
+        result = await db.scalars(
+            insert(self.model).returning(self.model),
+            [obj_in.model_dump() for obj_in in objs_in],
+        )
+        # read before commit, committing expires the loaded attributes
+        log_entries = [LogEntry(**log.__dict__) for log in result.all()]
+        await db.commit()
+        return log_entries
+
 
 log_repo = LogRepository(Log)
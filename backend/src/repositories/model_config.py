@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Tuple
 from uuid import UUID
 
 from fastapi import HTTPException
@@ -140,6 +140,7 @@ class ModelConfigRepository(
             ModelProviderDTO(
                 provider=p.name,
                 api_key=p.api_key,
+                # desc sort, TODO: rework
                 configs=[
                     ModelConfigDTO(
                         id=c.id,
@@ -152,7 +153,7 @@ class ModelConfigRepository(
                         max_last_messages=c.max_last_messages,
                     )
                     for c in p.configs
-                ][::-1],  # desc sort, TODO: rework
+                ][::-1],
             )
             for p in q.all()
         ]
@@ -225,6 +226,39 @@ class ModelConfigRepository(
         )
         return p
 
+    async def get_provider_and_config_by_name(
+        self, db: AsyncSession, provider_name: str, config_name: str, user_id: UUID
+    ) -> Tuple[Optional[ModelProvider], Optional[ModelConfig]]:
+        """
+        Fetches a provider and a model config of the user by their names in one query.
+        The config is looked up by name independently of the provider it belongs to,
+        as when they are fetched one by one.
+
+        Returns:
+            provider and config, config is None if only the provider exists
+            and both are None if the provider does not exist
+        """
+        q = await db.execute(
+            select(ModelProvider, ModelConfig)
+            .outerjoin(
+                ModelConfig,
+                and_(
+                    ModelConfig.name == config_name,
+                    ModelConfig.creator_id == user_id,
+                ),
+            )
+            .where(
+                and_(
+                    ModelProvider.name == provider_name,
+                    ModelProvider.creator_id == user_id,
+                )
+            )
+        )
+        row = q.first()
+        if not row:
+            return None, None
+        return row[0], row[1]
+
     async def get_provider_with_configs_by_name(
         self, db: AsyncSession, provider_name: str, user_model: User
     ):
@@ -8,6 +8,7 @@ from fastapi.responses import Response
 from sqlalchemy.exc import IntegrityError
 
 from src.auth.dependencies import CurrentUserDependency
+from src.auth.encrypt import credential_cache
 from src.db.session import AsyncDBSession
 from src.repositories.model_config import model_config_repo
 from src.schemas.api.model_config.dto import (
@@ -60,6 +61,7 @@ async def add_model_provider(
         p = await model_config_repo.create_provider(
             db=db, provider_in=provider_in, user_model=user_model
         )
+        credential_cache.invalidate(user_id=user_model.id, provider_name=p.name)
         return ModelProviderCreateDTO(
             id=p.id,
             provider=p.name,
@@ -89,9 +91,11 @@ async def add_model_config(
     model_config_in: ModelConfigCreate,
 ):
     try:
-        return await model_config_repo.create_model_config_with_encryption(
+        config = await model_config_repo.create_model_config_with_encryption(
             db=db, obj_in=model_config_in, user_model=user_model
         )
+        credential_cache.invalidate(user_id=user_model.id)
+        return config
 
     except HTTPException as e:
         raise e
@@ -110,9 +114,11 @@ async def update_model_config(
     model_config_id: UUID,
     model_config_in: ModelConfigUpdate,
 ):
-    return await model_config_repo.update_model_config_with_encryption(
+    config = await model_config_repo.update_model_config_with_encryption(
         db=db, id_=model_config_id, user_model=user_model, obj_in=model_config_in
     )
+    credential_cache.invalidate(user_id=user_model.id)
+    return config
 
 
 @llm_router.patch("/model/providers/{provider_name}")
@@ -133,6 +139,8 @@ async def update_provider(
     p = await model_config_repo.update_provider(
         db=db, provider_obj=provider, upd_in=provider_upd_in
     )
+    credential_cache.invalidate(user_id=user_model.id, provider_name=provider_name)
+    credential_cache.invalidate(user_id=user_model.id, provider_name=p.name)
     return ModelProviderUpdateDTO(
         id=p.id,
         api_key=p.api_key,
@@ -153,6 +161,7 @@ async def delete_model_config(
         db=db, id_=model_config_id, user=user_model
     )
     if is_ok:
+        credential_cache.invalidate(user_id=user_model.id)
         return Response(status_code=204)
 
 
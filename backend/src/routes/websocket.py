@@ -1,7 +1,9 @@
 import copy
 import logging
+import time
 import traceback
 from datetime import datetime
+from typing import Optional
 from uuid import uuid4
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
@@ -9,8 +11,10 @@ from genai_session.session import AgentResponse, GenAISession
 from genai_session.utils.naming_enums import MasterServerName
 from pydantic import ValidationError
 
+from src.auth.encrypt import credential_cache
 from src.core.settings import get_settings
-from src.db.session import AsyncDBSession
+from src.db.session import AsyncDBSession, async_session
+from src.models import User
 from src.repositories.chat import chat_repo
 from src.repositories.files import files_repo
 from src.repositories.model_config import model_config_repo
@@ -19,13 +23,15 @@ from src.schemas.api.chat.schemas import CreateChatMessage
 from src.schemas.ws.frontend import (
     AgentResponseDTO,
     IncomingFrontendMessage,
-    LLMPropertiesDecryptCreds,
+    LLMProperties,
 )
 from src.schemas.ws.ml import OutgoingMLRequestSchema
 from src.utils.enums import SenderType
 from src.utils.validate_uuid import is_valid_uuid
+from src.utils.frontend_registry import FrontendRegistry
 from src.utils.validation_error_handler import validation_exception_handler
-from src.utils.websocket import get_current_ws_user
+from src.utils.websocket import FrontendConnection, get_current_ws_user
+from src.utils.write_behind import ChatWriteBehind
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -53,10 +59,14 @@ async def handle_frontend_ws(
             },
             "files": [
                 "55704c5d-2d9b-4e5a-9d01-c6816cac5aa2"
-            ]
+            ],
+            "request_id": "49d7aaaf-a173-4a9f-a84c-29dbb5f8b50e"  # optional
         }
         ```
 
+        Messages are processed concurrently, the response of each one carries
+        its `request_id` (generated if the frontend did not send one).
+
         Example of message structure for master agent:
         ```
         {
@@ -135,71 +145,122 @@ async def handle_frontend_ws(
             )
             return
 
-    websocket.app.state.frontend_ws = websocket
-    await websocket.accept()
+        owner_id = await chat_repo.get_chat_owner_id(db=db, session_id=session_id)
+        if owner_id and owner_id != user_model.id:
+            await websocket.close(
+                code=status.WS_1008_POLICY_VIOLATION,
+                reason="session_id belongs to another user",
+            )
+            return
+
+    connection = FrontendConnection(
+        websocket=websocket,
+        max_in_flight=settings.FRONTEND_WS_MAX_IN_FLIGHT,
+        queue_size=settings.FRONTEND_WS_SEND_QUEUE_SIZE,
+    )
+    # agent logs of the session are pushed through the writer of the connection
+    registry: FrontendRegistry = websocket.app.state.frontend_registry
+    if not registry.subscribe(
+        user_id=user_model.id, session_id=session_id, connection=connection
+    ):
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason="session_id belongs to another user",
+        )
+        return
 
     session: GenAISession = websocket.app.state.genai_session
 
     try:
+        await websocket.accept()
+        connection.start()
+
         while True:
             try:
                 message_obj = IncomingFrontendMessage.model_validate_json(
                     await websocket.receive_text()
                 )
             except ValidationError as e:
-                await websocket.send_text(
+                await connection.send_text(
                     f"Message validation failed. Details: {validation_exception_handler(exc=e)}"  # noqa: E501
                 )
-            chat_title = message_obj.message[:20]
-            chat = await chat_repo.get_chat_by_session_id(
-                db=db, session_id=session_id, user_model=user_model
-            )
-            if not chat:
-                await chat_repo.create_chat_by_session_id(
-                    db=db,
+                continue
+
+            # every message is processed in its own task, responses carry its request_id
+            await connection.spawn(
+                handle_frontend_message(
+                    connection=connection,
+                    session=session,
                     user_model=user_model,
                     session_id=session_id,
-                    initial_user_message=chat_title,
+                    message_obj=message_obj,
+                    chat_writer=websocket.app.state.chat_writer,
                 )
+            )
 
-            request_id = str(uuid4())
-            file_ids = message_obj.files
-            if file_ids:
-                files = await files_repo.enrich_files_with_session_request_id(
-                    db=db,
-                    file_ids=file_ids,
-                    session_id=session_id,
-                    request_id=request_id,
-                    user_model=user_model,
-                )
-            else:
-                files = []
+    except WebSocketDisconnect:
+        logger.warning("Frontend client disconnected")
 
-            provider = await model_config_repo.get_provider_by_name(
-                db=db, provider_name=message_obj.provider, user_id=user_model.id
-            )
-            config = await model_config_repo.find_model_by_config_name(
-                db=db, config_name=message_obj.llm_name, user_model=user_model
+    except Exception:
+        logger.error(
+            f"Unexpected error occured. Traceback: {traceback.format_exc(limit=600)}"
+        )
+    finally:
+        await connection.stop()
+        registry.unsubscribe(session_id=session_id, connection=connection)
+
+
+async def handle_frontend_message(
+    connection: FrontendConnection,
+    session: GenAISession,
+    user_model: User,
+    session_id: str,
+    message_obj: IncomingFrontendMessage,
+    chat_writer: Optional[ChatWriteBehind],
+):
+    """
+    Enriches a frontend message, forwards it to the master agent and sends the response
+    back to the frontend. Runs concurrently with the other messages of the connection,
+    hence it uses its own database session.
+    """
+    request_id = message_obj.request_id or str(uuid4())
+    deadline = time.time() + settings.FRONTEND_REQUEST_TIMEOUT_SECONDS
+    try:
+        async with async_session() as db:
+            provider, config = await model_config_repo.get_provider_and_config_by_name(
+                db=db,
+                provider_name=message_obj.provider,
+                config_name=message_obj.llm_name,
+                user_id=user_model.id,
             )
             if not provider:
-                await websocket.send_json(
-                    {"error": f"Provider {message_obj.provider} does not exist"}
-                )
-                await websocket.close(
-                    code=status.WS_1003_UNSUPPORTED_DATA,
-                    reason=f"Provider {message_obj.provider} does not exist",
+                await connection.send_json(
+                    {
+                        "error": f"Provider {message_obj.provider} does not exist",
+                        "request_id": request_id,
+                    }
                 )
+                return
 
             if not config:
-                await websocket.send_json(
-                    {"error": f"Config {message_obj.llm_name} does not exist"}
-                )
-                await websocket.close(
-                    code=status.WS_1003_UNSUPPORTED_DATA,
-                    reason=f"Config {message_obj.llm_name} does not exist",
+                await connection.send_json(
+                    {
+                        "error": f"Config {message_obj.llm_name} does not exist",
+                        "request_id": request_id,
+                    }
                 )
+                return
+
             try:
-                enriched_llm_props = LLMPropertiesDecryptCreds(
+                api_key = provider.api_key
+                if api_key:
+                    # decrypting takes tens of milliseconds, the result is cached
+                    api_key = await credential_cache.decrypt(
+                        user_id=user_model.id,
+                        provider_name=provider.name,
+                        encrypted_secret=api_key,
+                    )
+                enriched_llm_props = LLMProperties(
                     config_name=config.name,
                     provider=provider.name,
                     model=config.model,
@@ -209,19 +270,21 @@ async def handle_frontend_ws(
                     credentials={
                         **config.credentials,
                         **provider.provider_metadata,
-                        "api_key": provider.api_key,
+                        "api_key": api_key,
                     },
                     max_last_messages=config.max_last_messages,
                 )
             except ValueError:
-                await websocket.send_json(
+                await connection.send_json(
                     {
-                        "error": "Could not decrypt api_key. Make sure 'api_key' exists and model config was created beforehand "  # noqa: E501
+                        "error": "Could not decrypt api_key. Make sure 'api_key' exists and model config was created beforehand ",  # noqa: E501
+                        "request_id": request_id,
                     }
                 )
                 return
 
-            await chat_repo.add_message_to_conversation(
+            # chat, files and user message are written by a single statement
+            files = await chat_repo.prepare_user_message(
                 db=db,
                 user_model=user_model,
                 session_id=session_id,
@@ -229,7 +292,16 @@ async def handle_frontend_ws(
                 message_in=CreateChatMessage(
                     sender_type=SenderType.user, content=message_obj.message
                 ),
+                file_ids=message_obj.files or [],
             )
+            if files is None:
+                await connection.send_json(
+                    {
+                        "error": f"Chat with session_id: '{session_id}' is not available",
+                        "request_id": request_id,
+                    }
+                )
+                return
 
             ml_request = OutgoingMLRequestSchema(
                 user_id=user_model.id,
@@ -237,77 +309,93 @@ async def handle_frontend_ws(
                 timestamp=int(datetime.now().timestamp()),
                 configs=enriched_llm_props.to_json(),
                 files=files,
+                deadline=deadline,
             )
             req_body = ml_request.model_dump(exclude_none=True)
 
-            try:
-                session.request_id = request_id
-                session.session_id = session_id
-                response: AgentResponse = await session.send(
-                    client_id=MasterServerName.MASTER_SERVER_ML.value,
-                    message=req_body,
-                )
-                agent_response = AgentResponseDTO(
-                    execution_time=response.execution_time,
-                    response=response.response,
-                    request_id=request_id,
-                    session_id=session_id,
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                await connection.send_json(
+                    {"error": "Request deadline has passed", "request_id": request_id}
                 )
+                return
+
+            # request and session IDs are attributes of the session, which is shared by
+            # the messages in flight: each of them sends through its own shallow copy
+            request_session = copy.copy(session)
+            request_session.request_id = request_id
+            request_session.session_id = session_id
+            response: AgentResponse = await request_session.send(
+                client_id=MasterServerName.MASTER_SERVER_ML.value,
+                message=req_body,
+                close_timeout=timeout,
+            )
+            agent_response = AgentResponseDTO(
+                execution_time=response.execution_time,
+                response=response.response,
+                request_id=request_id,
+                session_id=session_id,
+            )
+            reply_in = CreateChatMessage(
+                sender_type=SenderType.master_agent,
+                content=agent_response.response,
+            )
+            if not chat_writer:
                 await chat_repo.add_message_to_conversation(
                     db=db,
                     user_model=user_model,
                     session_id=session_id,
                     request_id=request_id,
-                    message_in=CreateChatMessage(
-                        sender_type=SenderType.master_agent,
-                        content=agent_response.response,
-                    ),
+                    message_in=reply_in,
                 )
 
-                files_by_request_id = await files_repo.list_files_by_request_id(
-                    db=db, request_id=request_id
-                )
-                response_with_files = AgentResponseWithFilesDTO(
-                    **agent_response.model_dump(mode="json"),
-                    files=files_by_request_id,
-                )
+            files_by_request_id = await files_repo.list_files_by_request_id(
+                db=db, request_id=request_id
+            )
+            response_with_files = AgentResponseWithFilesDTO(
+                **agent_response.model_dump(mode="json"),
+                files=files_by_request_id,
+            )
 
-                response_structure = AgentTypeResponseDTO(
-                    type="agent_response", response=response_with_files
-                )
-                await websocket.send_text(response_structure.model_dump_json())
-            except ConnectionRefusedError:
-                logger.critical(
-                    f"Cannot connect to the router service at '{settings.ROUTER_WS_URL}'. Make sure it is running and envs are configured correctly"  # noqa: E501
-                )
-                await websocket.send_json(
-                    {"error": "Cannot connect to router service. Try again later"}
-                )
-                await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
-                raise ConnectionRefusedError(
-                    "Cannot connect to router service. Make sure it is running and envs are configured correctly"
-                )
-            except Exception:
-                logger.error(f"Unexpected error occured: {traceback.format_exc()}")
-                await websocket.send_json(
-                    {"error": "Unexpected error occured. Try again later"}
-                )
-                await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        response_structure = AgentTypeResponseDTO(
+            type="agent_response", response=response_with_files
+        )
+        await connection.send_text(response_structure.model_dump_json())
+
+        if chat_writer:
+            # persisted after the frontend received the response
+            await chat_writer.put(
+                user_id=user_model.id,
+                session_id=session_id,
+                request_id=request_id,
+                message_in=reply_in,
+            )
 
+    except ConnectionRefusedError:
+        logger.critical(
+            f"Cannot connect to the router service at '{settings.ROUTER_WS_URL}'. Make sure it is running and envs are configured correctly"  # noqa: E501
+        )
+        await connection.send_json(
+            {
+                "error": "Cannot connect to router service. Try again later",
+                "request_id": request_id,
+            }
+        )
+        await connection.close(code=status.WS_1011_INTERNAL_ERROR)
     except ValidationError as e:
         logger.debug(traceback.format_exc())
-        await websocket.send_text(
+        await connection.send_text(
             f"Message validation failed. Details: {validation_exception_handler(exc=e)}"  # TODO: returned message on exc is not informative # noqa: E501
         )
     except ValueError as e:
-        await websocket.send_text(
+        await connection.send_text(
             f"Message validation failed. Incorrect value was provided. Details: {str(e)}"
         )
-
-    except WebSocketDisconnect:
-        logger.warning("Frontend client disconnected")
-
     except Exception:
-        logger.error(
-            f"Unexpected error occured. Traceback: {traceback.format_exc(limit=600)}"
+        logger.error(f"Unexpected error occured: {traceback.format_exc()}")
+        await connection.send_json(
+            {
+                "error": "Unexpected error occured. Try again later",
+                "request_id": request_id,
+            }
         )
@@ -17,3 +17,17 @@ class ListChatsDTO(BaseModel):
 
 class ChatDetailsDTO(BaseChatDTO):
     messages: list[GetChatMessage]
+
+
+class ChatWriteBehindStatsDTO(BaseModel):
+    durability: str
+    depth: int
+    capacity: int
+    enqueued: int
+    written: int
+    dropped: int
+    failed: int
+    batches: int
+    # time from queueing to commit of the oldest message of the last / slowest batch
+    last_lag_seconds: float
+    max_lag_seconds: float
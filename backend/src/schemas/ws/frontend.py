@@ -2,7 +2,6 @@ from typing import List, Optional, Self, Union
 from uuid import UUID
 
 from pydantic import BaseModel, Field, field_validator, model_validator
-from src.auth.encrypt import decrypt_secret
 
 
 class Flow(BaseModel):
@@ -70,16 +69,6 @@ class LLMProperties(BaseModel):
         }
 
 
-class LLMPropertiesDecryptCreds(LLMProperties):
-    @field_validator("credentials")
-    def validate_provider_model(cls, v):
-        if v:
-            if api_key := v.get("api_key"):
-                v["api_key"] = decrypt_secret(api_key)
-                return v
-        return v
-
-
 class LLMPropertiesDTO(BaseModel):
     llm: Optional[dict] = {}
 
@@ -89,6 +78,14 @@ class IncomingFrontendMessage(BaseModel):
     provider: str
     llm_name: str
     files: Optional[List[str]] = []
+    # lets the frontend correlate responses of concurrent messages, generated if missing
+    request_id: Optional[str] = None
+
+    @field_validator("request_id")
+    def validate_request_id(cls, v):
+        if v is not None:
+            UUID(v)
+        return v
 
 
 class AgentResponseDTO(BaseModel):
@@ -102,3 +99,18 @@ class AgentResponseDTO(BaseModel):
         self.request_id = str(self.request_id)
         self.session_id = str(self.session_id)
         return self
+
+
+class FrontendProgressDTO(BaseModel):
+    """
+    Partial progress of the master agent on a chat message, sent before its
+    `agent_response`. `event` is one of:
+    - {"type": "agent_selected", "agent": str, "arguments": dict}
+    - {"type": "agent_result", "agent": str, "is_success": bool, "summary": str}
+    - {"type": "token", "delta": str}
+    """
+
+    type: str
+    request_id: str
+    session_id: str
+    event: dict
@@ -12,6 +12,7 @@ class OutgoingMLRequestSchema(BaseModel):
     configs: dict
     files: Optional[List[FileDTO]] = []
     timestamp: datetime | float | int  # posix ts
+    deadline: Optional[float] = None  # posix ts the response is needed by
 
     @model_validator(mode="after")
     def validate_uuids(self) -> Self:
@@ -1,6 +1,12 @@
 from enum import Enum
 
 
+class RouterMessageType(Enum):
+    # router messages missing in genai_session's WSMessageType
+    AGENT_LOG_BATCH = "agent_log_batch"
+    AGENT_PROGRESS = "agent_progress"
+
+
 class AgentPlanType(Enum):
     agent = "agent"
     flow = "flow"
@@ -34,3 +40,9 @@ class AgentIdType(Enum):
     agent_id = "agent_id"
     mcp_tool_id = "mcp_tool_id"
     a2a_card_id = "a2a_card_id"
+
+
+class WriteBehindDurability(Enum):
+    drop = "drop"
+    buffer = "buffer"
+    flush = "flush"
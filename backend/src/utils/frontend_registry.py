@@ -0,0 +1,203 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Set
+from uuid import uuid4
+
+from src.core.settings import Settings, get_settings
+from src.utils.websocket import FrontendConnection
+
+logger = logging.getLogger(__name__)
+
+# called with the session_id and the serialized frame published by another worker
+FrameHandler = Callable[[str, str], Awaitable[None]]
+
+
+class FrontendPubSub(ABC):
+    """
+    Carries frames for frontend sessions between backend workers, so a frame reaches
+    the sockets of a session whichever worker they are connected to.
+    """
+
+    def __init__(self, worker_id: str):
+        self.worker_id = worker_id
+        self._on_frame: Optional[FrameHandler] = None
+
+    async def start(self, on_frame: FrameHandler):
+        self._on_frame = on_frame
+
+    async def stop(self):
+        self._on_frame = None
+
+    @abstractmethod
+    async def publish(self, session_id: str, frame: str):
+        """
+        Sends the frame of a session to all other workers.
+        """
+
+
+class InMemoryFrontendHub:
+    """
+    Process-local stand-in for the message bus of several backend workers.
+    """
+
+    def __init__(self):
+        self.workers: Dict[str, FrameHandler] = {}
+
+
+class InMemoryFrontendPubSub(FrontendPubSub):
+    """
+    Pub/sub backed by an `InMemoryFrontendHub`, meant for tests.
+    """
+
+    def __init__(self, worker_id: str, hub: Optional[InMemoryFrontendHub] = None):
+        super().__init__(worker_id=worker_id)
+        self.hub = hub or InMemoryFrontendHub()
+
+    async def start(self, on_frame: FrameHandler):
+        await super().start(on_frame)
+        self.hub.workers[self.worker_id] = on_frame
+
+    async def stop(self):
+        self.hub.workers.pop(self.worker_id, None)
+        await super().stop()
+
+    async def publish(self, session_id: str, frame: str):
+        for worker_id, on_frame in list(self.hub.workers.items()):
+            if worker_id != self.worker_id:
+                await on_frame(session_id, frame)
+
+
+class RedisFrontendPubSub(FrontendPubSub):
+    """
+    Pub/sub over one Redis channel shared by all workers. Every worker looks the
+    session up in its own registry and skips frames it published itself.
+    """
+
+    def __init__(
+        self, worker_id: str, redis_uri: str, channel: str = "genai:backend:frontend"
+    ):
+        super().__init__(worker_id=worker_id)
+        from redis import asyncio as aioredis
+
+        self.redis = aioredis.from_url(redis_uri, decode_responses=True)
+        self.channel = channel
+        self._pubsub = None
+        self._listener_task: Optional[asyncio.Task] = None
+
+    async def start(self, on_frame: FrameHandler):
+        await super().start(on_frame)
+        self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+        self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener_task:
+            self._listener_task.cancel()
+        if self._pubsub:
+            await self._pubsub.unsubscribe()
+            await self._pubsub.aclose()
+        await self.redis.aclose()
+        await super().stop()
+
+    async def publish(self, session_id: str, frame: str):
+        await self.redis.publish(
+            self.channel,
+            json.dumps(
+                {"worker_id": self.worker_id, "session_id": session_id, "frame": frame}
+            ),
+        )
+
+    async def _listen(self):
+        async for item in self._pubsub.listen():
+            try:
+                message = json.loads(item["data"])
+                if message["worker_id"] != self.worker_id and self._on_frame:
+                    await self._on_frame(message["session_id"], message["frame"])
+            except Exception:
+                logger.exception("Failed to deliver frame published by another worker")
+
+
+class FrontendRegistry:
+    """
+    Frontend sockets of this worker subscribed by user and session.
+
+    Frames of a session, like agent logs, are pushed to exactly the sockets subscribed
+    to it, on this worker and through `pubsub` on the other ones. A session belongs to
+    the user who subscribed to it first, sockets of other users are refused.
+    """
+
+    def __init__(self, pubsub: Optional[FrontendPubSub] = None):
+        self.pubsub = pubsub
+        self._sessions: Dict[str, Set[FrontendConnection]] = {}
+        self._owners: Dict[str, str] = {}
+
+    async def start(self):
+        if self.pubsub:
+            await self.pubsub.start(self._deliver)
+
+    async def stop(self):
+        if self.pubsub:
+            await self.pubsub.stop()
+
+    def subscribe(
+        self, user_id: str, session_id: str, connection: FrontendConnection
+    ) -> bool:
+        """
+        Returns:
+            False if the session is subscribed by another user.
+        """
+        owner = self._owners.setdefault(session_id, str(user_id))
+        if owner != str(user_id):
+            return False
+        self._sessions.setdefault(session_id, set()).add(connection)
+        return True
+
+    def unsubscribe(self, session_id: str, connection: FrontendConnection):
+        connections = self._sessions.get(session_id)
+        if connections is None:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self._sessions[session_id]
+            del self._owners[session_id]
+
+    def connections(self, session_id: str) -> Set[FrontendConnection]:
+        return self._sessions.get(session_id, set())
+
+    async def publish(self, session_id: str, frame: str):
+        """
+        Pushes a frame to all sockets subscribed to the session.
+        """
+        await self._deliver(session_id, frame)
+        if self.pubsub:
+            try:
+                await self.pubsub.publish(session_id, frame)
+            except Exception:
+                logger.exception(f"Failed to publish frame of session '{session_id}'")
+
+    async def _deliver(self, session_id: str, frame: str):
+        for connection in self._sessions.get(session_id, ()):
+            # a frontend that does not keep up misses frames instead of
+            # holding up the frames of other sessions
+            if not connection.send_nowait(frame):
+                logger.debug(f"Frontend send queue of session '{session_id}' is full")
+
+
+def get_frontend_pubsub(
+    settings: Optional[Settings] = None,
+) -> Optional[FrontendPubSub]:
+    """
+    Builds the pub/sub between backend workers configured by
+    FRONTEND_PUBSUB_BACKEND, None if frames stay within the worker.
+    """
+    settings = settings or get_settings()
+    worker_id = str(uuid4())
+    if settings.FRONTEND_PUBSUB_BACKEND == "redis":
+        return RedisFrontendPubSub(
+            worker_id=worker_id, redis_uri=settings.FRONTEND_PUBSUB_REDIS_URI
+        )
+    if settings.FRONTEND_PUBSUB_BACKEND == "memory":
+        return InMemoryFrontendPubSub(worker_id=worker_id)
+    return None
@@ -3,18 +3,22 @@ from logging import getLogger
 from traceback import format_exc
 from typing import Optional
 
-from fastapi import WebSocket
 from genai_session.session import GenAISession
 from genai_session.utils.naming_enums import ErrorType, WSMessageType
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.auth.jwt import TokenLifespanType, validate_token
 from src.db.session import async_session
+from src.models import Agent
 from src.repositories.agent import agent_repo
 from src.repositories.flow import agentflow_repo
 from src.repositories.log import log_repo
 from src.repositories.user import user_repo
 from src.schemas.api.agent.schemas import AgentUpdate
+from src.schemas.ws.frontend import FrontendProgressDTO
 from src.schemas.ws.log import FrontendLogEntryDTO, LogCreate, LogEntry
-from src.utils.enums import AgentType
+from src.utils.enums import AgentType, RouterMessageType
+from src.utils.frontend_registry import FrontendRegistry
 from src.utils.helpers import FlowValidator, generate_alias
 from src.utils.validate_uuid import validate_agent_or_send_err
 from src.utils.validation_error_handler import validation_exception_handler
@@ -23,32 +27,68 @@ from starlette.datastructures import State
 logger = getLogger(__name__)
 
 
+def is_agent_jwt_of(jwt_token: Optional[str], agent_id: str, user_id: str) -> bool:
+    """
+    Checks that the agent JWT is signed by the backend and issued for the given
+    agent and user, without a database round trip.
+    """
+    if not jwt_token:
+        return False
+    payload = validate_token(token=jwt_token, lifespan_type=TokenLifespanType.cli)
+    if not payload:
+        return False
+    return str(payload.sub) == str(agent_id) and str(payload.user_id) == str(user_id)
+
+
 async def message_handler_validator(
     state: State,
     session: GenAISession,
     message_type: str,
     log_message: Optional[str],
     log_level: Optional[str],
-    agent_uuid: str,  # expecting jwt as uuid, TODO: change field name
+    agent_uuid: Optional[str],  # expecting jwt as uuid, TODO: change field name
     agent_description: Optional[str] = "",
     agent_input_schema: Optional[dict] = None,
     agent_name: Optional[str] = "",
     session_id: str = "",
     request_id: str = "",
     jwt_token: Optional[str] = None,
+    logs: Optional[list[dict]] = None,
+    agent_user_id: Optional[str] = None,
+    event: Optional[dict] = None,
 ):
-    # NOTE: websocket connection must be initialized by the frontend before it will be accessible here
-    # if websocket is not initialized it won't dump logs to the frontend
-    websocket: WebSocket = state.frontend_ws
+    # logs and progress are pushed to the frontend sockets subscribed to their session
+    registry: FrontendRegistry = state.frontend_registry
 
     try:
         if message_type == WSMessageType.AGENT_REGISTER.value:
             try:
                 async with async_session() as db:
-                    valid_agent = await agent_repo.validate_agent_by_jwt(
-                        db=db, agent_jwt=jwt_token
+                    agent_in = AgentUpdate(
+                        name=agent_name,
+                        description=agent_description,
+                        input_parameters=agent_input_schema or {},
+                        is_active=True,
                     )
-                    if not valid_agent:
+                    if agent_user_id and is_agent_jwt_of(
+                        jwt_token=jwt_token, agent_id=agent_uuid, user_id=agent_user_id
+                    ):
+                        # the JWT matches the identity the router verified
+                        updated_agent = await agent_repo.register_verified_agent(
+                            db=db,
+                            agent_id=agent_uuid,
+                            user_id=agent_user_id,
+                            agent_name=agent_name,
+                            agent_in=agent_in,
+                        )
+                    else:
+                        updated_agent = await update_agent_by_jwt(
+                            db=db,
+                            jwt_token=jwt_token,
+                            agent_name=agent_name,
+                            agent_in=agent_in,
+                        )
+                    if not updated_agent:
                         logger.debug(
                             f"Agent with '{agent_uuid}' was attempted to register but either JWT is invalid or user does not exist."  # noqa: E501
                         )
@@ -62,26 +102,6 @@ async def message_handler_validator(
                         )
                         return  # TODO: raise invalid agent jwt
 
-                    old_name = "".join(valid_agent.alias.rsplit("_", 1)[:-1])
-                    if agent_name == old_name:
-                        alias = valid_agent.alias
-                    else:
-                        alias = generate_alias(agent_name)
-
-                    agent_in = AgentUpdate(
-                        id=valid_agent.id,
-                        name=agent_name,
-                        description=agent_description,
-                        input_parameters=agent_input_schema or {},
-                        is_active=True,
-                        alias=alias,
-                    )
-
-                    updated_agent = await agent_repo.update(
-                        db=db,
-                        db_obj=valid_agent,
-                        obj_in=agent_in,
-                    )
                     flow_validator = FlowValidator()
                     await flow_validator.trigger_flow_validation_on_agent_state_change(
                         db=db, agent_type=AgentType.genai
@@ -154,18 +174,104 @@ async def message_handler_validator(
                         logger.debug(f"Inserted log for {session_id=}, {request_id=}")
                         log_out = LogEntry(**log_entry.__dict__)
 
-                        if websocket:
-                            response = FrontendLogEntryDTO(
-                                type=message_type, log=log_out
-                            )
-                            await websocket.send_text(response.model_dump_json())
+                        response = FrontendLogEntryDTO(type=message_type, log=log_out)
+                        await registry.publish(
+                            session_id=session_id, frame=response.model_dump_json()
+                        )
 
                 except Exception:
                     logger.error(f"Unexpected error occured: {traceback.format_exc()}")
 
                 return
 
+        if message_type == RouterMessageType.AGENT_LOG_BATCH.value:
+            await save_log_batch(registry=registry, logs=logs or [])
+            return
+
+        if message_type == RouterMessageType.AGENT_PROGRESS.value:
+            # progress is not stored, the final response of the master agent is
+            if session_id and request_id and event:
+                response = FrontendProgressDTO(
+                    type=message_type,
+                    request_id=request_id,
+                    session_id=session_id,
+                    event=event,
+                )
+                await registry.publish(
+                    session_id=session_id, frame=response.model_dump_json()
+                )
+            return
+
     except KeyError:
         msg = "KeyError: Invalid payload structure - missing 'message_type' field"  # TODO: session_id?
         logger.error(msg)
         return
+
+
+async def update_agent_by_jwt(
+    db: AsyncSession, jwt_token: Optional[str], agent_name: str, agent_in: AgentUpdate
+) -> Optional[Agent]:
+    """
+    Validates the agent JWT against the database and marks the agent as active.
+    """
+    valid_agent = await agent_repo.validate_agent_by_jwt(db=db, agent_jwt=jwt_token)
+    if not valid_agent:
+        return None
+
+    old_name = "".join(valid_agent.alias.rsplit("_", 1)[:-1])
+    if agent_name == old_name:
+        agent_in.alias = valid_agent.alias
+    else:
+        agent_in.alias = generate_alias(agent_name)
+
+    return await agent_repo.update(
+        db=db,
+        db_obj=valid_agent,
+        obj_in=agent_in,
+    )
+
+
+async def save_log_batch(registry: FrontendRegistry, logs: list[dict]):
+    """
+    Stores logs coalesced by the router with a single insert and commit,
+    then pushes them to the frontend one by one as for single `agent_log` events.
+    """
+    logs_in = []
+    for log in logs:
+        if not (
+            log.get("session_id") and log.get("request_id") and log.get("log_level")
+        ):
+            continue
+        try:
+            logs_in.append(
+                LogCreate(
+                    session_id=log["session_id"],
+                    request_id=log["request_id"],
+                    message=log.get("log_message"),
+                    log_level=log["log_level"],
+                    agent_id=log.get("agent_uuid"),
+                )
+            )
+        except ValidationError as e:
+            logger.error(
+                f"Invalid agent_log entry in batch. Details: {validation_exception_handler(e)}"
+            )
+
+    if not logs_in:
+        return
+
+    try:
+        async with async_session() as db:
+            log_entries = await log_repo.create_many(db, objs_in=logs_in)
+            logger.debug(f"Inserted batch of {len(log_entries)} logs")
+
+        for log_out in log_entries:
+            response = FrontendLogEntryDTO(
+                type=WSMessageType.AGENT_LOG.value, log=log_out
+            )
+            await registry.publish(
+                session_id=str(log_out.session_id), frame=response.model_dump_json()
+            )
+
+    except Exception:
+        logger.error(f"Unexpected error occured: {traceback.format_exc()}")
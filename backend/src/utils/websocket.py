@@ -1,4 +1,8 @@
-from typing import Optional
+import asyncio
+import json
+import logging
+from typing import Any, Coroutine, Optional, Set, Union
+
 from fastapi import Depends, Header, WebSocket, status
 
 from src.auth.jwt import TokenLifespanType, validate_token
@@ -8,6 +12,8 @@ from src.db.session import AsyncDBSession
 
 import jwt
 
+logger = logging.getLogger(__name__)
+
 
 class WebSocketTokenValidator:
     async def __call__(
@@ -85,3 +91,106 @@ async def get_current_ws_user(
     except jwt.DecodeError:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return None
+
+
+class FrontendConnection:
+    """
+    Frontend websocket shared by the requests processed concurrently on it.
+
+    Every incoming message is handled by its own task, at most `max_in_flight` at a time.
+    Outgoing frames are queued and written in order by a single writer task, so frames of
+    concurrent requests and agent logs never interleave and a slow frontend only delays
+    its own frames.
+    """
+
+    def __init__(self, websocket: WebSocket, max_in_flight: int, queue_size: int):
+        """
+        Args:
+            websocket (WebSocket): The accepted frontend websocket.
+            max_in_flight (int): Maximum amount of messages processed at once.
+            queue_size (int): Maximum amount of frames waiting to be written.
+        """
+        self.websocket = websocket
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._slots = asyncio.Semaphore(max(max_in_flight, 1))
+        self._tasks: Set[asyncio.Task] = set()
+        self._writer: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write())
+
+    async def send_text(self, data: str):
+        if not self._closed:
+            await self._outbox.put(data)
+
+    def send_nowait(self, data: str) -> bool:
+        """
+        Queues a frame without waiting for room in the queue.
+
+        Returns:
+            False if the frame was discarded.
+        """
+        if self._closed:
+            return False
+        try:
+            self._outbox.put_nowait(data)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def send_json(self, data: Any):
+        await self.send_text(json.dumps(data))
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE, reason: str = ""):
+        """
+        Closes the websocket after the frames queued before.
+        """
+        if not self._closed:
+            await self._outbox.put((code, reason))
+
+    async def spawn(self, coro: Coroutine):
+        """
+        Runs the handler of a message as a task, waits for a free slot first.
+        """
+        await self._slots.acquire()
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+    async def stop(self):
+        """
+        Waits for the messages in flight, so their results are still stored, then stops
+        the writer. Frames sent after the frontend disconnected are discarded.
+        """
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._writer:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+        self._closed = True
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        self._slots.release()
+        if not task.cancelled() and (exc := task.exception()):
+            logger.error("Frontend message handler failed", exc_info=exc)
+
+    async def _write(self):
+        while True:
+            frame: Union[str, tuple] = await self._outbox.get()
+            try:
+                if isinstance(frame, str):
+                    await self.websocket.send_text(frame)
+                else:
+                    code, reason = frame
+                    await self.websocket.close(code=code, reason=reason)
+                    self._closed = True
+            except Exception:
+                logger.debug("Frontend websocket is closed, discarding frames")
+                self._closed = True
+
+            if self._closed:
+                # unblock senders waiting for space, nothing is written anymore
+                while not self._outbox.empty():
+                    self._outbox.get_nowait()
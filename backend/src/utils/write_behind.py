@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from src.db.session import async_session
+from src.models import ChatMessage
+from src.repositories.chat import chat_repo
+from src.schemas.api.chat.schemas import CreateChatMessage
+from src.schemas.api.chat.dto import ChatWriteBehindStatsDTO
+from src.utils.enums import WriteBehindDurability
+
+logger = logging.getLogger(__name__)
+
+# attempts to write a batch before its messages are given up
+MAX_WRITE_ATTEMPTS = 3
+
+
+@dataclass
+class PendingChatMessage:
+    user_id: UUID
+    session_id: str
+    request_id: str
+    message_in: CreateChatMessage
+    enqueued_at: float = field(default_factory=time.monotonic)
+    # resolved once the message is committed, only with 'flush' durability
+    written: Optional[asyncio.Future] = None
+
+
+class ChatWriteBehind:
+    """
+    Persists chat messages after the response has been sent to the frontend.
+
+    Messages are queued and written by a background task in batches of multi-row
+    inserts. What happens when the queue is full or until a message is written
+    depends on the durability:
+    - drop: `put` never waits, messages are dropped while the queue is full
+    - buffer: `put` waits for room in the queue
+    - flush: `put` waits until the message is committed
+
+    Queued messages are flushed on shutdown in either case.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        durability: WriteBehindDurability,
+    ):
+        """
+        Args:
+            max_size (int): Maximum amount of queued messages.
+            batch_size (int): Maximum amount of messages written by one insert.
+            flush_interval (float): How long a batch waits to be filled, in seconds.
+            durability (WriteBehindDurability): Guarantee of `put`, see the class docstring.
+        """
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._worker: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    async def put(
+        self,
+        user_id: UUID,
+        session_id: str,
+        request_id: str,
+        message_in: CreateChatMessage,
+    ) -> bool:
+        """
+        Queues a chat message to be persisted.
+
+        Returns:
+            False if the message was dropped or could not be written
+            (the latter is only known with 'flush' durability).
+        """
+        pending = PendingChatMessage(
+            user_id=user_id,
+            session_id=session_id,
+            request_id=request_id,
+            message_in=message_in,
+        )
+        if self._closed:
+            # shutting down, nothing is read from the queue anymore
+            await self._write([pending])
+            return True
+
+        if self.durability == WriteBehindDurability.drop:
+            try:
+                self._queue.put_nowait(pending)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                logger.warning(
+                    f"Chat write-behind queue is full, dropped message of request '{request_id}'"
+                )
+                return False
+            self.enqueued += 1
+            return True
+
+        if self.durability == WriteBehindDurability.flush:
+            pending.written = asyncio.get_running_loop().create_future()
+        await self._queue.put(pending)
+        self.enqueued += 1
+        if pending.written:
+            return await pending.written
+        return True
+
+    async def stop(self):
+        """
+        Writes all queued messages and stops the background task.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._worker:
+            await self._queue.put(None)
+            await self._worker
+
+    def stats(self) -> ChatWriteBehindStatsDTO:
+        return ChatWriteBehindStatsDTO(
+            durability=self.durability.value,
+            depth=self._queue.qsize(),
+            capacity=self._queue.maxsize,
+            enqueued=self.enqueued,
+            written=self.written,
+            dropped=self.dropped,
+            failed=self.failed,
+            batches=self.batches,
+            last_lag_seconds=self.last_lag_seconds,
+            max_lag_seconds=self.max_lag_seconds,
+        )
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            pending = await self._queue.get()
+            if pending is None:
+                break
+
+            batch = [pending]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    if (pending := self._queue.get_nowait()) is None:
+                        stopping = True
+                        break
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        pending = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if pending is None:
+                        stopping = True
+                        break
+                batch.append(pending)
+
+            await self._write(batch)
+
+        # messages of `put` calls that waited for room while the queue was closed
+        remaining = []
+        while not self._queue.empty():
+            if (pending := self._queue.get_nowait()) is not None:
+                remaining.append(pending)
+        if remaining:
+            await self._write(remaining)
+
+    async def _write(self, batch: List[PendingChatMessage]):
+        for attempt in range(1, MAX_WRITE_ATTEMPTS + 1):
+            try:
+                async with async_session() as db:
+                    await db.execute(
+                        insert(ChatMessage),
+                        [
+                            {
+                                "id": uuid4(),
+                                "sender_type": pending.message_in.sender_type,
+                                "content": pending.message_in.content,
+                                "conversation_id": pending.session_id,
+                                "request_id": pending.request_id,
+                            }
+                            for pending in batch
+                        ],
+                    )
+                    await db.commit()
+                self._written(batch)
+                return
+            except IntegrityError:
+                break
+            except Exception:
+                logger.warning(
+                    f"Failed to write {len(batch)} chat messages (attempt {attempt}): {traceback.format_exc(limit=5)}"  # noqa: E501
+                )
+                if attempt < MAX_WRITE_ATTEMPTS:
+                    await asyncio.sleep(0.1 * 2**attempt)
+
+        # a deleted chat fails the whole batch, the messages are written one by one
+        # against their chat instead, so only the messages of that chat are lost
+        for pending in batch:
+            try:
+                async with async_session() as db:
+                    message = await chat_repo.append_message(
+                        db=db,
+                        user_id=pending.user_id,
+                        session_id=pending.session_id,
+                        request_id=pending.request_id,
+                        message_in=pending.message_in,
+                    )
+                if message:
+                    self._written([pending])
+                    continue
+            except Exception:
+                logger.error(
+                    f"Failed to write chat message of request '{pending.request_id}': {traceback.format_exc()}"  # noqa: E501
+                )
+            self.failed += 1
+            if pending.written and not pending.written.done():
+                pending.written.set_result(False)
+
+    def _written(self, batch: List[PendingChatMessage]):
+        now = time.monotonic()
+        self.batches += 1
+        self.written += len(batch)
+        self.last_lag_seconds = now - batch[0].enqueued_at
+        self.max_lag_seconds = max(self.max_lag_seconds, self.last_lag_seconds)
+        for pending in batch:
+            if pending.written and not pending.written.done():
+                pending.written.set_result(True)
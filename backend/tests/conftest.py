@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+
+class FakeWebSocket:
+    """
+    Stand-in for an accepted Starlette WebSocket recording the frames written to it.
+    Writes wait while `writable` is cleared, like a frontend that stopped reading.
+    """
+
+    def __init__(self, fail: bool = False):
+        self.sent: List[str] = []
+        self.fail = fail
+        self.close_code: Optional[int] = None
+        self.writable = asyncio.Event()
+        self.writable.set()
+
+    async def send_text(self, data: str) -> None:
+        await self.writable.wait()
+        if self.fail:
+            raise ConnectionError("socket is gone")
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        self.close_code = code
+
+
+class NamedMapping(dict):
+    """
+    Row mapping looked up by column objects, as SQLAlchemy rows are.
+    """
+
+    def __getitem__(self, column):
+        return super().__getitem__(getattr(column, "name", column))
+
+
+class FakeResult:
+    def __init__(self, rows):
+        # mappings stand for rows of columns, tuples for rows of entities
+        self.rows = [
+            (
+                SimpleNamespace(_mapping=NamedMapping(row))
+                if isinstance(row, dict)
+                else row
+            )
+            for row in rows
+        ]
+
+    def all(self):
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+class RecordingSession:
+    """
+    Stand-in for an AsyncSession answering every statement with the same rows.
+    """
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return FakeResult(self.rows)
+
+    async def commit(self):
+        self.commits += 1
+
+    def sql(self, index: int = 0) -> str:
+        return str(self.statements[index].compile(dialect=postgresql.dialect()))
+
+
+async def wait_until(predicate, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.005)
+
+
+@pytest.fixture
+def fake_websocket():
+    return FakeWebSocket
+
+
+@pytest.fixture
+def eventually():
+    return wait_until
+
+
+@pytest.fixture
+def recording_session():
+    return RecordingSession
@@ -0,0 +1,36 @@
+from uuid import uuid4
+
+import jwt
+
+from src.auth.jwt import TokenLifespanType, create_access_token
+from src.utils.message_handler_validator import is_agent_jwt_of
+
+
+def agent_jwt(agent_id: str, user_id: str) -> str:
+    return create_access_token(
+        subject=agent_id, lifespan_type=TokenLifespanType.cli, user_id=user_id
+    )
+
+
+def test_agent_jwt_of_the_agent_and_its_user():
+    agent_id, user_id = str(uuid4()), str(uuid4())
+    assert is_agent_jwt_of(agent_jwt(agent_id, user_id), agent_id, user_id)
+
+
+def test_agent_jwt_of_another_agent_or_user():
+    agent_id, user_id = str(uuid4()), str(uuid4())
+    token = agent_jwt(agent_id, user_id)
+    assert not is_agent_jwt_of(token, str(uuid4()), user_id)
+    # an agent can not claim to belong to another user
+    assert not is_agent_jwt_of(token, agent_id, str(uuid4()))
+
+
+def test_missing_or_forged_agent_jwt():
+    agent_id, user_id = str(uuid4()), str(uuid4())
+    forged = jwt.encode(
+        {"sub": agent_id, "user_id": user_id, "exp": 32503680000},
+        "0" * 32,
+        algorithm="HS256",
+    )
+    assert not is_agent_jwt_of(None, agent_id, user_id)
+    assert not is_agent_jwt_of(forged, agent_id, user_id)
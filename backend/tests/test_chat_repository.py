@@ -0,0 +1,144 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from src.repositories.chat import chat_repo
+from src.repositories.model_config import model_config_repo
+from src.schemas.api.chat.schemas import BaseChatMessage
+
+
+def user_message(content: str = "hello") -> BaseChatMessage:
+    return BaseChatMessage(sender_type="user", content=content)
+
+
+def file_row(session_id: str, **fields) -> dict:
+    return {
+        "chat_session_id": session_id,
+        "id": str(uuid4()),
+        "session_id": session_id,
+        "request_id": str(uuid4()),
+        "creator_id": str(uuid4()),
+        "mimetype": "text/plain",
+        "original_name": "notes.txt",
+        "internal_name": "notes.txt",
+        "internal_id": str(uuid4()),
+        "from_agent": False,
+        **fields,
+    }
+
+
+def no_file_row(session_id: str) -> dict:
+    """
+    Row of the outer join when none of the files could be attached.
+    """
+    return dict.fromkeys(file_row(session_id), None) | {"chat_session_id": session_id}
+
+
+async def prepare(db, file_ids=()):
+    return await chat_repo.prepare_user_message(
+        db=db,
+        user_model=SimpleNamespace(id=uuid4()),
+        session_id=str(uuid4()),
+        request_id=str(uuid4()),
+        message_in=user_message(),
+        file_ids=list(file_ids),
+    )
+
+
+@pytest.mark.asyncio
+async def test_user_message_is_prepared_in_one_statement(recording_session):
+    db = recording_session(rows=[no_file_row("session")])
+    assert await prepare(db, file_ids=[str(uuid4())]) == []
+
+    assert len(db.statements) == 1 and db.commits == 1
+    sql = db.sql()
+    assert "ON CONFLICT (session_id) DO UPDATE" in sql
+    # a chat of another user is neither updated nor returned
+    assert "WHERE chatconversations.creator_id" in sql
+    assert "INSERT INTO chatmessages" in sql and "FROM chat RETURNING" in sql
+    assert "UPDATE files" in sql
+
+
+@pytest.mark.asyncio
+async def test_files_are_skipped_without_file_ids(recording_session):
+    db = recording_session(rows=[{"chat_session_id": "session"}])
+    assert await prepare(db) == []
+    assert "UPDATE files" not in db.sql()
+
+
+@pytest.mark.asyncio
+async def test_chat_of_another_user_is_reported(recording_session):
+    assert await prepare(recording_session(rows=[])) is None
+
+
+@pytest.mark.asyncio
+async def test_attached_files_are_returned(recording_session):
+    session_id = str(uuid4())
+    attached = file_row(session_id)
+    db = recording_session(rows=[attached, no_file_row(session_id)])
+
+    files = await prepare(db, file_ids=[attached["id"], str(uuid4())])
+    assert [file.id for file in files] == [attached["id"]]
+    assert files[0].original_name == "notes.txt"
+
+
+@pytest.mark.asyncio
+async def test_provider_and_config_are_fetched_together(recording_session):
+    provider, config = object(), object()
+    db = recording_session(rows=[(provider, config)])
+
+    assert await model_config_repo.get_provider_and_config_by_name(
+        db, provider_name="openai", config_name="default", user_id=uuid4()
+    ) == (provider, config)
+    assert len(db.statements) == 1
+    assert "LEFT OUTER JOIN modelconfigs" in db.sql()
+
+    db.rows = []
+    assert await model_config_repo.get_provider_and_config_by_name(
+        db, provider_name="openai", config_name="default", user_id=uuid4()
+    ) == (None, None)
+
+
+async def append(db, with_history=False):
+    return await chat_repo.add_message_to_conversation(
+        db=db,
+        user_model=SimpleNamespace(id=uuid4()),
+        session_id=str(uuid4()),
+        request_id=str(uuid4()),
+        message_in=user_message(),
+        with_history=with_history,
+    )
+
+
+@pytest.mark.asyncio
+async def test_message_is_appended_without_loading_the_chat(recording_session):
+    request_id = uuid4()
+    created_at = datetime.now(timezone.utc)
+    db = recording_session(
+        rows=[
+            {
+                "sender_type": "user",
+                "content": "hello",
+                "request_id": request_id,
+                "created_at": created_at,
+            }
+        ]
+    )
+
+    message = await append(db)
+    assert message.content == "hello" and message.request_id == request_id
+    assert len(db.statements) == 1 and db.commits == 1
+    sql = db.sql()
+    assert "INSERT INTO chatmessages" in sql
+    # only a chat of the user is selected to insert into
+    assert "chatconversations.creator_id" in sql
+    assert "JOIN" not in sql and "chatmessages.conversation_id =" not in sql
+
+
+@pytest.mark.asyncio
+async def test_message_to_a_missing_chat_is_rejected(recording_session):
+    with pytest.raises(HTTPException) as error:
+        await append(recording_session(rows=[]))
+    assert error.value.status_code == 400
@@ -0,0 +1,101 @@
+from uuid import uuid4
+
+import cryptocode
+import pytest
+
+from src.auth import encrypt
+from src.auth.encrypt import DecryptedSecretCache, encrypt_secret
+
+
+@pytest.fixture
+def decryptions(monkeypatch):
+    """
+    Encrypted secrets decrypted by the vault, in order.
+    """
+    decrypted = []
+
+    def decrypt_secret(encrypted_secret: str) -> str:
+        decrypted.append(encrypted_secret)
+        return encrypt.vault.decrypt(encrypted_secret)
+
+    monkeypatch.setattr(encrypt, "decrypt_secret", decrypt_secret)
+    return decrypted
+
+
+@pytest.mark.asyncio
+async def test_secret_is_decrypted_once(decryptions):
+    cache = DecryptedSecretCache(ttl_seconds=60, max_size=10)
+    user_id, encrypted = uuid4(), encrypt_secret("sk-1")
+
+    assert await cache.decrypt(user_id, "openai", encrypted) == "sk-1"
+    assert await cache.decrypt(user_id, "openai", encrypted) == "sk-1"
+    assert decryptions == [encrypted]
+
+
+@pytest.mark.asyncio
+async def test_changed_secret_is_decrypted_again(decryptions):
+    cache = DecryptedSecretCache(ttl_seconds=60, max_size=10)
+    user_id = uuid4()
+    await cache.decrypt(user_id, "openai", encrypt_secret("sk-1"))
+
+    # changed by another worker, the cache of this one was not invalidated
+    assert await cache.decrypt(user_id, "openai", encrypt_secret("sk-2")) == "sk-2"
+    assert len(decryptions) == 2 and len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_secret_is_decrypted_again(decryptions):
+    cache = DecryptedSecretCache(ttl_seconds=60, max_size=10)
+    user_id, encrypted = uuid4(), encrypt_secret("sk-1")
+    await cache.decrypt(user_id, "openai", encrypted)
+
+    cache._secrets[(str(user_id), "openai")].expires_at = 0
+    await cache.decrypt(user_id, "openai", encrypted)
+    assert len(decryptions) == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidate_by_provider_and_user(decryptions):
+    cache = DecryptedSecretCache(ttl_seconds=60, max_size=10)
+    user_id, other_user_id = uuid4(), uuid4()
+    for owner, provider in [
+        (user_id, "openai"),
+        (user_id, "azure"),
+        (other_user_id, "openai"),
+    ]:
+        await cache.decrypt(owner, provider, encrypt_secret("sk"))
+
+    cache.invalidate(user_id, "openai")
+    assert len(cache) == 2
+    cache.invalidate(user_id)
+    assert len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_evicted_secret_is_wiped(decryptions):
+    cache = DecryptedSecretCache(ttl_seconds=60, max_size=1)
+    user_id = uuid4()
+    await cache.decrypt(user_id, "openai", encrypt_secret("sk-1"))
+    evicted = cache._secrets[(str(user_id), "openai")].secret
+
+    await cache.decrypt(user_id, "azure", encrypt_secret("sk-2"))
+    assert len(cache) == 1
+    assert evicted == bytearray(len("sk-1"))
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_keeps_nothing(decryptions):
+    cache = DecryptedSecretCache(ttl_seconds=0, max_size=10)
+    user_id, encrypted = uuid4(), encrypt_secret("sk-1")
+    await cache.decrypt(user_id, "openai", encrypted)
+    await cache.decrypt(user_id, "openai", encrypted)
+    assert len(decryptions) == 2 and len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_legacy_secret_is_decrypted(decryptions):
+    cache = DecryptedSecretCache(ttl_seconds=60, max_size=10)
+    legacy = cryptocode.encrypt("sk-legacy", encrypt.settings.SECRET_KEY)
+    assert await cache.decrypt(uuid4(), "openai", legacy) == "sk-legacy"
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import pytest
+
+from src.utils.websocket import FrontendConnection
+
+
+async def handler(connection: FrontendConnection, release: asyncio.Event, name: str):
+    await release.wait()
+    await connection.send_text(name)
+
+
+@pytest.mark.asyncio
+async def test_frames_are_written_in_order_then_closed(fake_websocket, eventually):
+    websocket = fake_websocket()
+    connection = FrontendConnection(websocket, max_in_flight=2, queue_size=10)
+    connection.start()
+
+    await connection.send_text("first")
+    await connection.send_json({"second": 2})
+    await connection.close(code=1008)
+    await connection.send_text("after close")
+    await eventually(lambda: websocket.close_code)
+    await connection.stop()
+
+    assert websocket.sent == ["first", json.dumps({"second": 2})]
+    assert websocket.close_code == 1008
+
+
+@pytest.mark.asyncio
+async def test_messages_are_processed_concurrently_up_to_the_cap(
+    fake_websocket, eventually
+):
+    websocket = fake_websocket()
+    connection = FrontendConnection(websocket, max_in_flight=2, queue_size=10)
+    connection.start()
+    first, second, third = asyncio.Event(), asyncio.Event(), asyncio.Event()
+
+    await connection.spawn(handler(connection, first, "first"))
+    await connection.spawn(handler(connection, second, "second"))
+    spawning = asyncio.create_task(
+        connection.spawn(handler(connection, third, "third"))
+    )
+    await asyncio.sleep(0.02)
+    assert not spawning.done()  # reading pauses while both slots are taken
+
+    second.set()
+    await eventually(lambda: websocket.sent == ["second"])
+    await spawning
+    first.set()
+    third.set()
+    await eventually(lambda: websocket.sent == ["second", "first", "third"])
+    await connection.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_messages_in_flight(fake_websocket, eventually):
+    websocket = fake_websocket()
+    connection = FrontendConnection(websocket, max_in_flight=2, queue_size=10)
+    connection.start()
+    release = asyncio.Event()
+    stored = []
+
+    async def store():
+        await release.wait()
+        stored.append("result")
+
+    await connection.spawn(store())
+    stopping = asyncio.create_task(connection.stop())
+    await asyncio.sleep(0.02)
+    assert not stopping.done()
+
+    release.set()
+    await stopping
+    assert stored == ["result"]
+
+
+@pytest.mark.asyncio
+async def test_failed_handler_frees_its_slot(fake_websocket):
+    connection = FrontendConnection(fake_websocket(), max_in_flight=1, queue_size=10)
+    connection.start()
+
+    async def fail():
+        raise RuntimeError("handler failed")
+
+    await connection.spawn(fail())
+    await asyncio.wait_for(connection.spawn(asyncio.sleep(0)), timeout=1)
+    await connection.stop()
+
+
+@pytest.mark.asyncio
+async def test_frames_to_a_gone_frontend_are_discarded(fake_websocket, eventually):
+    websocket = fake_websocket(fail=True)
+    connection = FrontendConnection(websocket, max_in_flight=1, queue_size=1)
+    connection.start()
+
+    await connection.send_text("lost")
+    await eventually(lambda: connection._closed)
+    # senders are not blocked by the full queue of a gone frontend
+    await asyncio.wait_for(connection.send_text("discarded"), timeout=1)
+    await connection.stop()
+    assert websocket.sent == []
@@ -0,0 +1,103 @@
+import pytest
+
+from src.core.settings import get_settings
+from src.utils.frontend_registry import (
+    FrontendRegistry,
+    InMemoryFrontendHub,
+    InMemoryFrontendPubSub,
+    get_frontend_pubsub,
+)
+from src.utils.websocket import FrontendConnection
+
+
+def make_connection(fake_websocket, queue_size=10):
+    connection = FrontendConnection(
+        fake_websocket(), max_in_flight=1, queue_size=queue_size
+    )
+    connection.start()
+    return connection
+
+
+def test_session_belongs_to_its_first_subscriber():
+    registry = FrontendRegistry()
+    first, second = object(), object()
+    assert registry.subscribe("user-1", "session", first)
+    assert registry.subscribe("user-1", "session", second)
+    assert not registry.subscribe("user-2", "session", object())
+    assert registry.connections("session") == {first, second}
+
+    registry.unsubscribe("session", first)
+    registry.unsubscribe("session", second)
+    assert registry.connections("session") == set()
+    # a session nobody is subscribed to anymore can be taken by another user
+    assert registry.subscribe("user-2", "session", first)
+
+
+@pytest.mark.asyncio
+async def test_frames_reach_only_the_sockets_of_the_session(fake_websocket, eventually):
+    registry = FrontendRegistry()
+    subscribed = make_connection(fake_websocket)
+    other = make_connection(fake_websocket)
+    registry.subscribe("user-1", "session", subscribed)
+    registry.subscribe("user-1", "other-session", other)
+
+    await registry.publish("session", "log")
+    await eventually(lambda: subscribed.websocket.sent)
+    assert subscribed.websocket.sent == ["log"]
+    assert other.websocket.sent == []
+    await subscribed.stop()
+    await other.stop()
+
+
+@pytest.mark.asyncio
+async def test_frames_reach_sockets_of_other_workers(fake_websocket, eventually):
+    hub = InMemoryFrontendHub()
+    worker_a = FrontendRegistry(InMemoryFrontendPubSub("a", hub))
+    worker_b = FrontendRegistry(InMemoryFrontendPubSub("b", hub))
+    await worker_a.start()
+    await worker_b.start()
+    on_a, on_b = make_connection(fake_websocket), make_connection(fake_websocket)
+    worker_a.subscribe("user-1", "session", on_a)
+    worker_b.subscribe("user-1", "session", on_b)
+
+    await worker_a.publish("session", "log")
+    await eventually(lambda: on_a.websocket.sent and on_b.websocket.sent)
+    # the publishing worker delivers its own frames only once
+    assert on_a.websocket.sent == on_b.websocket.sent == ["log"]
+
+    for connection in (on_a, on_b):
+        await connection.stop()
+    await worker_a.stop()
+    await worker_b.stop()
+    assert hub.workers == {}
+
+
+@pytest.mark.asyncio
+async def test_slow_frontend_misses_frames(fake_websocket, eventually):
+    registry = FrontendRegistry()
+    slow = make_connection(fake_websocket, queue_size=1)
+    slow.websocket.writable.clear()
+    registry.subscribe("user-1", "session", slow)
+
+    for i in range(5):
+        await registry.publish("session", str(i))
+    slow.websocket.writable.set()
+    await eventually(lambda: slow.websocket.sent)
+    assert len(slow.websocket.sent) < 5
+    await slow.stop()
+
+
+def test_pubsub_backend_is_configurable():
+    settings = get_settings()
+    assert (
+        get_frontend_pubsub(
+            settings.model_copy(update={"FRONTEND_PUBSUB_BACKEND": "none"})
+        )
+        is None
+    )
+    assert isinstance(
+        get_frontend_pubsub(
+            settings.model_copy(update={"FRONTEND_PUBSUB_BACKEND": "memory"})
+        ),
+        InMemoryFrontendPubSub,
+    )
@@ -0,0 +1,40 @@
+import json
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from src.utils.enums import RouterMessageType
+from src.utils.frontend_registry import FrontendRegistry
+from src.utils.message_handler_validator import message_handler_validator
+from src.utils.websocket import FrontendConnection
+
+
+@pytest.mark.asyncio
+async def test_progress_is_pushed_to_the_chat(fake_websocket, eventually):
+    registry = FrontendRegistry()
+    connection = FrontendConnection(fake_websocket(), max_in_flight=1, queue_size=10)
+    connection.start()
+    session_id, request_id = str(uuid4()), str(uuid4())
+    registry.subscribe("user-1", session_id, connection)
+    event = {"type": "token", "delta": "Hi"}
+
+    await message_handler_validator(
+        state=SimpleNamespace(frontend_registry=registry),
+        session=None,
+        message_type=RouterMessageType.AGENT_PROGRESS.value,
+        log_message=None,
+        log_level=None,
+        agent_uuid="master-agent",
+        session_id=session_id,
+        request_id=request_id,
+        event=event,
+    )
+    await eventually(lambda: connection.websocket.sent)
+    assert json.loads(connection.websocket.sent[0]) == {
+        "type": RouterMessageType.AGENT_PROGRESS.value,
+        "request_id": request_id,
+        "session_id": session_id,
+        "event": event,
+    }
+    await connection.stop()
@@ -0,0 +1,77 @@
+import base64
+
+import cryptocode
+import pytest
+
+from src.auth.vault import NONCE_SIZE, VAULT_PREFIX, Vault
+
+KEYS = {"default": "c41302ce0f1758f4ae5dcc65729fd50a", "2026": "0" * 32}
+
+
+def flip_ciphertext(encrypted: str) -> str:
+    header, _, payload = encrypted.rpartition(":")
+    data = bytearray(base64.urlsafe_b64decode(payload))
+    data[NONCE_SIZE] ^= 1
+    return f"{header}:{base64.urlsafe_b64encode(bytes(data)).decode()}"
+
+
+def make_vault(active_key_id: str = "default") -> Vault:
+    return Vault(keys=KEYS, active_key_id=active_key_id, legacy_key=KEYS["default"])
+
+
+def test_round_trip():
+    vault = make_vault()
+    encrypted = vault.encrypt("sk-secret")
+    assert encrypted.startswith(f"{VAULT_PREFIX}:default:")
+    assert "sk-secret" not in encrypted
+    assert vault.decrypt(encrypted) == "sk-secret"
+    # every secret gets its own nonce
+    assert vault.encrypt("sk-secret") != encrypted
+
+
+@pytest.mark.parametrize(
+    "tamper",
+    [
+        flip_ciphertext,
+        # the key id is authenticated along with the ciphertext
+        lambda encrypted: encrypted.replace(":default:", ":2026:"),
+        lambda encrypted: encrypted.replace(":default:", ":unknown:"),
+        lambda encrypted: encrypted.rpartition(":")[0] + ":not base64",
+    ],
+)
+def test_tampered_secret_is_rejected(tamper):
+    vault = make_vault()
+    with pytest.raises(ValueError):
+        vault.decrypt(tamper(vault.encrypt("sk-secret")))
+
+
+def test_legacy_secret_is_decrypted():
+    vault = make_vault()
+    legacy = cryptocode.encrypt("sk-legacy", KEYS["default"])
+    assert vault.is_legacy(legacy)
+    assert vault.needs_reencryption(legacy)
+    assert vault.decrypt(legacy) == "sk-legacy"
+
+    with pytest.raises(ValueError):
+        vault.decrypt(cryptocode.encrypt("sk-legacy", "another key"))
+
+
+def test_key_rotation():
+    old = make_vault("default").encrypt("sk-secret")
+    vault = make_vault("2026")
+    assert vault.decrypt(old) == "sk-secret"
+    assert vault.needs_reencryption(old)
+
+    rotated = vault.reencrypt(old)
+    assert rotated.startswith(f"{VAULT_PREFIX}:2026:")
+    assert not vault.needs_reencryption(rotated)
+    assert vault.decrypt(rotated) == "sk-secret"
+
+
+@pytest.mark.parametrize(
+    "keys, active_key_id",
+    [({"default": "key"}, "2026"), ({"a:b": "key"}, "a:b"), ({"": "key"}, "")],
+)
+def test_invalid_key_configuration(keys, active_key_id):
+    with pytest.raises(ValueError):
+        Vault(keys=keys, active_key_id=active_key_id, legacy_key="key")
@@ -0,0 +1,81 @@
+import importlib.util
+import logging
+from pathlib import Path
+from uuid import uuid4
+
+import cryptocode
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from src.auth.encrypt import vault
+
+MIGRATION = (
+    Path(__file__).parent.parent
+    / "migrations/versions/0d1ac422004e_reencrypt_provider_api_keys_with_vault.py"
+)
+
+
+@pytest.fixture
+def migration():
+    spec = importlib.util.spec_from_file_location("reencrypt_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def connection():
+    engine = sa.create_engine("sqlite://")
+    metadata = sa.MetaData()
+    sa.Table(
+        "modelproviders",
+        metadata,
+        sa.Column("id", sa.UUID(), primary_key=True),
+        sa.Column("api_key", sa.String()),
+    )
+    with engine.begin() as connection:
+        metadata.create_all(connection)
+        yield connection
+
+
+def run(migration, connection, step: str):
+    with Operations.context(MigrationContext.configure(connection)):
+        getattr(migration, step)()
+
+
+def api_keys(connection) -> dict:
+    rows = connection.execute(sa.text("SELECT id, api_key FROM modelproviders"))
+    return {provider_id: api_key for provider_id, api_key in rows}
+
+
+def test_undecryptable_key_does_not_abort_the_migration(migration, connection, caplog):
+    readable, unreadable, empty = uuid4(), uuid4(), uuid4()
+    bad_key = cryptocode.encrypt("sk-rotated", "a key that is not configured")
+    connection.execute(
+        sa.text("INSERT INTO modelproviders (id, api_key) VALUES (:id, :api_key)"),
+        [
+            {
+                "id": readable.hex,
+                "api_key": cryptocode.encrypt("sk-1", vault.legacy_key),
+            },
+            {"id": unreadable.hex, "api_key": bad_key},
+            {"id": empty.hex, "api_key": None},
+        ],
+    )
+
+    with caplog.at_level(logging.WARNING):
+        run(migration, connection, "upgrade")
+
+    keys = api_keys(connection)
+    assert not vault.needs_reencryption(keys[readable.hex])
+    assert vault.decrypt(keys[readable.hex]) == "sk-1"
+    assert keys[unreadable.hex] == bad_key
+    assert keys[empty.hex] is None
+    assert str(unreadable) in caplog.text
+
+    run(migration, connection, "downgrade")
+    keys = api_keys(connection)
+    assert vault.is_legacy(keys[readable.hex])
+    assert vault.decrypt(keys[readable.hex]) == "sk-1"
@@ -0,0 +1,139 @@
+import asyncio
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.schemas.api.chat.schemas import CreateChatMessage
+from src.utils import write_behind
+from src.utils.enums import WriteBehindDurability
+from src.utils.write_behind import ChatWriteBehind
+
+
+class FakeDatabase:
+    """
+    Records the rows of every multi-row insert, fails them with `error` if set.
+    """
+
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.batches = []
+
+    @asynccontextmanager
+    async def session(self):
+        yield self
+
+    async def execute(self, statement, rows):
+        if self.error:
+            raise self.error
+        self.batches.append([row["content"] for row in rows])
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(write_behind, "async_session", database.session)
+    return database
+
+
+def make_write_behind(durability, max_size=10, batch_size=3):
+    return ChatWriteBehind(
+        max_size=max_size,
+        batch_size=batch_size,
+        flush_interval=0.01,
+        durability=durability,
+    )
+
+
+async def put(write_behind: ChatWriteBehind, content: str):
+    return await write_behind.put(
+        user_id=uuid4(),
+        session_id=str(uuid4()),
+        request_id=str(uuid4()),
+        message_in=CreateChatMessage(sender_type="master_agent", content=content),
+    )
+
+
+@pytest.mark.asyncio
+async def test_messages_are_written_in_batches(database):
+    queue = make_write_behind(WriteBehindDurability.buffer)
+    for i in range(5):
+        assert await put(queue, str(i))
+    queue.start()
+    await queue.stop()
+
+    assert database.batches == [["0", "1", "2"], ["3", "4"]]
+    stats = queue.stats()
+    assert (stats.enqueued, stats.written, stats.batches, stats.depth) == (5, 5, 2, 0)
+
+
+@pytest.mark.asyncio
+async def test_drop_never_waits_for_room(database):
+    queue = make_write_behind(WriteBehindDurability.drop, max_size=1)
+    assert await put(queue, "kept")
+    assert not await put(queue, "dropped")
+    assert queue.stats().dropped == 1
+
+    queue.start()
+    await queue.stop()
+    assert database.batches == [["kept"]]
+
+
+@pytest.mark.asyncio
+async def test_buffer_waits_for_room(database):
+    queue = make_write_behind(WriteBehindDurability.buffer, max_size=1)
+    await put(queue, "first")
+    waiting = asyncio.create_task(put(queue, "second"))
+    await asyncio.sleep(0.02)
+    assert not waiting.done()
+
+    queue.start()
+    assert await waiting
+    await queue.stop()
+    assert sum(database.batches, []) == ["first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_flush_waits_until_the_message_is_committed(database):
+    queue = make_write_behind(WriteBehindDurability.flush)
+    queue.start()
+    assert await put(queue, "committed")
+    assert database.batches == [["committed"]]
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_messages_put_after_stop_are_written_right_away(database):
+    queue = make_write_behind(WriteBehindDurability.drop)
+    queue.start()
+    await queue.stop()
+    assert await put(queue, "late")
+    assert database.batches == [["late"]]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_falls_back_to_single_messages(database, monkeypatch):
+    database.error = IntegrityError("INSERT", {}, Exception("chat is gone"))
+    appended = []
+
+    async def append_message(db, user_id, session_id, request_id, message_in):
+        # the chat of the second message has been deleted
+        if message_in.content == "lost":
+            return None
+        appended.append(message_in.content)
+        return message_in
+
+    monkeypatch.setattr(write_behind.chat_repo, "append_message", append_message)
+    queue = make_write_behind(WriteBehindDurability.flush, batch_size=2)
+    queue.start()
+    results = await asyncio.gather(put(queue, "kept"), put(queue, "lost"))
+    await queue.stop()
+
+    assert results == [True, False]
+    assert appended == ["kept"]
+    stats = queue.stats()
+    assert (stats.written, stats.failed) == (1, 1)
@@ -10,9 +10,10 @@ from langgraph.graph.state import CompiledStateGraph, StateGraph
 from loguru import logger
 
 from models.enums import Nodes
-from models.exceptions import UnknownAgentTypeException
+from models.exceptions import DeadlineExceededException, UnknownAgentTypeException
 from models.states import MasterAgentState
 from utils.common import filter_and_order_by_ids, remove_last_underscore_segment
+from utils.deadline import get_deadline, time_left
 
 
 class BaseMasterAgent(ABC):
@@ -22,7 +23,7 @@ class BaseMasterAgent(ABC):
         self._agents_to_bind_to_llm = [item["agent_schema"] for item in agents]
 
     @abstractmethod
-    def select_agent(self, state: MasterAgentState):
+    def select_agent(self, state: MasterAgentState, config: RunnableConfig):
         pass
 
     def should_continue(self, state: MasterAgentState):
@@ -38,42 +39,56 @@ class BaseMasterAgent(ABC):
         """
         Calls remote agent selected by Supervisor using AIConnector library.
         """
-        from connectors.entities import AgentTypeEnum, GenAIConfig, GenAIFlowConfig, MCPConfig, A2AConfig
+        from connectors.entities import (
+            AgentTypeEnum,
+            GenAIConfig,
+            GenAIFlowConfig,
+            MCPConfig,
+            A2AConfig,
+        )
         from connectors.factory import ConnectorFactory
 
         messages = state.messages
         agent_call = messages[-1].tool_calls[0]
         agent_name = agent_call["name"]
 
-        agent_to_execute = [agent for agent in self.agents if agent["name"] == agent_name][0]
+        agent_to_execute = [
+            agent for agent in self.agents if agent["name"] == agent_name
+        ][0]
         agent_type = agent_to_execute["type"]
 
+        # raises once the caller has given up instead of invoking the agent for nothing
+        deadline = get_deadline(config)
+        time_left(deadline)
+
         try:
             if agent_type == AgentTypeEnum.gen_ai.value:
                 agent_config = GenAIConfig(
                     id=agent_to_execute.get("id"),
                     name=remove_last_underscore_segment(agent_name),
                     arguments=agent_call["args"],
-                    session=config.get("configurable", {}).get("session")
+                    session=config.get("configurable", {}).get("session"),
+                    deadline=deadline,
                 )
             elif agent_type == AgentTypeEnum.flow.value:
                 agent_config = GenAIFlowConfig(
                     id=agent_to_execute.get("id"),
                     name=remove_last_underscore_segment(agent_name),
                     agents=filter_and_order_by_ids(
-                        ids=agent_to_execute.get("flow", []),
-                        items=self.agents
+                        ids=agent_to_execute.get("flow", []), items=self.agents
                     ),
                     model=self.model,
                     messages=messages[:-1].copy(),  # exclude last AI message
-                    session=config.get("configurable", {}).get("session")
+                    session=config.get("configurable", {}).get("session"),
+                    deadline=deadline,
                 )
             elif agent_type == AgentTypeEnum.mcp.value:
                 agent_config = MCPConfig(
                     id=agent_to_execute.get("id"),
                     name=remove_last_underscore_segment(agent_name),
                     endpoint=agent_to_execute.get("url", ""),
-                    arguments=agent_call["args"]
+                    arguments=agent_call["args"],
+                    deadline=deadline,
                 )
             elif agent_type == AgentTypeEnum.a2a.value:
                 agent_config = A2AConfig(
@@ -81,14 +96,17 @@ class BaseMasterAgent(ABC):
                     name=remove_last_underscore_segment(agent_name),
                     endpoint=agent_to_execute.get("url"),
                     task=agent_call["args"]["task"],
-                    text=agent_call["args"]["text"]
+                    text=agent_call["args"]["text"],
+                    deadline=deadline,
                 )
             else:
                 raise UnknownAgentTypeException(f"Unknown agent type: {agent_type}")
 
             connector = ConnectorFactory.get_connector(agent_config)
 
-            logger.info(f"Invoking {agent_name} ({agent_type}) with parameters: {agent_call["args"]}")
+            logger.info(
+                f"Invoking {agent_name} ({agent_type}) with parameters: {agent_call['args']}"
+            )
             response, trace = await connector.invoke()
             logger.success(f"Agent {agent_name} response: {response}")
 
@@ -99,6 +117,9 @@ class BaseMasterAgent(ABC):
             )
             return {"messages": [agent_call_message], "trace": [trace]}
 
+        except DeadlineExceededException:
+            raise
+
         except Exception as e:
             error_message = f"Unexpected error while invoking {agent_name}: {e}"
             logger.exception(error_message)
@@ -107,14 +128,13 @@ class BaseMasterAgent(ABC):
                 "name": "MasterAgent",
                 "input": messages[-1].model_dump(),
                 "output": error_message,
-                "is_success": False
+                "is_success": False,
             }
             return {
                 "messages": ToolMessage(
-                    content=error_message,
-                    name=agent_to_execute.get("name")
+                    content=error_message, name=agent_to_execute.get("name")
                 ),
-                "trace": [trace]
+                "trace": [trace],
             }
 
     @property
@@ -131,7 +151,7 @@ class BaseMasterAgent(ABC):
         workflow.add_conditional_edges(
             Nodes.supervisor.value,
             self.should_continue,
-            [Nodes.execute_agent.value, END]
+            [Nodes.execute_agent.value, END],
         )
         workflow.add_edge(Nodes.execute_agent.value, Nodes.supervisor.value)
 
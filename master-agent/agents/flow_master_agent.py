@@ -2,23 +2,29 @@ from typing import Any
 
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 from loguru import logger
 
 from agents.base import BaseMasterAgent
+from models.exceptions import DeadlineExceededException
 from models.states import MasterAgentState
 from utils.agents import select_agent_and_resolve_parameters
+from utils.deadline import get_deadline, time_left
 from utils.tracing import trace_execution_time
 
 
 class FlowMasterAgent(BaseMasterAgent):
     def __init__(
-            self,
-            model: BaseChatModel,
-            agents: list[dict[str, Any]], # ordered list of agents to execute
+        self,
+        model: BaseChatModel,
+        agents: list[dict[str, Any]],  # ordered list of agents to execute
     ) -> None:
         super().__init__(model=model, agents=agents)
 
-    async def select_agent(self, state: MasterAgentState):
+    async def select_agent(self, state: MasterAgentState, config: RunnableConfig):
+        # raises once the caller has given up, before any LLM capacity is spent
+        timeout = time_left(get_deadline(config))
+
         messages = state.messages
         trace = {
             "name": "MasterAgent",
@@ -27,29 +33,32 @@ class FlowMasterAgent(BaseMasterAgent):
 
         try:
             if self._agents_to_bind_to_llm:
-                agent_to_execute = self._agents_to_bind_to_llm.pop(0)  # get agent from the top of the list
-                logger.info(f"Resolving parameters for {agent_to_execute.get("name")} in the flow")
+                agent_to_execute = self._agents_to_bind_to_llm.pop(
+                    0
+                )  # get agent from the top of the list
+                logger.info(
+                    f"Resolving parameters for {agent_to_execute.get('name')} in the flow"
+                )
 
                 async with trace_execution_time(trace=trace):
                     response = await select_agent_and_resolve_parameters(
                         model=self.model,
                         messages=messages,
                         agents=[agent_to_execute],
-                        agent_choice=True  # force the current agent to be called
+                        agent_choice=True,  # force the current agent to be called
+                        timeout=timeout,
                     )
 
                 logger.success(
-                    f"Agent {agent_to_execute.get('name')} will be executed with args {response.tool_calls[0]["args"]}"
+                    f"Agent {agent_to_execute.get('name')} will be executed with args {response.tool_calls[0]['args']}"
                 )
 
-                trace.update(
-                    {
-                        "output": response.model_dump(),
-                        "is_success": True
-                    }
-                )
+                trace.update({"output": response.model_dump(), "is_success": True})
                 return {"messages": [response], "trace": [trace]}
 
+        except DeadlineExceededException:
+            raise
+
         except Exception as e:
             error_message = f"Unexpected error while resolving parameters for agent in the flow: {e}"
             logger.exception(error_message)
@@ -58,6 +67,6 @@ class FlowMasterAgent(BaseMasterAgent):
                 "name": "MasterAgent",
                 "input": messages[-1].model_dump(),
                 "output": error_message,
-                "is_success": False
+                "is_success": False,
             }
             return {"messages": [AIMessage(content=error_message)], "trace": [trace]}
@@ -2,20 +2,19 @@ from typing import Any
 
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 from loguru import logger
 
 from agents.base import BaseMasterAgent
+from models.exceptions import DeadlineExceededException
 from models.states import MasterAgentState
 from utils.agents import select_agent_and_resolve_parameters
+from utils.deadline import get_deadline, time_left
 from utils.tracing import trace_execution_time
 
 
 class ReActMasterAgent(BaseMasterAgent):
-    def __init__(
-            self,
-            model: BaseChatModel,
-            agents: list[dict[str, Any]]
-    ) -> None:
+    def __init__(self, model: BaseChatModel, agents: list[dict[str, Any]]) -> None:
         """
         Supervisor agent building on top of ReAct framework to automatically execute available agents and flows.
         ReAct framework allows to continuously call tools (remote agents in this case) to complete task assigned by user.
@@ -27,11 +26,14 @@ class ReActMasterAgent(BaseMasterAgent):
         super().__init__(model, agents)
         self._agents_to_bind_to_llm = [item["agent_schema"] for item in agents]
 
-    async def select_agent(self, state: MasterAgentState):
+    async def select_agent(self, state: MasterAgentState, config: RunnableConfig):
         """
         Selects agent/flow to execute, determine input parameters for the agent/flow.
         Acts as main supervisor node.
         """
+        # raises once the caller has given up, before any LLM capacity is spent
+        timeout = time_left(get_deadline(config))
+
         messages = state.messages
         trace = {
             "name": "MasterAgent",
@@ -44,22 +46,23 @@ class ReActMasterAgent(BaseMasterAgent):
                 response = await select_agent_and_resolve_parameters(
                     model=self.model,
                     messages=messages,
-                    agents=self._agents_to_bind_to_llm
+                    agents=self._agents_to_bind_to_llm,
+                    timeout=timeout,
                 )
 
             if response.tool_calls:
-                logger.success(f"Selected {response.tool_calls[0]["name"]} with args {response.tool_calls[0]["args"]}")
+                logger.success(
+                    f"Selected {response.tool_calls[0]['name']} with args {response.tool_calls[0]['args']}"
+                )
             else:
-                logger.success(f"No agent is selected, generating final response")
+                logger.success("No agent is selected, generating final response")
 
-            trace.update(
-                {
-                    "output": response.model_dump(),
-                    "is_success": True
-                }
-            )
+            trace.update({"output": response.model_dump(), "is_success": True})
             return {"messages": [response], "trace": [trace]}
 
+        except DeadlineExceededException:
+            raise
+
         except Exception as e:
             error_message = f"Unexpected error while selecting agent: {e}"
             logger.exception(error_message)
@@ -68,6 +71,6 @@ class ReActMasterAgent(BaseMasterAgent):
                 "name": "MasterAgent",
                 "input": messages[-1].model_dump(),
                 "output": error_message,
-                "is_success": False
+                "is_success": False,
             }
-            return {"messages": [AIMessage(content=error_message)],"trace": [trace]}
+            return {"messages": [AIMessage(content=error_message)], "trace": [trace]}
@@ -21,3 +21,9 @@ class Settings(BaseSettings):
     BACKEND_API_URL: str = Field(
         default="http://genai-backend:8000/api", alias="BACKEND_API_URL"
     )
+
+    # Progress streaming settings
+    STREAM_PROGRESS: bool = Field(default=True, alias="STREAM_PROGRESS")
+    PROGRESS_TOKEN_FLUSH_INTERVAL_SECONDS: float = Field(
+        default=0.05, alias="PROGRESS_TOKEN_FLUSH_INTERVAL_SECONDS"
+    )
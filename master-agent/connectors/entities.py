@@ -2,7 +2,7 @@ import uuid
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from typing import Any, Optional
 
 from genai_session.session import GenAISession
 from langchain_core.language_models import BaseChatModel
@@ -23,6 +23,8 @@ class AgentConfig(ABC):
     id: str
     name: str
     agent_type: str = field(init=False)
+    # posix timestamp the response is needed by, see utils.deadline
+    deadline: Optional[float] = field(default=None, kw_only=True)
 
 
 @dataclass
@@ -67,10 +69,7 @@ class GenAIFlowConfig(AgentConfig):
 
     def __post_init__(self):
         self.agent_type = AgentTypeEnum.flow.value
-        self.flow_master_agent = FlowMasterAgent(
-            model=self.model,
-            agents=self.agents
-        )
+        self.flow_master_agent = FlowMasterAgent(model=self.model, agents=self.agents)
 
 
 class ConnectorStrategy(ABC):
@@ -9,30 +9,51 @@ from loguru import logger
 from agents.react_master_agent import ReActMasterAgent
 from config.settings import Settings
 from llms import LLMFactory
+from models.exceptions import DeadlineExceededException
 from prompts import FILE_RELATED_SYSTEM_PROMPT
 from utils.agents import get_agents
 from utils.chat_history import get_chat_history
 from utils.common import attach_files_to_message
+from utils.deadline import time_left
+from utils.progress import ProgressEmitter, stream_graph
 
 app_settings = Settings()
 
 session = GenAISession(
-    api_key=app_settings.MASTER_AGENT_API_KEY,
-    ws_url=app_settings.ROUTER_WS_URL
+    api_key=app_settings.MASTER_AGENT_API_KEY, ws_url=app_settings.ROUTER_WS_URL
 )
 
 
-@session.bind(name="MasterAgent", description="Master agent that orchestrates other agents")
+@session.bind(
+    name="MasterAgent", description="Master agent that orchestrates other agents"
+)
 async def receive_message(
-        agent_context: GenAIContext,
-        session_id: str,
-        user_id: str,
-        configs: dict[str, Any],
-        files: Optional[list[dict[str, Any]]],
-        timestamp: str
+    agent_context: GenAIContext,
+    session_id: str,
+    user_id: str,
+    configs: dict[str, Any],
+    files: Optional[list[dict[str, Any]]],
+    timestamp: str,
+    deadline: Optional[float] = None,
 ):
+    progress = (
+        ProgressEmitter(
+            websocket=agent_context.websocket,
+            # read before the first await, the context is shared by concurrent requests
+            session_id=agent_context.session_id,
+            request_id=agent_context.request_id,
+            token_flush_interval=app_settings.PROGRESS_TOKEN_FLUSH_INTERVAL_SECONDS,
+        )
+        if app_settings.STREAM_PROGRESS
+        else None
+    )
+
     try:
-        graph_config = {"configurable": {"session": session}, "recursion_limit": 100}  # recursion_limit can be adjusted
+        # the deadline set by the backend bounds the run, it is checked before every step
+        graph_config = {
+            "configurable": {"session": session, "deadline": deadline},
+            "recursion_limit": 100,  # recursion_limit can be adjusted
+        }
 
         base_system_prompt = configs.get("system_prompt")
         user_system_prompt = configs.get("user_prompt")
@@ -45,20 +66,23 @@ async def receive_message(
             session_id=session_id,
             user_id=user_id,
             api_key=app_settings.MASTER_BE_API_KEY,
-            max_last_messages=configs.get("max_last_messages", 5)
+            max_last_messages=configs.get("max_last_messages", 5),
+            timeout=time_left(deadline, default=5.0),
         )
 
-        chat_history[-1] = attach_files_to_message(message=chat_history[-1], files=files) if files else chat_history[-1]
-        init_messages = [
-            SystemMessage(content=system_prompt),
-            *chat_history
-        ]
+        chat_history[-1] = (
+            attach_files_to_message(message=chat_history[-1], files=files)
+            if files
+            else chat_history[-1]
+        )
+        init_messages = [SystemMessage(content=system_prompt), *chat_history]
 
         agents = await get_agents(
             url=f"{app_settings.BACKEND_API_URL}/agents/active",
             agent_type="all",
             api_key=app_settings.MASTER_BE_API_KEY,
-            user_id=user_id
+            user_id=user_id,
+            timeout=time_left(deadline, default=5.0),
         )
 
         llm = LLMFactory.create(configs=configs)
@@ -66,26 +90,40 @@ async def receive_message(
 
         logger.info("Running Master Agent")
 
-        final_state = await master_agent.graph.ainvoke(
-            input={"messages": init_messages},
-            config=graph_config
-        )
+        if progress:
+            final_state = await stream_graph(
+                graph=master_agent.graph,
+                input={"messages": init_messages},
+                config=graph_config,
+                progress=progress,
+            )
+        else:
+            final_state = await master_agent.graph.ainvoke(
+                input={"messages": init_messages}, config=graph_config
+            )
 
         response = final_state["messages"][-1].content
 
         logger.success("Master Agent run successfully")
 
-        return {"agents_trace": final_state["trace"], "response": response, "is_success": True}
+        return {
+            "agents_trace": final_state["trace"],
+            "response": response,
+            "is_success": True,
+        }
+
+    except DeadlineExceededException as e:
+        # the caller has given up, the response is dropped by the router
+        logger.warning(f"Master Agent stopped: {e}")
+
+        trace = {"name": "MasterAgent", "output": str(e), "is_success": False}
+        return {"agents_trace": [trace], "response": str(e), "is_success": False}
 
     except Exception as e:
         error_message = f"Unexpected error while running Master Agent: {e}"
         logger.exception(error_message)
 
-        trace = {
-            "name": "MasterAgent",
-            "output": error_message,
-            "is_success": False
-        }
+        trace = {"name": "MasterAgent", "output": error_message, "is_success": False}
         return {"agents_trace": [trace], "response": error_message, "is_success": False}
 
 
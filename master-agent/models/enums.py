@@ -5,4 +5,11 @@ class Nodes(StrEnum):
     supervisor = "supervisor"
     execute_agent = "execute_agent"
 
-print(Nodes.supervisor.value)
\ No newline at end of file
+
+class ProgressEventType(StrEnum):
+    agent_selected = "agent_selected"
+    agent_result = "agent_result"
+    token = "token"
+
+
+print(Nodes.supervisor.value)
@@ -0,0 +1,24 @@
+import json
+from typing import List
+
+import pytest
+
+
+class FakeConnection:
+    """
+    Stand-in for the router connection of the Master Agent recording the frames sent.
+    """
+
+    def __init__(self, fail: bool = False):
+        self.sent: List[dict] = []
+        self.fail = fail
+
+    async def send(self, message: str) -> None:
+        if self.fail:
+            raise ConnectionError("router is gone")
+        self.sent.append(json.loads(message))
+
+
+@pytest.fixture
+def router_connection():
+    return FakeConnection()
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents.react_master_agent import ReActMasterAgent
+from connectors.entities import GenAIConfig
+from connectors.managers import GenAIConnector
+from models.exceptions import DeadlineExceededException
+from models.states import MasterAgentState
+from utils.deadline import get_deadline, time_left
+
+
+def test_deadline_is_read_from_the_graph_config():
+    assert get_deadline({"configurable": {"deadline": 123.0}}) == 123.0
+    assert get_deadline({}) is None
+
+
+def test_time_left_is_bounded_by_the_default():
+    assert time_left(None) is None
+    assert time_left(None, default=5.0) == 5.0
+    assert time_left(time.time() + 100, default=5.0) == 5.0
+    assert time_left(time.time() + 2) == pytest.approx(2.0, abs=0.1)
+
+
+def test_time_left_after_the_deadline():
+    with pytest.raises(DeadlineExceededException):
+        time_left(time.time() - 1, default=5.0)
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls = []
+
+    async def send(self, client_id, message, close_timeout=None):
+        self.calls.append(close_timeout)
+        return SimpleNamespace(response="done", execution_time=0.1, is_success=True)
+
+
+def genai_config(session, deadline):
+    return GenAIConfig(
+        id="agent-1",
+        name="agent",
+        arguments={"text": "hi"},
+        session=session,
+        deadline=deadline,
+    )
+
+
+@pytest.mark.asyncio
+async def test_agent_call_is_bounded_by_the_deadline():
+    session = FakeSession()
+    response, trace = await GenAIConnector(
+        genai_config(session, time.time() + 30)
+    ).invoke()
+
+    assert response == "done" and trace["is_success"]
+    assert session.calls[0] == pytest.approx(30, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_agent_is_not_called_after_the_deadline():
+    session = FakeSession()
+    _, trace = await GenAIConnector(genai_config(session, time.time() - 1)).invoke()
+
+    assert not trace["is_success"]
+    assert session.calls == []
+
+
+class SlowModel:
+    """
+    Chat model stand-in answering with the scripted messages, then hanging.
+    """
+
+    def __init__(self, *responses: AIMessage):
+        self.responses = list(responses)
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    async def ainvoke(self, messages):
+        if self.responses:
+            return self.responses.pop(0)
+        await asyncio.sleep(5)
+        return AIMessage(content="too late")
+
+
+def flow_agent():
+    return {
+        "id": "flow-1",
+        "name": "flow_1",
+        "type": "flow",
+        "flow": ["agent-1"],
+        "agent_schema": {"name": "flow_1"},
+    }
+
+
+def genai_agent():
+    return {
+        "id": "agent-1",
+        "name": "agent_1",
+        "type": "genai",
+        "agent_schema": {"name": "agent_1"},
+    }
+
+
+async def run_graph(master_agent, deadline):
+    return await master_agent.graph.ainvoke(
+        input={"messages": [HumanMessage(content="hi")]},
+        config={"configurable": {"session": FakeSession(), "deadline": deadline}},
+    )
+
+
+@pytest.mark.asyncio
+async def test_supervisor_stops_the_graph_at_the_deadline():
+    master_agent = ReActMasterAgent(model=SlowModel(), agents=[])
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceededException):
+        await run_graph(master_agent, time.time() + 0.3)
+    assert time.monotonic() - started < 2
+
+
+@pytest.mark.asyncio
+async def test_flow_running_past_the_deadline_is_not_reported_as_agent_error():
+    select_flow = AIMessage(
+        content="",
+        tool_calls=[{"name": "flow_1", "args": {}, "id": "call-1"}],
+    )
+    master_agent = ReActMasterAgent(
+        model=SlowModel(), agents=[flow_agent(), genai_agent()]
+    )
+    state = MasterAgentState(
+        messages=[HumanMessage(content="hi"), select_flow], trace=[]
+    )
+    config = {"configurable": {"session": FakeSession(), "deadline": time.time() + 0.3}}
+
+    with pytest.raises(DeadlineExceededException):
+        await master_agent.execute_agent(state, config)
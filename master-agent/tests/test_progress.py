@@ -0,0 +1,130 @@
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+from models.enums import Nodes, ProgressEventType
+from utils.progress import (
+    AGENT_PROGRESS_MESSAGE_TYPE,
+    SUMMARY_MAX_LENGTH,
+    ProgressEmitter,
+    stream_graph,
+)
+
+SUPERVISOR = {"langgraph_node": Nodes.supervisor.value}
+
+
+def make_emitter(connection, token_flush_interval: float = 60.0) -> ProgressEmitter:
+    return ProgressEmitter(
+        websocket=connection,
+        session_id="session",
+        request_id="request",
+        token_flush_interval=token_flush_interval,
+    )
+
+
+def events(connection):
+    return [frame["event"] for frame in connection.sent]
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_coalesced(router_connection):
+    emitter = make_emitter(router_connection)
+    for token in ("Hel", "lo", " there"):
+        await emitter.on_token(AIMessageChunk(content=token), SUPERVISOR)
+    await emitter.flush_tokens()
+
+    # the first token is sent right away, the rest waits for the flush
+    assert events(router_connection) == [
+        {"type": ProgressEventType.token.value, "delta": "Hel"},
+        {"type": ProgressEventType.token.value, "delta": "lo there"},
+    ]
+    assert router_connection.sent[0] == {
+        "message_type": AGENT_PROGRESS_MESSAGE_TYPE,
+        "session_id": "session",
+        "request_id": "request",
+        "event": events(router_connection)[0],
+    }
+
+
+@pytest.mark.asyncio
+async def test_only_answer_tokens_are_streamed(router_connection):
+    emitter = make_emitter(router_connection)
+    await emitter.on_token(
+        AIMessageChunk(content="internal"),
+        {"langgraph_node": Nodes.execute_agent.value},
+    )
+    await emitter.on_token(AIMessageChunk(content=""), SUPERVISOR)
+    await emitter.flush_tokens()
+    assert router_connection.sent == []
+
+
+@pytest.mark.asyncio
+async def test_selected_agents_and_their_results(router_connection):
+    emitter = make_emitter(router_connection)
+    await emitter.on_update(
+        {
+            Nodes.supervisor.value: {
+                "messages": [
+                    AIMessage(
+                        content="",
+                        tool_calls=[
+                            {"name": "weather", "args": {"city": "Kyiv"}, "id": "1"}
+                        ],
+                    )
+                ]
+            }
+        }
+    )
+    await emitter.on_update(
+        {
+            Nodes.execute_agent.value: {
+                "messages": ToolMessage(
+                    content="x" * 1000, name="weather", tool_call_id="1"
+                ),
+                "trace": [{"is_success": False}],
+            }
+        }
+    )
+
+    selected, result = events(router_connection)
+    assert selected == {
+        "type": ProgressEventType.agent_selected.value,
+        "agent": "weather",
+        "arguments": {"city": "Kyiv"},
+    }
+    assert result["type"] == ProgressEventType.agent_result.value
+    assert result["agent"] == "weather" and result["is_success"] is False
+    assert len(result["summary"]) == SUMMARY_MAX_LENGTH
+
+
+@pytest.mark.asyncio
+async def test_failed_progress_does_not_fail_the_run(router_connection):
+    router_connection.fail = True
+    emitter = make_emitter(router_connection)
+    await emitter.emit({"type": ProgressEventType.token.value, "delta": "lost"})
+
+
+class FakeGraph:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def astream(self, input, config, stream_mode):
+        for chunk in self.chunks:
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_stream_graph_returns_the_final_state(router_connection):
+    graph = FakeGraph(
+        [
+            ("messages", (AIMessageChunk(content="Hi"), SUPERVISOR)),
+            ("messages", (AIMessageChunk(content="!"), SUPERVISOR)),
+            ("updates", {Nodes.supervisor.value: None}),
+            ("values", {"messages": ["partial"]}),
+            ("values", {"messages": ["final"]}),
+        ]
+    )
+    emitter = make_emitter(router_connection)
+
+    state = await stream_graph(graph, input={}, config={}, progress=emitter)
+    assert state == {"messages": ["final"]}
+    assert "".join(event["delta"] for event in events(router_connection)) == "Hi!"
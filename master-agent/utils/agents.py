@@ -1,14 +1,22 @@
-from typing import Any
+import asyncio
+from typing import Any, Optional
 
 import httpx
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import BaseMessage, AIMessage
 
+from models.exceptions import DeadlineExceededException
 from utils.common import bind_tools_safely
 
 
-async def get_agents(url: str, agent_type: str, api_key: str, user_id: str):
-    async with httpx.AsyncClient() as client:
+async def get_agents(
+    url: str,
+    agent_type: str,
+    api_key: str,
+    user_id: str,
+    timeout: Optional[float] = 5.0,
+):
+    async with httpx.AsyncClient(timeout=timeout) as client:
         response = await client.get(
             url,
             headers={"X-API-KEY": api_key},
@@ -22,12 +30,20 @@ async def get_agents(url: str, agent_type: str, api_key: str, user_id: str):
 
 
 async def select_agent_and_resolve_parameters(
-        model: BaseChatModel,
-        messages: list[BaseMessage],
-        agents: list[dict[str, Any]],
-        agent_choice: bool = False
+    model: BaseChatModel,
+    messages: list[BaseMessage],
+    agents: list[dict[str, Any]],
+    agent_choice: bool = False,
+    timeout: Optional[float] = None,
 ) -> AIMessage:
-    model_with_agents = bind_tools_safely(model=model, tools=agents, tool_choice=agent_choice)
+    model_with_agents = bind_tools_safely(
+        model=model, tools=agents, tool_choice=agent_choice
+    )
 
-    response = await model_with_agents.ainvoke(messages)
+    try:
+        response = await asyncio.wait_for(
+            model_with_agents.ainvoke(messages), timeout=timeout
+        )
+    except asyncio.TimeoutError:
+        raise DeadlineExceededException("Request deadline has passed")
     return response
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import httpx
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 
@@ -19,12 +21,23 @@ def chat_history_to_messages(chat_history: list[dict[str, str]]) -> list[BaseMes
     return messages
 
 
-async def get_chat_history(url: str, session_id: str, user_id: str, api_key: str, max_last_messages: int):
-    async with httpx.AsyncClient() as client:
+async def get_chat_history(
+    url: str,
+    session_id: str,
+    user_id: str,
+    api_key: str,
+    max_last_messages: int,
+    timeout: Optional[float] = 5.0,
+):
+    async with httpx.AsyncClient(timeout=timeout) as client:
         response = await client.get(
             url,
             headers={"X-API-KEY": api_key},
-            params={"session_id": session_id, "user_id": user_id, "per_page": max_last_messages}
+            params={
+                "session_id": session_id,
+                "user_id": user_id,
+                "per_page": max_last_messages,
+            },
         )
 
         response.raise_for_status()
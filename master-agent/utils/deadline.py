@@ -0,0 +1,35 @@
+import time
+from typing import Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from models.exceptions import DeadlineExceededException
+
+
+def get_deadline(config: RunnableConfig) -> Optional[float]:
+    return config.get("configurable", {}).get("deadline")
+
+
+def time_left(
+    deadline: Optional[float], default: Optional[float] = None
+) -> Optional[float]:
+    """
+    Timeout of a call made for a request with the given deadline.
+
+    Args:
+        deadline (Optional[float]): Posix timestamp the response is needed by, None if the request has none
+        default (Optional[float]): Timeout of the call without a deadline, its upper bound with one
+
+    Returns:
+        Optional[float]: Seconds the call may take, None for no timeout
+
+    Raises:
+        DeadlineExceededException: If the deadline has passed, the caller has given up on the response
+    """
+    if deadline is None:
+        return default
+
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise DeadlineExceededException("Request deadline has passed")
+    return remaining if default is None else min(remaining, default)
@@ -0,0 +1,149 @@
+import json
+import time
+from typing import Any
+
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph.state import CompiledStateGraph
+from loguru import logger
+from websockets.asyncio.client import ClientConnection
+
+from models.enums import Nodes, ProgressEventType
+
+# router message type of progress events, missing in genai_session's WSMessageType
+AGENT_PROGRESS_MESSAGE_TYPE = "agent_progress"
+SUMMARY_MAX_LENGTH = 500
+
+
+class ProgressEmitter:
+    def __init__(
+        self,
+        websocket: ClientConnection,
+        session_id: str,
+        request_id: str,
+        token_flush_interval: float,
+    ) -> None:
+        """
+        Streams progress of a Master Agent run to the frontend of the chat through the router:
+        selected agents, summaries of their results and the tokens of the answer as they are generated.
+
+        Args:
+            websocket (ClientConnection): Router connection of the Master Agent
+            session_id (str): Chat the progress belongs to
+            request_id (str): Request the progress belongs to
+            token_flush_interval (float): Seconds tokens are coalesced for before they are sent,
+                the first token is sent right away
+        """
+        self.websocket = websocket
+        self.session_id = session_id
+        self.request_id = request_id
+        self.token_flush_interval = token_flush_interval
+        self._tokens: list[str] = []
+        self._last_flush = 0.0
+
+    async def emit(self, event: dict[str, Any]) -> None:
+        """
+        Sends a progress event, failures are only logged since the final response carries the answer anyway.
+        """
+        try:
+            await self.websocket.send(
+                json.dumps(
+                    {
+                        "message_type": AGENT_PROGRESS_MESSAGE_TYPE,
+                        "session_id": self.session_id,
+                        "request_id": self.request_id,
+                        "event": event,
+                    }
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Failed to send progress of request {self.request_id}: {e}")
+
+    async def on_token(self, chunk: BaseMessage, metadata: dict[str, Any]) -> None:
+        """
+        Handles an LLM token of the 'messages' stream mode, only tokens of the supervisor are part of the answer.
+        """
+        if metadata.get("langgraph_node") != Nodes.supervisor.value:
+            return
+        if (
+            not isinstance(chunk, AIMessageChunk)
+            or not isinstance(chunk.content, str)
+            or not chunk.content
+        ):
+            return
+
+        self._tokens.append(chunk.content)
+        if time.monotonic() - self._last_flush >= self.token_flush_interval:
+            await self.flush_tokens()
+
+    async def on_update(self, update: dict[str, Any]) -> None:
+        """
+        Handles the output of a graph node of the 'updates' stream mode.
+        """
+        for node, output in update.items():
+            if not output:
+                continue
+
+            messages = output.get("messages") or []
+            if isinstance(messages, BaseMessage):
+                messages = [messages]
+
+            if node == Nodes.supervisor.value:
+                await self.flush_tokens()
+                for message in messages:
+                    for tool_call in getattr(message, "tool_calls", None) or []:
+                        await self.emit(
+                            {
+                                "type": ProgressEventType.agent_selected.value,
+                                "agent": tool_call["name"],
+                                "arguments": tool_call["args"],
+                            }
+                        )
+
+            elif node == Nodes.execute_agent.value:
+                traces = output.get("trace") or [{}]
+                for message in messages:
+                    await self.emit(
+                        {
+                            "type": ProgressEventType.agent_result.value,
+                            "agent": message.name,
+                            "is_success": traces[-1].get("is_success", True),
+                            "summary": str(message.content)[:SUMMARY_MAX_LENGTH],
+                        }
+                    )
+
+    async def flush_tokens(self) -> None:
+        if not self._tokens:
+            return
+
+        delta = "".join(self._tokens)
+        self._tokens.clear()
+        self._last_flush = time.monotonic()
+        await self.emit({"type": ProgressEventType.token.value, "delta": delta})
+
+
+async def stream_graph(
+    graph: CompiledStateGraph,
+    input: dict[str, Any],
+    config: RunnableConfig,
+    progress: ProgressEmitter,
+) -> dict[str, Any]:
+    """
+    Runs the graph like `graph.ainvoke`, emitting progress while it runs.
+
+    Returns:
+        dict[str, Any]: Final state of the graph
+    """
+    final_state = {}
+    async for mode, chunk in graph.astream(
+        input=input, config=config, stream_mode=["messages", "updates", "values"]
+    ):
+        if mode == "messages":
+            await progress.on_token(*chunk)
+        elif mode == "updates":
+            await progress.on_update(chunk)
+        else:
+            final_state = chunk
+
+    await progress.flush_tokens()
+    return final_state
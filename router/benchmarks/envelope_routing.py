@@ -0,0 +1,126 @@
+"""
+Compares the regular JSON routing path of the router with the envelope fast path.
+
+Run from the router directory:
+
+    python -m benchmarks.envelope_routing --iterations 2000 --json report.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from benchmarks import agent_token
+from connectors.ws_connector_manager import WSConnectionManager
+from utils.envelope import encode_envelope
+
+AGENT_ID = "5a7d6a76-6f3b-4b43-a2d2-1f7e7f0c3b55"
+PAYLOAD_SIZES = (1_024, 65_536, 1_048_576)
+
+
+class FakeWebSocket:
+    """
+    Accepts every frame instantly, so only the routing cost is measured.
+    """
+
+    def __init__(self, headers: dict):
+        self.headers = headers
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        pass
+
+
+def build_frames(payload_size: int, caller_id: str) -> dict[str, tuple[str, str]]:
+    request_payload = {"text": "x" * payload_size}
+    response_body = {"response": "y" * payload_size, "execution_time": 0.1}
+    legacy = (
+        json.dumps(
+            {
+                "message_type": "agent_invoke",
+                "agent_uuid": AGENT_ID,
+                "request_payload": request_payload,
+            }
+        ),
+        json.dumps(
+            {
+                "message_type": "agent_response",
+                "invoked_by": caller_id,
+                **response_body,
+            }
+        ),
+    )
+    envelope = (
+        encode_envelope(
+            {"message_type": "agent_invoke", "agent_uuid": AGENT_ID},
+            json.dumps({"request_payload": request_payload}),
+        ),
+        encode_envelope(
+            {"message_type": "agent_response", "invoked_by": caller_id},
+            json.dumps(response_body),
+        ),
+    )
+    return {"json": legacy, "envelope": envelope}
+
+
+async def run_case(payload_size: int, frame_format: str, iterations: int) -> float:
+    manager = WSConnectionManager()
+    envelope_headers = {"x-genai-envelope": "1"}
+    agent_id, _ = await manager.connect(
+        FakeWebSocket(
+            {"x-custom-authorization": agent_token(AGENT_ID), **envelope_headers}
+        )
+    )
+    caller_id, _ = await manager.connect(
+        FakeWebSocket({"x-custom-invoke-key": f"caller:{AGENT_ID}", **envelope_headers})
+    )
+    invoke, response = build_frames(payload_size, caller_id)[frame_format]
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await manager.process_message(caller_id, invoke, agent_jwt=None)
+        await manager.process_message(agent_id, response, agent_jwt=None)
+        await asyncio.sleep(0)  # let writer tasks drain the send queues
+    elapsed = time.perf_counter() - started
+
+    for client_id in list(manager.active_connections):
+        for connection in manager.active_connections.pop(client_id).replicas:
+            await connection.close()
+    return elapsed
+
+
+async def main(iterations: int, report_path: str | None) -> None:
+    logging.disable(logging.INFO)
+    report = []
+    print(f"{'payload':>10} {'format':>9} {'hops/s':>12} {'us/hop':>10}")
+    for payload_size in PAYLOAD_SIZES:
+        for frame_format in ("json", "envelope"):
+            elapsed = await run_case(payload_size, frame_format, iterations)
+            hops = iterations * 2
+            result = {
+                "payload_bytes": payload_size,
+                "format": frame_format,
+                "hops_per_second": hops / elapsed,
+                "microseconds_per_hop": elapsed / hops * 1_000_000,
+            }
+            report.append(result)
+            print(
+                f"{payload_size:>10} {frame_format:>9} "
+                f"{result['hops_per_second']:>12.0f} {result['microseconds_per_hop']:>10.1f}"
+            )
+
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump({"iterations": iterations, "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", dest="report_path", default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.report_path))
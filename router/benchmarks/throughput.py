@@ -0,0 +1,285 @@
+"""
+Measures invocation throughput and round-trip latency of a router instance.
+
+The router app is started in-process on a free local port, then synthetic agents
+answer every invocation immediately while synthetic callers invoke them over real
+WebSocket connections as fast as they can.
+
+Run from the router directory:
+
+    python -m benchmarks.throughput --agents 4 --callers 32 --duration 10 \\
+        --payload-size 1024 65536 --json report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import time
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+from uuid import uuid4
+
+# keep per-frame payload logging out of the measurement
+os.environ.setdefault("ROUTER_SAMPLED_PAYLOAD_LOGGING", "True")
+
+import uvicorn  # noqa: E402
+import websockets  # noqa: E402
+
+from benchmarks import agent_token  # noqa: E402
+from main import app  # noqa: E402
+
+
+@dataclass
+class CaseResult:
+    payload_bytes: int
+    agents: int
+    callers: int
+    connection_per_call: bool
+    duration_seconds: float
+    invocations: int
+    errors: int
+    invocations_per_second: float
+    latency_ms: dict = field(default_factory=dict)
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of already sorted values.
+    """
+    if not sorted_values:
+        return None
+    rank = max(int(round(q / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_agent(url: str, agent_id: str, ready: asyncio.Event) -> None:
+    """
+    Synthetic agent echoing a fixed response for every invocation.
+    """
+    async with websockets.connect(
+        url,
+        additional_headers={"x-custom-authorization": agent_token(agent_id)},
+        max_size=None,
+    ) as ws:
+        ready.set()
+        try:
+            async for frame in ws:
+                # invocations carry no message type, only the caller to answer
+                if not (invoked_by := json.loads(frame).get("invoked_by")):
+                    continue
+                await ws.send(
+                    json.dumps(
+                        {
+                            "message_type": "agent_response",
+                            "invoked_by": invoked_by,
+                            "response": "ok",
+                            "execution_time": 0.0,
+                        }
+                    )
+                )
+        except websockets.ConnectionClosed:
+            pass
+
+
+async def run_caller(
+    url: str,
+    agent_id: str,
+    payload: dict,
+    stop_at: float,
+    connection_per_call: bool,
+    latencies: List[float],
+    errors: List[str],
+) -> None:
+    """
+    Synthetic caller invoking one agent in a closed loop until `stop_at`.
+    With `connection_per_call` every invocation opens its own connection, like
+    `session.send` of genai_session does.
+    """
+    headers = {"x-custom-invoke-key": f"{agent_id}:{uuid4().hex}"}
+    frame = json.dumps(
+        {
+            "message_type": "agent_invoke",
+            "agent_uuid": agent_id,
+            "request_payload": payload,
+            "request_metadata": {"request_id": None, "session_id": None},
+        }
+    )
+
+    async def invoke(ws) -> None:
+        started = time.perf_counter()
+        await ws.send(frame)
+        response = json.loads(await ws.recv())
+        if response.get("message_type") == "agent_response":
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors.append(json.dumps(response.get("error")))
+
+    ws = None
+    try:
+        while time.perf_counter() < stop_at:
+            if ws is None:
+                ws = await websockets.connect(
+                    url, additional_headers=headers, max_size=None
+                )
+            await invoke(ws)
+            if connection_per_call:
+                await ws.close()
+                ws = None
+    finally:
+        if ws is not None:
+            await ws.close()
+
+
+async def run_case(
+    url: str,
+    agents: int,
+    callers: int,
+    payload_size: int,
+    duration: float,
+    warmup: float,
+    connection_per_call: bool,
+) -> CaseResult:
+    agent_ids = [str(uuid4()) for _ in range(agents)]
+    readiness = [asyncio.Event() for _ in agent_ids]
+    agent_tasks = [
+        asyncio.create_task(run_agent(url, agent_id, ready))
+        for agent_id, ready in zip(agent_ids, readiness)
+    ]
+    await asyncio.gather(*(ready.wait() for ready in readiness))
+
+    payload = {"text": "x" * payload_size}
+
+    async def drive(seconds: float, latencies: List[float], errors: List[str]):
+        stop_at = time.perf_counter() + seconds
+        await asyncio.gather(
+            *(
+                run_caller(
+                    url,
+                    agent_ids[i % agents],
+                    payload,
+                    stop_at,
+                    connection_per_call,
+                    latencies,
+                    errors,
+                )
+                for i in range(callers)
+            )
+        )
+
+    if warmup:
+        await drive(warmup, [], [])
+
+    latencies: List[float] = []
+    errors: List[str] = []
+    started = time.perf_counter()
+    await drive(duration, latencies, errors)
+    elapsed = time.perf_counter() - started
+
+    for task in agent_tasks:
+        task.cancel()
+    await asyncio.gather(*agent_tasks, return_exceptions=True)
+
+    latencies.sort()
+    return CaseResult(
+        payload_bytes=payload_size,
+        agents=agents,
+        callers=callers,
+        connection_per_call=connection_per_call,
+        duration_seconds=elapsed,
+        invocations=len(latencies),
+        errors=len(errors),
+        invocations_per_second=len(latencies) / elapsed,
+        latency_ms={
+            name: None if value is None else value * 1000
+            for name, value in (
+                ("p50", percentile(latencies, 50)),
+                ("p95", percentile(latencies, 95)),
+                ("p99", percentile(latencies, 99)),
+                ("max", latencies[-1] if latencies else None),
+            )
+        },
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    url = f"ws://127.0.0.1:{port}/ws"
+    results = []
+    print(
+        f"{'payload':>10} {'agents':>7} {'callers':>8} {'inv/s':>10} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+    )
+    try:
+        for payload_size in args.payload_size:
+            result = await run_case(
+                url=url,
+                agents=args.agents,
+                callers=args.callers,
+                payload_size=payload_size,
+                duration=args.duration,
+                warmup=args.warmup,
+                connection_per_call=args.connection_per_call,
+            )
+            results.append(result)
+            latency = {k: v or 0.0 for k, v in result.latency_ms.items()}
+            print(
+                f"{payload_size:>10} {result.agents:>7} {result.callers:>8} "
+                f"{result.invocations_per_second:>10.0f} {latency['p50']:>8.2f} "
+                f"{latency['p95']:>8.2f} {latency['p99']:>8.2f} {result.errors:>7}"
+            )
+    finally:
+        server.should_exit = True
+        await server_task
+
+    if args.report_path:
+        with open(args.report_path, "w") as f:
+            json.dump(
+                {
+                    "benchmark": "router_throughput",
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": [asdict(result) for result in results],
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--agents", type=int, default=4)
+    parser.add_argument("--callers", type=int, default=32)
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Seconds to measure per case"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=1.0, help="Seconds to run before measuring"
+    )
+    parser.add_argument(
+        "--payload-size", type=int, nargs="+", default=[1_024], help="Payload bytes"
+    )
+    parser.add_argument(
+        "--connection-per-call",
+        action="store_true",
+        help="Open a new connection for every invocation like session.send does",
+    )
+    parser.add_argument("--json", dest="report_path", default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,177 @@
+"""
+Measures how invocation throughput scales with the amount of router worker processes.
+
+For every worker count the router is started through `serve.py` on a free local port,
+then load generator processes each run the synthetic agents and callers of
+`benchmarks.throughput` against it. Connections land on random workers, so most
+invocations cross workers through the cluster hub like in production.
+
+Run from the router directory:
+
+    python -m benchmarks.workers --workers 1 2 4 --generators 4 --duration 10 \\
+        --json report.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import signal
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import List
+
+from benchmarks.throughput import free_port
+
+
+@dataclass
+class ScalingResult:
+    workers: int
+    generators: int
+    duration_seconds: float
+    invocations: int
+    errors: int
+    invocations_per_second: float
+    worst_p50_ms: float
+    worst_p99_ms: float
+
+
+def generate_load(url: str, args: argparse.Namespace) -> dict:
+    """
+    Runs one load generator process, see `benchmarks.throughput.run_case`.
+    """
+    from benchmarks.throughput import run_case
+
+    result = asyncio.run(
+        run_case(
+            url=url,
+            agents=args.agents,
+            callers=args.callers,
+            payload_size=args.payload_size,
+            duration=args.duration,
+            warmup=args.warmup,
+            connection_per_call=False,
+        )
+    )
+    return asdict(result)
+
+
+def start_router(workers: int, port: int) -> subprocess.Popen:
+    env = {**os.environ, "ROUTER_SAMPLED_PAYLOAD_LOGGING": "True"}
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "serve.py",
+            "--workers",
+            str(workers),
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    else:
+        process.kill()
+        raise RuntimeError("Router did not start")
+    time.sleep(1.0)  # let the remaining workers bind the port as well
+    return process
+
+
+def stop_router(process: subprocess.Popen) -> None:
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def run_scaling_case(workers: int, args: argparse.Namespace) -> ScalingResult:
+    port = free_port()
+    router = start_router(workers, port)
+    url = f"ws://127.0.0.1:{port}/ws"
+    try:
+        with multiprocessing.get_context("spawn").Pool(args.generators) as pool:
+            results = pool.starmap(generate_load, [(url, args)] * args.generators)
+    finally:
+        stop_router(router)
+
+    invocations = sum(result["invocations"] for result in results)
+    duration = max(result["duration_seconds"] for result in results)
+    return ScalingResult(
+        workers=workers,
+        generators=args.generators,
+        duration_seconds=duration,
+        invocations=invocations,
+        errors=sum(result["errors"] for result in results),
+        invocations_per_second=invocations / duration,
+        worst_p50_ms=max(result["latency_ms"]["p50"] or 0.0 for result in results),
+        worst_p99_ms=max(result["latency_ms"]["p99"] or 0.0 for result in results),
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    results: List[ScalingResult] = []
+    print(
+        f"{'workers':>8} {'inv/s':>10} {'speedup':>8} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'errors':>7}"
+    )
+    for workers in args.workers:
+        result = run_scaling_case(workers, args)
+        results.append(result)
+        speedup = result.invocations_per_second / results[0].invocations_per_second
+        print(
+            f"{workers:>8} {result.invocations_per_second:>10.0f} {speedup:>8.2f} "
+            f"{result.worst_p50_ms:>8.2f} {result.worst_p99_ms:>8.2f} {result.errors:>7}"
+        )
+
+    if args.report_path:
+        with open(args.report_path, "w") as f:
+            json.dump(
+                {
+                    "benchmark": "router_worker_scaling",
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpus": os.cpu_count(),
+                    "results": [asdict(result) for result in results],
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument(
+        "--generators", type=int, default=4, help="Load generator processes"
+    )
+    parser.add_argument(
+        "--agents", type=int, default=4, help="Synthetic agents per generator"
+    )
+    parser.add_argument(
+        "--callers", type=int, default=16, help="Synthetic callers per generator"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Seconds to measure per case"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=2.0, help="Seconds to run before measuring"
+    )
+    parser.add_argument("--payload-size", type=int, default=1_024, help="Payload bytes")
+    parser.add_argument("--json", dest="report_path", default=None)
+    main(parser.parse_args())
@@ -0,0 +1,68 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import jwt
+
+
+@dataclass(frozen=True)
+class AgentIdentity:
+    agent_id: str
+    user_id: Optional[str]
+    expires_at: float
+
+
+class AgentJWTVerifier:
+    """
+    Verifies agent JWTs issued by the backend and keeps the verified identities in an
+    LRU cache keyed by the token hash, so reconnecting agents skip signature checks.
+    """
+
+    def __init__(self, secret_key: str, algorithm: str, cache_size: int):
+        """
+        Args:
+            secret_key (str): The key the backend signs agent JWTs with.
+            algorithm (str): The signing algorithm.
+            cache_size (int): Maximum amount of verified tokens kept in the cache.
+        """
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, AgentIdentity] = OrderedDict()
+
+    def verify(self, token: str) -> Optional[AgentIdentity]:
+        """
+        Verifies the signature and expiry of an agent JWT.
+
+        Args:
+            token (str): The agent JWT.
+
+        Returns:
+            Optional[AgentIdentity]: The verified identity, None if the token is invalid.
+        """
+        key = hashlib.sha256(token.encode()).hexdigest()
+        if identity := self._cache.get(key):
+            if identity.expires_at > time.time():
+                self._cache.move_to_end(key)
+                return identity
+            del self._cache[key]
+
+        try:
+            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except jwt.PyJWTError:
+            return None
+        if not (agent_id := payload.get("sub")):
+            return None
+
+        user_id = payload.get("user_id")
+        identity = AgentIdentity(
+            agent_id=str(agent_id),
+            user_id=str(user_id) if user_id else None,
+            expires_at=float(payload.get("exp", float("inf"))),
+        )
+        self._cache[key] = identity
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return identity
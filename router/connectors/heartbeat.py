@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterator, Optional, Tuple
+from uuid import uuid4
+
+from connectors.outbound import OutboundConnection
+from fastapi import WebSocket
+
+# Weights of the smoothed round trip time and its variation, as in RFC 6298
+RTT_ALPHA = 1 / 8
+RTT_BETA = 1 / 4
+
+
+@dataclass
+class Liveness:
+    client_id: str
+    connection: OutboundConnection
+    last_received: float = field(default_factory=time.monotonic)
+    srtt: Optional[float] = None  # smoothed round trip time
+    rttvar: Optional[float] = None  # round trip time variation
+    ping_id: Optional[str] = None
+    ping_sent_at: Optional[float] = None
+    missed: int = 0
+
+    def observe_rtt(self, sample: float) -> None:
+        if self.srtt is None:
+            self.srtt = sample
+            self.rttvar = sample / 2
+        else:
+            self.rttvar = (1 - RTT_BETA) * self.rttvar + RTT_BETA * abs(
+                self.srtt - sample
+            )
+            self.srtt = (1 - RTT_ALPHA) * self.srtt + RTT_ALPHA * sample
+
+    def timeout(self, minimum: float, maximum: float) -> float:
+        """
+        How long a pong may take, the maximum until the first round trip is measured.
+        """
+        if self.srtt is None:
+            return maximum
+        return min(max(self.srtt + 4 * self.rttvar, minimum), maximum)
+
+
+class HeartbeatMonitor:
+    """
+    Detects dead clients before TCP does. Idle connections are pinged and the round
+    trip time of every pong feeds a smoothed estimate, the pong timeout follows that
+    estimate. Any received frame proves the client is alive, so busy connections are
+    never pinged. Clients missing `max_missed` pongs in a row are evicted.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        min_timeout: float,
+        max_timeout: float,
+        max_missed: int,
+    ):
+        """
+        Args:
+            interval (float): How long a connection may stay silent before it is pinged.
+            min_timeout (float): Lower bound of the adaptive pong timeout.
+            max_timeout (float): Upper bound of the adaptive pong timeout.
+            max_missed (int): Amount of pongs missed in a row before the client is evicted.
+        """
+        self.interval = interval
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.max_missed = max_missed
+        self.watched: Dict[WebSocket, Liveness] = {}
+        self._send_ping: Optional[Callable[[Liveness], Awaitable[bool]]] = None
+        self._evict: Optional[Callable[[Liveness], Awaitable[None]]] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    def start(
+        self,
+        send_ping: Callable[[Liveness], Awaitable[bool]],
+        evict: Callable[[Liveness], Awaitable[None]],
+    ) -> None:
+        """
+        Starts checking the watched connections.
+
+        Args:
+            send_ping (Callable[[Liveness], Awaitable[bool]]): Queues a ping frame with
+                the current `ping_id`, returns False if it was not accepted.
+            evict (Callable[[Liveness], Awaitable[None]]): Disconnects an unresponsive client.
+        """
+        self._send_ping = send_ping
+        self._evict = evict
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def stop(self) -> None:
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            try:
+                await self._monitor_task
+            except asyncio.CancelledError:
+                pass
+
+    def watch(self, client_id: str, connection: OutboundConnection) -> None:
+        self.watched[connection.websocket] = Liveness(client_id, connection)
+
+    def unwatch(self, websocket: WebSocket) -> None:
+        self.watched.pop(websocket, None)
+
+    def received(self, websocket: WebSocket) -> None:
+        """
+        Marks the client of the socket alive, called for every received frame.
+        """
+        if liveness := self.watched.get(websocket):
+            liveness.last_received = time.monotonic()
+            liveness.missed = 0
+
+    def pong(self, websocket: WebSocket, ping_id: Optional[str]) -> None:
+        """
+        Measures the round trip of the answered ping, stale pongs are ignored.
+        """
+        liveness = self.watched.get(websocket)
+        if not liveness or not ping_id or ping_id != liveness.ping_id:
+            return
+        liveness.observe_rtt(time.monotonic() - liveness.ping_sent_at)
+        liveness.ping_id = liveness.ping_sent_at = None
+
+    def round_trip_times(self) -> Iterator[Tuple[Liveness, float]]:
+        """
+        Yields the smoothed round trip time of every connection with a measured one.
+        """
+        for liveness in self.watched.values():
+            if liveness.srtt is not None:
+                yield liveness, liveness.srtt
+
+    async def _monitor(self) -> None:
+        # checked often enough to notice the shortest possible timeout in time
+        period = min(self.interval, self.min_timeout)
+        while True:
+            await asyncio.sleep(period)
+            now = time.monotonic()
+            for liveness in list(self.watched.values()):
+                try:
+                    await self._check(liveness, now)
+                except Exception:
+                    logging.exception(
+                        f"Failed to check heartbeat of {liveness.client_id}"
+                    )
+
+    async def _check(self, liveness: Liveness, now: float) -> None:
+        if liveness.ping_sent_at is None:
+            if now - liveness.last_received >= self.interval:
+                await self._ping(liveness, now)
+            return
+
+        waited = now - liveness.ping_sent_at
+        if liveness.last_received > liveness.ping_sent_at:
+            # alive, the pong is only delayed; give up on it to measure again later
+            if waited > self.max_timeout:
+                liveness.ping_id = liveness.ping_sent_at = None
+            return
+        if waited <= liveness.timeout(self.min_timeout, self.max_timeout):
+            return
+
+        liveness.missed += 1
+        if liveness.missed >= self.max_missed:
+            self.unwatch(liveness.connection.websocket)
+            await self._evict(liveness)
+        else:
+            await self._ping(liveness, now)
+
+    async def _ping(self, liveness: Liveness, now: float) -> None:
+        liveness.ping_id = uuid4().hex
+        liveness.ping_sent_at = now
+        if not await self._send_ping(liveness):
+            liveness.ping_id = liveness.ping_sent_at = None
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from typing import List, Optional
+
+# Separates the caller, the invoked agent and the session in invoke session client IDs
+INVOKE_SESSION_SEPARATOR = ":"
+
+
+def admission_key(client_id: str) -> str:
+    """
+    Returns the key a client is rate limited by. Invoke sessions
+    (`<caller>:<agent>:<session>`) are limited together with their caller, as
+    `session.send` opens a new session for every invocation.
+    """
+    if client_id.count(INVOKE_SESSION_SEPARATOR) < 2:
+        return client_id
+    return client_id.rsplit(INVOKE_SESSION_SEPARATOR, 2)[0]
+
+
+class RateLimiter:
+    """
+    Token buckets of one rate limit keyed by client. Buckets are refilled lazily
+    when they are accessed, so a check costs O(1) and idle clients cost nothing
+    but their entry; the least recently used entries are dropped past `max_keys`.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100_000):
+        """
+        Args:
+            rate (float): Tokens added per second, 0 disables the limit.
+            burst (int): Capacity of a bucket.
+            max_keys (int): Maximum amount of buckets kept.
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_keys = max_keys
+        # key -> [tokens, last refill time]
+        self._buckets: OrderedDict[str, List[float]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def retry_after(self, key: str, now: float) -> float:
+        """
+        Seconds until the bucket of the key has a token, 0 if it has one now.
+        """
+        tokens = self._refill(key, now)[0]
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def consume(self, key: str, now: float) -> None:
+        self._refill(key, now)[0] -= 1
+
+    def _refill(self, key: str, now: float) -> List[float]:
+        if bucket := self._buckets.get(key):
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+            return bucket
+
+        bucket = self._buckets[key] = [float(self.burst), now]
+        if len(self._buckets) > self.max_keys:
+            # the least recently used bucket is the fullest, dropping it barely matters
+            self._buckets.popitem(last=False)
+        return bucket
+
+
+class AdmissionController:
+    """
+    Admits invocations by a token bucket rate limit and a maximum of invocations
+    in flight, each per caller and per invoked agent.
+    """
+
+    def __init__(
+        self,
+        caller_rate: float,
+        caller_burst: int,
+        caller_max_in_flight: int,
+        agent_rate: float,
+        agent_burst: int,
+        agent_max_in_flight: int,
+        in_flight_retry_after: float,
+    ):
+        """
+        Args:
+            caller_rate (float): Invocations per second a caller may send, 0 for no limit.
+            caller_burst (int): Invocations a caller may send at once.
+            caller_max_in_flight (int): Unanswered invocations per caller, 0 for no limit.
+            agent_rate (float): Invocations per second an agent receives, 0 for no limit.
+            agent_burst (int): Invocations an agent receives at once.
+            agent_max_in_flight (int): Unanswered invocations per agent, 0 for no limit.
+            in_flight_retry_after (float): Retry hint for invocations rejected by an
+                in-flight limit, in seconds.
+        """
+        self.callers = RateLimiter(caller_rate, caller_burst)
+        self.agents = RateLimiter(agent_rate, agent_burst)
+        self.caller_max_in_flight = caller_max_in_flight
+        self.agent_max_in_flight = agent_max_in_flight
+        self.in_flight_retry_after = in_flight_retry_after
+
+    def admit(
+        self,
+        caller_key: Optional[str],
+        agent_id: str,
+        caller_in_flight: int,
+        agent_in_flight: int,
+        now: float,
+    ) -> Optional[float]:
+        """
+        Checks all limits and takes a token from both buckets if the invocation is admitted.
+
+        Args:
+            caller_key (Optional[str]): The admission key of the caller, None for callers
+                exempt from caller limits.
+            agent_id (str): The invoked agent.
+            caller_in_flight (int): Unanswered invocations of the caller.
+            agent_in_flight (int): Unanswered invocations of the agent.
+            now (float): The current monotonic time.
+
+        Returns:
+            Optional[float]: None if admitted, otherwise seconds to wait before retrying.
+        """
+        if (
+            caller_key is not None
+            and self.caller_max_in_flight
+            and caller_in_flight >= self.caller_max_in_flight
+        ) or (self.agent_max_in_flight and agent_in_flight >= self.agent_max_in_flight):
+            return self.in_flight_retry_after
+
+        limited = []
+        if caller_key is not None and self.callers.enabled:
+            limited.append((self.callers, caller_key))
+        if self.agents.enabled:
+            limited.append((self.agents, agent_id))
+
+        retry_after = max(
+            (limiter.retry_after(key, now) for limiter, key in limited), default=0.0
+        )
+        if retry_after:
+            return retry_after
+        for limiter, key in limited:
+            limiter.consume(key, now)
+        return None
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Set
+
+
+class LogBatcher:
+    """
+    Coalesces log entries per destination and flushes them as one batch when the
+    batch is full or the oldest entry has waited for `max_delay` seconds.
+    Only log traffic goes through the batcher, invocations are never delayed by it.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[str, List[dict]], Awaitable[None]],
+        max_batch_size: int,
+        max_delay: float,
+    ):
+        """
+        Args:
+            flush (Callable[[str, List[dict]], Awaitable[None]]): Sends a batch of
+                entries to the destination.
+            max_batch_size (int): Amount of entries flushed at once at most.
+            max_delay (float): How long an entry waits for more entries in seconds.
+        """
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._flush = flush
+        self._buffers: Dict[str, List[dict]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    async def add(self, destination: str, entry: dict) -> None:
+        """
+        Buffers a log entry for the destination.
+        """
+        buffer = self._buffers.setdefault(destination, [])
+        buffer.append(entry)
+        if len(buffer) >= self.max_batch_size:
+            await self.flush(destination)
+        elif destination not in self._timers:
+            self._timers[destination] = asyncio.get_running_loop().call_later(
+                self.max_delay, self._schedule_flush, destination
+            )
+
+    async def flush(self, destination: str) -> None:
+        """
+        Sends all buffered entries of the destination right away.
+        """
+        if timer := self._timers.pop(destination, None):
+            timer.cancel()
+        if not (entries := self._buffers.pop(destination, None)):
+            return
+        try:
+            await self._flush(destination, entries)
+        except Exception:
+            logging.exception(f"Failed to flush {len(entries)} logs to {destination}")
+
+    async def stop(self) -> None:
+        """
+        Flushes all buffered entries.
+        """
+        for destination in list(self._buffers):
+            await self.flush(destination)
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+
+    def _schedule_flush(self, destination: str) -> None:
+        self._timers.pop(destination, None)
+        task = asyncio.create_task(self.flush(destination))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from fastapi import WebSocket
+from utils.enums import (
+    ConnectionClass,
+    EnqueueResult,
+    OverflowPolicy,
+    TrafficClass,
+    WSMessageType,
+)
+from utils.metrics import RouterMetrics
+
+TRAFFIC_CLASSES = {
+    WSMessageType.AGENT_RESPONSE.value: TrafficClass.RESPONSE,
+    WSMessageType.AGENT_ERROR.value: TrafficClass.RESPONSE,
+    # heartbeats jump the queue, so their round trip reflects the link, not the backlog
+    WSMessageType.ROUTER_PING.value: TrafficClass.RESPONSE,
+    # partial answers of the master agent the user is waiting for
+    WSMessageType.AGENT_PROGRESS.value: TrafficClass.RESPONSE,
+    WSMessageType.AGENT_INVOKE.value: TrafficClass.INVOKE,
+    WSMessageType.ML_INVOKE.value: TrafficClass.INVOKE,
+    WSMessageType.AGENT_REGISTER.value: TrafficClass.CONTROL,
+    WSMessageType.AGENT_UNREGISTER.value: TrafficClass.CONTROL,
+    WSMessageType.AGENT_LOG.value: TrafficClass.TELEMETRY,
+}
+
+# Frames a lane may write per scheduling round while other lanes are waiting,
+# so lower classes are slowed down but never starved
+TRAFFIC_CLASS_WEIGHTS = {
+    TrafficClass.RESPONSE: 8,
+    TrafficClass.INVOKE: 4,
+    TrafficClass.CONTROL: 2,
+    TrafficClass.TELEMETRY: 1,
+}
+
+
+class OutboundConnection:
+    """
+    Outbound side of a single WebSocket connection.
+
+    Frames are put into bounded per-traffic-class lanes and written to the socket by
+    a dedicated writer task, so a slow or stalled consumer never blocks the receive
+    loop of the client that is sending to it. The writer serves the lanes by weighted
+    round-robin in priority order, so responses never wait behind a burst of logs.
+    When the queue is full the overflow policy of the frame's message type decides
+    whether the frame is dropped, rejected or waits for free space.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        websocket: WebSocket,
+        max_queue_size: int,
+        overflow_policies: Dict[Optional[str], OverflowPolicy],
+        block_timeout: float,
+        accepts_envelope: bool = False,
+        connection_class: ConnectionClass = ConnectionClass.AGENT,
+        metrics: Optional[RouterMetrics] = None,
+    ):
+        """
+        Args:
+            client_id (str): The ID of the client owning the connection.
+            websocket (WebSocket): The accepted WebSocket connection.
+            max_queue_size (int): Maximum amount of frames waiting to be written in all lanes.
+            overflow_policies (Dict[Optional[str], OverflowPolicy]): Overflow policy per
+                message type, the `None` key holds the policy for all other frames.
+            block_timeout (float): How long a frame with `BLOCK` policy waits for free
+                space before it is dropped.
+            accepts_envelope (bool): Whether the client reads envelope frames, other
+                clients receive them converted to regular JSON.
+            connection_class (ConnectionClass): Kind of the client, reported in metrics.
+            metrics (Optional[RouterMetrics]): Receives the per-traffic-class counters.
+        """
+        self.client_id = client_id
+        self.websocket = websocket
+        self.max_queue_size = max_queue_size
+        self.overflow_policies = overflow_policies
+        self.block_timeout = block_timeout
+        self.accepts_envelope = accepts_envelope
+        self.connection_class = connection_class
+        self.metrics = metrics
+
+        self.dropped = 0
+        self.rejected = 0
+        self.outstanding = 0  # invocations sent to the client and not answered yet
+        self.closed = False
+
+        # (message type, frame, enqueue time) per traffic class in priority order
+        self._lanes: Dict[TrafficClass, Deque[Tuple[Optional[str], str, float]]] = {
+            traffic_class: deque() for traffic_class in TrafficClass
+        }
+        self._credits = dict(TRAFFIC_CLASS_WEIGHTS)
+        self._size = 0
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._writer_task: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        """
+        Amount of frames waiting to be written to the socket.
+        """
+        return self._size
+
+    def lane_depths(self) -> Dict[TrafficClass, int]:
+        """
+        Amount of frames waiting to be written per traffic class.
+        """
+        return {traffic_class: len(lane) for traffic_class, lane in self._lanes.items()}
+
+    def start(self) -> None:
+        """
+        Starts the writer task of the connection.
+        """
+        self._writer_task = asyncio.create_task(self._writer())
+
+    async def close(self) -> None:
+        """
+        Stops the writer task and discards frames that were not written yet.
+        """
+        self.closed = True
+        self._clear()
+        if self._writer_task:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+
+    async def enqueue(
+        self, message: str, message_type: Optional[str] = None
+    ) -> EnqueueResult:
+        """
+        Puts a frame into the lane of its traffic class, applying the overflow policy
+        if the queue is full.
+
+        Args:
+            message (str): Serialized frame.
+            message_type (Optional[str]): Type of the frame, selects the traffic class
+                and the overflow policy. Untyped frames are errors answering the
+                sender and share the lane of responses.
+
+        Returns:
+            EnqueueResult: Whether the frame was accepted, dropped or rejected.
+        """
+        if self.closed:
+            return EnqueueResult.DROPPED
+
+        traffic_class = TRAFFIC_CLASSES.get(message_type, TrafficClass.RESPONSE)
+        if self._size >= self.max_queue_size and not self._evict_log():
+            policy = self.overflow_policies.get(
+                message_type, self.overflow_policies[None]
+            )
+            if policy == OverflowPolicy.REJECT:
+                self.rejected += 1
+                self._count_dropped(traffic_class)
+                return EnqueueResult.REJECTED
+            if policy == OverflowPolicy.DROP or not await self._wait_not_full():
+                self.dropped += 1
+                self._count_dropped(traffic_class)
+                logging.warning(
+                    f"Send queue of {self.client_id} is full, dropping {message_type} frame"
+                )
+                return EnqueueResult.DROPPED
+
+        self._lanes[traffic_class].append((message_type, message, time.monotonic()))
+        self._size += 1
+        if self._size >= self.max_queue_size:
+            self._not_full.clear()
+        self._not_empty.set()
+        return EnqueueResult.ACCEPTED
+
+    def _evict_log(self) -> bool:
+        """
+        Drops the oldest queued log frame to make space for the incoming frame.
+
+        Returns:
+            bool: True if a log frame was evicted.
+        """
+        if not (lane := self._lanes[TrafficClass.TELEMETRY]):
+            return False
+        lane.popleft()
+        self._size -= 1
+        self.dropped += 1
+        self._count_dropped(TrafficClass.TELEMETRY)
+        return True
+
+    def _count_dropped(self, traffic_class: TrafficClass) -> None:
+        if self.metrics:
+            self.metrics.frames_dropped.inc(traffic_class.value)
+
+    def _clear(self) -> None:
+        for lane in self._lanes.values():
+            lane.clear()
+        self._size = 0
+
+    async def _wait_not_full(self) -> bool:
+        """
+        Waits until the writer frees up space in the queue.
+
+        Returns:
+            bool: False if the queue stayed full for `block_timeout` seconds.
+        """
+        while self._size >= self.max_queue_size:
+            self._not_full.clear()
+            try:
+                await asyncio.wait_for(self._not_full.wait(), self.block_timeout)
+            except asyncio.TimeoutError:
+                return False
+            if self.closed:
+                return False
+        return True
+
+    def _next_frame(self) -> Tuple[TrafficClass, Tuple[Optional[str], str, float]]:
+        """
+        Picks the next frame by weighted round-robin: the highest priority waiting lane
+        with credits left is served, credits are refilled once no waiting lane has any.
+        Must only be called when at least one lane is not empty.
+        """
+        for refill in (False, True):
+            if refill:
+                self._credits = dict(TRAFFIC_CLASS_WEIGHTS)
+            for traffic_class, lane in self._lanes.items():
+                if lane and self._credits[traffic_class] > 0:
+                    self._credits[traffic_class] -= 1
+                    return traffic_class, lane.popleft()
+        raise RuntimeError("All send lanes are empty")
+
+    async def _writer(self) -> None:
+        """
+        Writes queued frames to the socket one by one, lanes are served by weight
+        and each lane in FIFO order.
+        """
+        while True:
+            if not self._size:
+                self._not_empty.clear()
+                await self._not_empty.wait()
+                continue
+
+            traffic_class, (_, message, enqueued_at) = self._next_frame()
+            self._size -= 1
+            self._not_full.set()
+            try:
+                await self.websocket.send_text(message)
+            except Exception:
+                # the receive loop notices the disconnect and cleans the connection up
+                logging.warning(f"Failed to write to {self.client_id}, stopping writer")
+                self.closed = True
+                self._clear()
+                return
+
+            if self.metrics:
+                self.metrics.frames_written.inc(traffic_class.value)
+                self.metrics.queue_wait.observe(
+                    time.monotonic() - enqueued_at, traffic_class.value
+                )
@@ -0,0 +1,82 @@
+import itertools
+import random
+from typing import List, Optional
+
+from connectors.outbound import OutboundConnection
+from fastapi import WebSocket
+from utils.enums import BalancingPolicy
+
+
+class ReplicaPool:
+    """
+    All connections sharing one client ID, e.g. several processes started with the
+    same agent JWT. Invocations are spread across the live replicas according to the
+    balancing policy; the client stays registered while at least one replica is alive.
+    """
+
+    def __init__(self, client_id: str, policy: BalancingPolicy):
+        """
+        Args:
+            client_id (str): The client ID shared by all replicas.
+            policy (BalancingPolicy): How a replica is picked for every frame.
+        """
+        self.client_id = client_id
+        self.policy = policy
+        self.replicas: List[OutboundConnection] = []
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def add(self, connection: OutboundConnection) -> None:
+        self.replicas.append(connection)
+
+    def remove(self, websocket: WebSocket) -> Optional[OutboundConnection]:
+        """
+        Removes the replica served by the given socket.
+
+        Returns:
+            Optional[OutboundConnection]: The removed replica, None if it is unknown.
+        """
+        if connection := self.get(websocket):
+            self.replicas.remove(connection)
+        return connection
+
+    def get(self, websocket: WebSocket) -> Optional[OutboundConnection]:
+        """
+        Returns the replica served by the given socket.
+        """
+        for connection in self.replicas:
+            if connection.websocket is websocket:
+                return connection
+        return None
+
+    def pick(self) -> Optional[OutboundConnection]:
+        """
+        Picks a live replica according to the balancing policy.
+
+        Returns:
+            Optional[OutboundConnection]: None if no replica is alive.
+        """
+        live = [connection for connection in self.replicas if not connection.closed]
+        if len(live) <= 1:
+            return live[0] if live else None
+
+        if self.policy == BalancingPolicy.LEAST_OUTSTANDING:
+            return min(live, key=lambda connection: connection.outstanding)
+        if self.policy == BalancingPolicy.POWER_OF_TWO:
+            first, second = random.sample(live, 2)
+            return first if first.outstanding <= second.outstanding else second
+        return live[next(self._counter) % len(live)]
+
+    @property
+    def depth(self) -> int:
+        return sum(connection.depth for connection in self.replicas)
+
+    @property
+    def dropped(self) -> int:
+        return sum(connection.dropped for connection in self.replicas)
+
+    @property
+    def rejected(self) -> int:
+        return sum(connection.rejected for connection in self.replicas)
@@ -0,0 +1,440 @@
+import asyncio
+import json
+import logging
+import struct
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from settings import Settings, get_settings
+
+ForwardHandler = Callable[[str, str], Awaitable[None]]
+
+
+class PresenceRegistry(ABC):
+    """
+    Shared presence registry used when several router nodes run side by side.
+
+    Every node records which `client_id`s it owns, so that a node that does not hold
+    the target websocket can look up the owner and forward the raw frame to it.
+    """
+
+    def __init__(self, node_id: str):
+        """
+        Args:
+            node_id (str): Unique identifier of the current router node.
+        """
+        self.node_id = node_id
+        self._on_forward: Optional[ForwardHandler] = None
+
+    async def start(self, on_forward: ForwardHandler) -> None:
+        """
+        Starts listening for frames forwarded to the current node.
+
+        Args:
+            on_forward (ForwardHandler): Coroutine called with (client_id, message)
+                for every frame forwarded by another node.
+        """
+        self._on_forward = on_forward
+
+    async def stop(self) -> None:
+        """
+        Stops listening for forwarded frames and releases all owned client ids.
+        """
+        self._on_forward = None
+
+    @abstractmethod
+    async def register(self, client_id: str) -> None:
+        """
+        Marks the current node as the owner of `client_id`.
+        """
+
+    @abstractmethod
+    async def unregister(self, client_id: str) -> None:
+        """
+        Removes `client_id` from the registry if it is still owned by the current node.
+        """
+
+    @abstractmethod
+    async def lookup(self, client_id: str) -> Optional[str]:
+        """
+        Returns the id of the node owning `client_id` or None if it is not connected.
+        """
+
+    @abstractmethod
+    async def forward(self, node_id: str, client_id: str, message: str) -> None:
+        """
+        Forwards an already serialized frame to `client_id` connected to `node_id`.
+        """
+
+
+class InMemoryClusterHub:
+    """
+    Process-local stand-in for the shared storage and message bus of a cluster.
+    Several `InMemoryPresenceRegistry` instances sharing one hub behave like router
+    nodes connected to the same Redis.
+    """
+
+    def __init__(self):
+        self.presence: Dict[str, str] = {}
+        self.nodes: Dict[str, ForwardHandler] = {}
+
+
+class InMemoryPresenceRegistry(PresenceRegistry):
+    """
+    Presence registry backed by an `InMemoryClusterHub`, meant for tests and
+    single-process deployments.
+    """
+
+    def __init__(self, node_id: str, hub: Optional[InMemoryClusterHub] = None):
+        super().__init__(node_id=node_id)
+        self.hub = hub or InMemoryClusterHub()
+
+    async def start(self, on_forward: ForwardHandler) -> None:
+        await super().start(on_forward)
+        self.hub.nodes[self.node_id] = on_forward
+
+    async def stop(self) -> None:
+        self.hub.nodes.pop(self.node_id, None)
+        for client_id, node_id in list(self.hub.presence.items()):
+            if node_id == self.node_id:
+                del self.hub.presence[client_id]
+        await super().stop()
+
+    async def register(self, client_id: str) -> None:
+        self.hub.presence[client_id] = self.node_id
+
+    async def unregister(self, client_id: str) -> None:
+        if self.hub.presence.get(client_id) == self.node_id:
+            del self.hub.presence[client_id]
+
+    async def lookup(self, client_id: str) -> Optional[str]:
+        return self.hub.presence.get(client_id)
+
+    async def forward(self, node_id: str, client_id: str, message: str) -> None:
+        if on_forward := self.hub.nodes.get(node_id):
+            await on_forward(client_id, message)
+        else:
+            logging.warning(f"Router node {node_id} is not reachable")
+
+
+class RedisPresenceRegistry(PresenceRegistry):
+    """
+    Presence registry backed by Redis.
+
+    Ownership is stored as `<prefix>:presence:<client_id>` keys with a TTL that is
+    refreshed by the owning node, so entries of a crashed node expire on their own
+    while agents connected to the surviving nodes keep their sockets.
+    Frames are forwarded through a per-node pub/sub channel.
+    """
+
+    # Deletes the presence key only if it still points to the current node
+    _UNREGISTER_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(
+        self,
+        node_id: str,
+        redis_uri: str,
+        ttl_seconds: int = 30,
+        key_prefix: str = "genai:router",
+    ):
+        super().__init__(node_id=node_id)
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError(
+                "Redis cluster backend requires the 'redis' package. "
+                "Install the router with the 'cluster' extra."
+            ) from e
+
+        self.redis = aioredis.from_url(redis_uri, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self._owned: Set[str] = set()
+        self._pubsub = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _presence_key(self, client_id: str) -> str:
+        return f"{self.key_prefix}:presence:{client_id}"
+
+    def _node_channel(self, node_id: str) -> str:
+        return f"{self.key_prefix}:node:{node_id}"
+
+    async def start(self, on_forward: ForwardHandler) -> None:
+        await super().start(on_forward)
+        self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self._node_channel(self.node_id))
+        self._listener_task = asyncio.create_task(self._listen())
+        self._refresh_task = asyncio.create_task(self._refresh_presence())
+
+    async def stop(self) -> None:
+        for task in (self._listener_task, self._refresh_task):
+            if task:
+                task.cancel()
+        if self._pubsub:
+            await self._pubsub.unsubscribe()
+            await self._pubsub.aclose()
+        for client_id in list(self._owned):
+            await self.unregister(client_id)
+        await self.redis.aclose()
+        await super().stop()
+
+    async def _listen(self) -> None:
+        async for item in self._pubsub.listen():
+            client_id, _, message = item["data"].partition("\n")
+            if self._on_forward:
+                try:
+                    await self._on_forward(client_id, message)
+                except Exception:
+                    logging.exception(
+                        f"Failed to deliver forwarded frame to {client_id}"
+                    )
+
+    async def _refresh_presence(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            if not self._owned:
+                continue
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for client_id in self._owned:
+                    pipe.set(
+                        self._presence_key(client_id), self.node_id, ex=self.ttl_seconds
+                    )
+                await pipe.execute()
+
+    async def register(self, client_id: str) -> None:
+        self._owned.add(client_id)
+        await self.redis.set(
+            self._presence_key(client_id), self.node_id, ex=self.ttl_seconds
+        )
+
+    async def unregister(self, client_id: str) -> None:
+        self._owned.discard(client_id)
+        await self.redis.eval(
+            self._UNREGISTER_SCRIPT, 1, self._presence_key(client_id), self.node_id
+        )
+
+    async def lookup(self, client_id: str) -> Optional[str]:
+        return await self.redis.get(self._presence_key(client_id))
+
+    async def forward(self, node_id: str, client_id: str, message: str) -> None:
+        # client ids never contain a newline, so the frame is sent as-is after it
+        await self.redis.publish(self._node_channel(node_id), f"{client_id}\n{message}")
+
+
+# Frames between the hub and workers are JSON objects prefixed by their length
+_FRAME_HEADER = struct.Struct("!I")
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Optional[dict]:
+    try:
+        header = await reader.readexactly(_FRAME_HEADER.size)
+        return json.loads(await reader.readexactly(_FRAME_HEADER.unpack(header)[0]))
+    except asyncio.IncompleteReadError:
+        return None
+
+
+async def _write_frame(writer: asyncio.StreamWriter, frame: dict) -> None:
+    data = json.dumps(frame).encode()
+    writer.write(_FRAME_HEADER.pack(len(data)) + data)
+    await writer.drain()
+
+
+class LocalClusterHub:
+    """
+    Presence table and message bus shared by the worker processes of one router
+    instance, served over a Unix socket by the supervising process (see `serve.py`).
+
+    Presence changes are broadcast to all workers, so every worker keeps a replica
+    of the table and lookups never leave the worker; only forwarded frames pass
+    through the hub. Presence of a worker that exits is released right away.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Path of the Unix socket workers connect to.
+        """
+        self.path = path
+        self.presence: Dict[str, str] = {}
+        self.nodes: Dict[str, asyncio.StreamWriter] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _broadcast(self, client_id: str, node_id: Optional[str]) -> None:
+        frame = {"op": "presence", "client_id": client_id, "node_id": node_id}
+        for writer in list(self.nodes.values()):
+            try:
+                await _write_frame(writer, frame)
+            except ConnectionError:
+                pass  # the worker is gone, its own connection handler cleans up
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        node_id = None
+        try:
+            while frame := await _read_frame(reader):
+                op = frame["op"]
+                if op == "hello":
+                    node_id = frame["node_id"]
+                    self.nodes[node_id] = writer
+                    for client_id, owner in list(self.presence.items()):
+                        await _write_frame(
+                            writer,
+                            {
+                                "op": "presence",
+                                "client_id": client_id,
+                                "node_id": owner,
+                            },
+                        )
+                elif op == "register":
+                    self.presence[frame["client_id"]] = node_id
+                    await self._broadcast(frame["client_id"], node_id)
+                elif op == "unregister":
+                    if self.presence.get(frame["client_id"]) == node_id:
+                        del self.presence[frame["client_id"]]
+                        await self._broadcast(frame["client_id"], None)
+                elif op == "forward":
+                    if target := self.nodes.get(frame["node_id"]):
+                        await _write_frame(
+                            target,
+                            {
+                                "op": "forward",
+                                "client_id": frame["client_id"],
+                                "message": frame["message"],
+                            },
+                        )
+                    else:
+                        logging.warning(
+                            f"Router worker {frame['node_id']} is not reachable"
+                        )
+        except ConnectionError:
+            pass
+        finally:
+            if node_id and self.nodes.get(node_id) is writer:
+                del self.nodes[node_id]
+                for client_id, owner in list(self.presence.items()):
+                    if owner == node_id:
+                        del self.presence[client_id]
+                        await self._broadcast(client_id, None)
+            writer.close()
+
+
+class LocalPresenceRegistry(PresenceRegistry):
+    """
+    Presence registry of a worker process connected to the `LocalClusterHub` of its
+    supervisor. Lookups are answered from the local replica of the presence table.
+    """
+
+    def __init__(self, node_id: str, path: str, connect_timeout: float = 10.0):
+        """
+        Args:
+            node_id (str): Unique identifier of the worker.
+            path (str): Path of the Unix socket of the hub.
+            connect_timeout (float): How long to wait for the hub to come up.
+        """
+        super().__init__(node_id=node_id)
+        self.path = path
+        self.connect_timeout = connect_timeout
+        self.presence: Dict[str, str] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._listener_task: Optional[asyncio.Task] = None
+
+    async def start(self, on_forward: ForwardHandler) -> None:
+        await super().start(on_forward)
+        deadline = asyncio.get_running_loop().time() + self.connect_timeout
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path)
+                break
+            except (FileNotFoundError, ConnectionError):
+                if asyncio.get_running_loop().time() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+        await _write_frame(self._writer, {"op": "hello", "node_id": self.node_id})
+        self._listener_task = asyncio.create_task(self._listen(reader))
+
+    async def stop(self) -> None:
+        if self._listener_task:
+            self._listener_task.cancel()
+        if self._writer:
+            self._writer.close()  # the hub releases the presence of this worker
+        await super().stop()
+
+    async def _listen(self, reader: asyncio.StreamReader) -> None:
+        while frame := await _read_frame(reader):
+            if frame["op"] == "presence":
+                if frame["node_id"]:
+                    self.presence[frame["client_id"]] = frame["node_id"]
+                else:
+                    self.presence.pop(frame["client_id"], None)
+            elif frame["op"] == "forward" and self._on_forward:
+                try:
+                    await self._on_forward(frame["client_id"], frame["message"])
+                except Exception:
+                    logging.exception(
+                        f"Failed to deliver forwarded frame to {frame['client_id']}"
+                    )
+        logging.error("Connection to the router cluster hub was lost")
+
+    async def register(self, client_id: str) -> None:
+        self.presence[client_id] = self.node_id
+        await _write_frame(self._writer, {"op": "register", "client_id": client_id})
+
+    async def unregister(self, client_id: str) -> None:
+        if self.presence.get(client_id) == self.node_id:
+            del self.presence[client_id]
+        await _write_frame(self._writer, {"op": "unregister", "client_id": client_id})
+
+    async def lookup(self, client_id: str) -> Optional[str]:
+        return self.presence.get(client_id)
+
+    async def forward(self, node_id: str, client_id: str, message: str) -> None:
+        await _write_frame(
+            self._writer,
+            {
+                "op": "forward",
+                "node_id": node_id,
+                "client_id": client_id,
+                "message": message,
+            },
+        )
+
+
+def get_presence_registry(
+    settings: Optional[Settings] = None,
+) -> Optional[PresenceRegistry]:
+    """
+    Builds the presence registry configured for the current node.
+
+    Returns:
+        Optional[PresenceRegistry]: None if cluster mode is disabled.
+    """
+    settings = settings or get_settings()
+    if not settings.ROUTER_CLUSTER_MODE:
+        return None
+
+    if settings.ROUTER_CLUSTER_BACKEND == "redis":
+        return RedisPresenceRegistry(
+            node_id=settings.ROUTER_NODE_ID,
+            redis_uri=settings.ROUTER_REDIS_URI,
+            ttl_seconds=settings.ROUTER_PRESENCE_TTL_SECONDS,
+        )
+    if settings.ROUTER_CLUSTER_BACKEND == "local":
+        return LocalPresenceRegistry(
+            node_id=settings.ROUTER_NODE_ID, path=settings.ROUTER_CLUSTER_HUB_PATH
+        )
+    return InMemoryPresenceRegistry(node_id=settings.ROUTER_NODE_ID)
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+
+@dataclass
+class HeldAgent:
+    agent_id: str
+    timer: asyncio.TimerHandle
+    # (request ID, frame) of invocations waiting for the agent to reconnect
+    frames: Deque[Tuple[str, str]] = field(default_factory=deque)
+
+
+class ReplayBuffer:
+    """
+    Holds invocations of agents that disconnected moments ago. For a grace period
+    the agent is treated as connected: its invocations are buffered and delivered
+    once it reconnects with the same identity. When the grace period passes without
+    a reconnect, the agent is released and the buffered invocations are failed.
+    """
+
+    def __init__(
+        self,
+        grace_seconds: float,
+        max_frames: int,
+        on_expire: Callable[[str, List[Tuple[str, str]]], Awaitable[None]],
+    ):
+        """
+        Args:
+            grace_seconds (float): How long a disconnected agent is waited for, 0 disables it.
+            max_frames (int): Maximum amount of invocations held per agent.
+            on_expire (Callable[[str, List[Tuple[str, str]]], Awaitable[None]]): Called
+                with the agent ID and its held invocations when the grace period passes.
+        """
+        self.grace_seconds = grace_seconds
+        self.max_frames = max_frames
+        self.held: Dict[str, HeldAgent] = {}
+        self._on_expire = on_expire
+        self._expire_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.grace_seconds > 0
+
+    def __len__(self) -> int:
+        return sum(len(held.frames) for held in self.held.values())
+
+    def is_held(self, agent_id: str) -> bool:
+        return agent_id in self.held
+
+    def hold(self, agent_id: str) -> None:
+        """
+        Starts the grace period of a disconnected agent.
+        """
+        timer = asyncio.get_running_loop().call_later(
+            self.grace_seconds, self._schedule_expire, agent_id
+        )
+        self.held[agent_id] = HeldAgent(agent_id=agent_id, timer=timer)
+
+    def add(self, agent_id: str, request_id: str, frame: str) -> bool:
+        """
+        Buffers an invocation of a held agent.
+
+        Returns:
+            bool: False if the agent is not held or its buffer is full.
+        """
+        if not (held := self.held.get(agent_id)) or len(held.frames) >= self.max_frames:
+            return False
+        held.frames.append((request_id, frame))
+        return True
+
+    def release(self, agent_id: str) -> Optional[List[Tuple[str, str]]]:
+        """
+        Ends the grace period of a reconnected agent.
+
+        Returns:
+            Optional[List[Tuple[str, str]]]: The held invocations in arrival order,
+                None if the agent was not held.
+        """
+        if not (held := self.held.pop(agent_id, None)):
+            return None
+        held.timer.cancel()
+        return list(held.frames)
+
+    async def stop(self) -> None:
+        for held in self.held.values():
+            held.timer.cancel()
+        self.held.clear()
+        if self._expire_tasks:
+            await asyncio.gather(*self._expire_tasks, return_exceptions=True)
+
+    def _schedule_expire(self, agent_id: str) -> None:
+        if not (held := self.held.pop(agent_id, None)):
+            return
+        task = asyncio.create_task(self._expire(agent_id, list(held.frames)))
+        self._expire_tasks.add(task)
+        task.add_done_callback(self._expire_tasks.discard)
+
+    async def _expire(self, agent_id: str, frames: List[Tuple[str, str]]) -> None:
+        try:
+            await self._on_expire(agent_id, frames)
+        except Exception:
+            logging.exception(f"Failed to release disconnected agent {agent_id}")
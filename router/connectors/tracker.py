@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from connectors.outbound import OutboundConnection
+
+# Separates the caller ID from the request ID in the `invoked_by` field echoed by agents
+REQUEST_ID_SEPARATOR = "#"
+
+
+@dataclass
+class Invocation:
+    request_id: str
+    caller_id: str
+    agent_id: str
+    deadline: float
+    replica: Optional[OutboundConnection] = None
+    # resolved with the response instead of sending it, for callers awaiting in-process
+    future: Optional[asyncio.Future] = None
+    # key the caller is limited by, shared by all invoke sessions of one caller
+    caller_key: Optional[str] = None
+    created_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def invoked_by(self) -> str:
+        """
+        Value sent to the agent as `invoked_by`, agents echo it back in their response.
+        """
+        return f"{self.caller_id}{REQUEST_ID_SEPARATOR}{self.request_id}"
+
+
+def split_invoked_by(invoked_by: str) -> Tuple[str, Optional[str]]:
+    """
+    Splits the `invoked_by` field of a response into the caller ID and the request ID.
+
+    Returns:
+        Tuple[str, Optional[str]]: Caller ID and request ID, None for untracked calls.
+    """
+    caller_id, separator, request_id = invoked_by.rpartition(REQUEST_ID_SEPARATOR)
+    if not separator:
+        return invoked_by, None
+    return caller_id, request_id
+
+
+def timeout_until(
+    deadline: Optional[float], timeout: Optional[float] = None
+) -> Optional[float]:
+    """
+    Combines the timeout of an invocation with the deadline of the request it is part
+    of, whichever ends first. Deadlines are absolute (seconds since the epoch), so they
+    can be carried through every hop of a request.
+
+    Returns:
+        Optional[float]: Seconds left, not positive once the deadline has passed,
+            None if neither is set.
+    """
+    if deadline is None:
+        return timeout
+    remaining = float(deadline) - time.time()
+    return remaining if timeout is None else min(remaining, timeout)
+
+
+class InvocationTracker:
+    """
+    Correlation table of invocations forwarded to agents and not answered yet.
+
+    Every invocation gets a request ID and a deadline. Deadlines are kept in a hashed
+    timer wheel, so adding, completing and expiring an invocation are O(1).
+    Secondary indexes by agent and caller allow failing only the affected
+    invocations when a client disconnects.
+    """
+
+    def __init__(
+        self, default_timeout: float, tick_seconds: float = 1.0, wheel_size: int = 512
+    ):
+        """
+        Args:
+            default_timeout (float): Deadline in seconds of invocations without their own.
+            tick_seconds (float): Resolution of the timer wheel.
+            wheel_size (int): Amount of slots in the timer wheel.
+        """
+        self.default_timeout = default_timeout
+        self.tick_seconds = tick_seconds
+        self.pending: Dict[str, Invocation] = {}
+        self.by_agent: Dict[str, Set[str]] = {}
+        self.by_caller: Dict[str, Set[str]] = {}
+        self.in_flight_by_caller_key: Dict[str, int] = {}
+
+        self._wheel: List[Set[str]] = [set() for _ in range(wheel_size)]
+        self._slots: Dict[str, int] = {}
+        self._on_timeout: Optional[Callable[[Invocation], Awaitable[None]]] = None
+        self._sweeper_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def start(self, on_timeout: Callable[[Invocation], Awaitable[None]]) -> None:
+        """
+        Starts sweeping expired invocations.
+
+        Args:
+            on_timeout (Callable[[Invocation], Awaitable[None]]): Called for every
+                invocation whose deadline has passed.
+        """
+        self._on_timeout = on_timeout
+        self._sweeper_task = asyncio.create_task(self._sweep())
+
+    async def stop(self) -> None:
+        if self._sweeper_task:
+            self._sweeper_task.cancel()
+            try:
+                await self._sweeper_task
+            except asyncio.CancelledError:
+                pass
+
+    def add(
+        self,
+        caller_id: str,
+        agent_id: str,
+        replica: Optional[OutboundConnection] = None,
+        timeout: Optional[float] = None,
+        future: Optional[asyncio.Future] = None,
+        caller_key: Optional[str] = None,
+    ) -> Invocation:
+        """
+        Registers a new invocation.
+
+        Args:
+            caller_id (str): The client ID waiting for the response.
+            agent_id (str): The invoked agent.
+            replica (Optional[OutboundConnection]): The replica the invocation is sent to.
+            timeout (Optional[float]): Deadline in seconds, the default one if omitted.
+            future (Optional[asyncio.Future]): Receives the response of an in-process caller.
+            caller_key (Optional[str]): Admission key of the caller, the caller ID if omitted.
+        """
+        invocation = Invocation(
+            request_id=uuid4().hex,
+            caller_id=caller_id,
+            agent_id=agent_id,
+            deadline=time.monotonic() + (timeout or self.default_timeout),
+            replica=replica,
+            future=future,
+            caller_key=caller_key or caller_id,
+        )
+        self.pending[invocation.request_id] = invocation
+        self.by_agent.setdefault(agent_id, set()).add(invocation.request_id)
+        self.by_caller.setdefault(caller_id, set()).add(invocation.request_id)
+        self.in_flight_by_caller_key[invocation.caller_key] = (
+            self.in_flight_by_caller_key.get(invocation.caller_key, 0) + 1
+        )
+
+        slot = int(invocation.deadline / self.tick_seconds) % len(self._wheel)
+        self._wheel[slot].add(invocation.request_id)
+        self._slots[invocation.request_id] = slot
+
+        if replica:
+            replica.outstanding += 1
+        return invocation
+
+    def complete(self, request_id: str) -> Optional[Invocation]:
+        """
+        Removes an invocation from the table.
+
+        Returns:
+            Optional[Invocation]: None if the invocation is unknown or has already expired.
+        """
+        if not (invocation := self.pending.pop(request_id, None)):
+            return None
+
+        self._discard(self.by_agent, invocation.agent_id, request_id)
+        self._discard(self.by_caller, invocation.caller_id, request_id)
+        if in_flight := self.in_flight_by_caller_key.get(invocation.caller_key, 0) - 1:
+            self.in_flight_by_caller_key[invocation.caller_key] = in_flight
+        else:
+            self.in_flight_by_caller_key.pop(invocation.caller_key, None)
+        self._wheel[self._slots.pop(request_id)].discard(request_id)
+
+        if invocation.replica:
+            invocation.replica.outstanding = max(invocation.replica.outstanding - 1, 0)
+        return invocation
+
+    def assign(self, request_id: str, replica: OutboundConnection) -> bool:
+        """
+        Records the replica a held invocation is finally sent to.
+
+        Returns:
+            bool: False if the invocation has already expired or failed.
+        """
+        if not (invocation := self.pending.get(request_id)):
+            return False
+        invocation.replica = replica
+        replica.outstanding += 1
+        return True
+
+    def fail_agent(
+        self, agent_id: str, replica: Optional[OutboundConnection] = None
+    ) -> List[Invocation]:
+        """
+        Removes the invocations sent to a disconnected agent.
+
+        Args:
+            agent_id (str): The disconnected agent.
+            replica (Optional[OutboundConnection]): Only fail invocations sent to this replica.
+        """
+        failed = []
+        for request_id in list(self.by_agent.get(agent_id, ())):
+            invocation = self.pending[request_id]
+            if replica is None or invocation.replica is replica:
+                failed.append(self.complete(request_id))
+        return failed
+
+    def caller_in_flight(self, caller_key: str) -> int:
+        """
+        Amount of unanswered invocations of all sessions of a caller.
+        """
+        return self.in_flight_by_caller_key.get(caller_key, 0)
+
+    def agent_in_flight(self, agent_id: str) -> int:
+        """
+        Amount of unanswered invocations of all replicas of an agent.
+        """
+        return len(self.by_agent.get(agent_id, ()))
+
+    def forget_caller(self, caller_id: str) -> None:
+        """
+        Removes the invocations of a disconnected caller, their responses have no recipient.
+        """
+        for request_id in list(self.by_caller.get(caller_id, ())):
+            self.complete(request_id)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, request_id: str) -> None:
+        if request_ids := index.get(key):
+            request_ids.discard(request_id)
+            if not request_ids:
+                del index[key]
+
+    async def _sweep(self) -> None:
+        """
+        Advances the timer wheel every tick and expires invocations past their deadline.
+        Invocations with a deadline more than one wheel round away stay in their slot.
+        """
+        last_tick = int(time.monotonic() / self.tick_seconds)
+        while True:
+            await asyncio.sleep(self.tick_seconds)
+            now = time.monotonic()
+            current_tick = int(now / self.tick_seconds)
+            # slots skipped while the event loop was busy are swept too; the current
+            # slot is swept again next time as it may get deadlines later than `now`
+            ticks = range(last_tick, current_tick + 1)[-len(self._wheel) :]
+            last_tick = current_tick
+
+            for tick in ticks:
+                for request_id in list(self._wheel[tick % len(self._wheel)]):
+                    invocation = self.pending.get(request_id)
+                    if not invocation or invocation.deadline > now:
+                        continue
+                    self.complete(request_id)
+                    try:
+                        await self._on_timeout(invocation)
+                    except Exception:
+                        logging.exception(
+                            f"Failed to report timeout of request {request_id}"
+                        )
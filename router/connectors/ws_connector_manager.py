@@ -1,15 +1,53 @@
+import asyncio
 import json
 import logging
+import time
 import jwt
+from uuid import uuid4
 
-from typing import Dict
+from typing import AbstractSet, Any, Callable, Dict, List, Optional, Set, Tuple
 
 from fastapi import WebSocket
+from connectors.auth import AgentJWTVerifier
+from connectors.heartbeat import HeartbeatMonitor, Liveness
+from connectors.limiter import AdmissionController, admission_key
+from connectors.log_batcher import LogBatcher
+from connectors.outbound import OutboundConnection
+from connectors.pool import ReplicaPool
+from connectors.replay import ReplayBuffer
+from connectors.registry import PresenceRegistry
+from connectors.tracker import (
+    Invocation,
+    InvocationTracker,
+    split_invoked_by,
+    timeout_until,
+)
 from settings import get_settings
-from utils.enums import WSMessageType, MasterServerName, ErrorType
+from utils.enums import (
+    WSMessageType,
+    MasterServerName,
+    ErrorType,
+    EnqueueResult,
+    ConnectionClass,
+    TrafficClass,
+)
+from utils.envelope import (
+    EnvelopeFormatError,
+    decode_envelope,
+    encode_envelope,
+    envelope_to_json,
+    is_envelope,
+)
+from utils.metrics import RouterMetrics, client_label, log_payload, render_gauge
 
 app_settings = get_settings()
 
+# Caller ID of invocations awaited by the synchronous `/invoke-agent/sync` endpoint
+HTTP_CALLER_ID = "http_invoke"
+
+# Close code of connections evicted after missing heartbeats
+HEARTBEAT_TIMEOUT_CLOSE_CODE = 4001
+
 
 class WSConnectionManager:
     """
@@ -23,26 +61,240 @@ class WSConnectionManager:
         app_settings.MASTER_AGENT_API_KEY: MasterServerName.MASTER_SERVER_ML.value,
     }
 
-    def __init__(self):
+    def __init__(self, registry: Optional[PresenceRegistry] = None):
         """
         Initializes the WebSocket connection manager with an empty active connections dictionary.
+
+        Args:
+            registry (Optional[PresenceRegistry]): Shared presence registry, enables cluster mode
+                where messages for clients connected to other router nodes are forwarded to them.
+        """
+        self.active_connections: Dict[str, ReplicaPool] = {}
+        self.registry = registry
+        # invoke sessions (`session.send`) by the agent they invoke and vice versa
+        self.sessions_by_agent: Dict[str, Set[str]] = {}
+        self.session_agents: Dict[str, str] = {}
+        self.metrics = RouterMetrics()
+        self.jwt_verifier = AgentJWTVerifier(
+            secret_key=app_settings.SECRET_KEY,
+            algorithm=app_settings.HASH_ALGORITHM,
+            cache_size=app_settings.ROUTER_JWT_CACHE_SIZE,
+        )
+        self.log_batcher = LogBatcher(
+            flush=self._send_log_batch,
+            max_batch_size=app_settings.ROUTER_LOG_BATCH_SIZE,
+            max_delay=app_settings.ROUTER_LOG_BATCH_DELAY_SECONDS,
+        )
+        self.tracker = InvocationTracker(
+            default_timeout=app_settings.ROUTER_INVOCATION_TIMEOUT_SECONDS,
+            tick_seconds=app_settings.ROUTER_TIMER_WHEEL_TICK_SECONDS,
+        )
+        self.admission = AdmissionController(
+            caller_rate=app_settings.ROUTER_CALLER_RATE_LIMIT,
+            caller_burst=app_settings.ROUTER_CALLER_BURST,
+            caller_max_in_flight=app_settings.ROUTER_CALLER_MAX_IN_FLIGHT,
+            agent_rate=app_settings.ROUTER_AGENT_RATE_LIMIT,
+            agent_burst=app_settings.ROUTER_AGENT_BURST,
+            agent_max_in_flight=app_settings.ROUTER_AGENT_MAX_IN_FLIGHT,
+            in_flight_retry_after=app_settings.ROUTER_IN_FLIGHT_RETRY_AFTER_SECONDS,
+        )
+        self.replay = ReplayBuffer(
+            grace_seconds=app_settings.ROUTER_RECONNECT_GRACE_SECONDS,
+            max_frames=app_settings.ROUTER_REPLAY_BUFFER_SIZE,
+            on_expire=self._release_held_agent,
+        )
+        self.heartbeat = HeartbeatMonitor(
+            interval=app_settings.ROUTER_HEARTBEAT_INTERVAL_SECONDS,
+            min_timeout=app_settings.ROUTER_HEARTBEAT_MIN_TIMEOUT_SECONDS,
+            max_timeout=app_settings.ROUTER_HEARTBEAT_MAX_TIMEOUT_SECONDS,
+            max_missed=app_settings.ROUTER_HEARTBEAT_MAX_MISSED,
+        )
+        self.overflow_policies = {
+            WSMessageType.AGENT_LOG.value: app_settings.ROUTER_LOG_OVERFLOW_POLICY,
+            WSMessageType.AGENT_INVOKE.value: app_settings.ROUTER_INVOKE_OVERFLOW_POLICY,
+            None: app_settings.ROUTER_DEFAULT_OVERFLOW_POLICY,
+        }
+
+    async def start(self) -> None:
+        """
+        Starts expiring invocations past their deadline, checking heartbeats and
+        receiving frames forwarded by other router nodes (cluster mode only).
+        """
+        self.tracker.start(on_timeout=self._expire_invocation)
+        self.heartbeat.start(send_ping=self._send_ping, evict=self._evict_unresponsive)
+        if self.registry:
+            await self.registry.start(on_forward=self._deliver_local)
+
+    async def stop(self) -> None:
+        """
+        Stops cluster forwarding and releases presence of all local connections.
+        """
+        await self.tracker.stop()
+        await self.heartbeat.stop()
+        await self.replay.stop()
+        await self.log_batcher.stop()
+        if self.registry:
+            await self.registry.stop()
+
+    def queue_depths(self) -> Dict[str, dict]:
+        """
+        Reports the send queue state of every local connection.
+
+        Returns:
+            Dict[str, dict]: Replicas, queue depth, dropped and rejected frames per client,
+                labelled by `client_label` so API keys in client IDs are not exposed.
         """
-        self.active_connections: Dict[str, WebSocket] = {}
+        return {
+            client_label(client_id, pool.replicas[0].connection_class): {
+                "replicas": len(pool),
+                "depth": pool.depth,
+                "dropped": pool.dropped,
+                "rejected": pool.rejected,
+            }
+            for client_id, pool in self.active_connections.items()
+            if pool.replicas
+        }
+
+    def render_metrics(self) -> str:
+        """
+        Renders the router metrics together with the connection and queue gauges.
+
+        Returns:
+            str: Metrics in the Prometheus text exposition format.
+        """
+        connections = {connection_class: 0 for connection_class in ConnectionClass}
+        lane_depths = {traffic_class: 0 for traffic_class in TrafficClass}
+        queue_depths = []
+        for client_id, pool in self.active_connections.items():
+            for replica, connection in enumerate(pool.replicas):
+                connections[connection.connection_class] += 1
+                for traffic_class, depth in connection.lane_depths().items():
+                    lane_depths[traffic_class] += depth
+                label = client_label(client_id, connection.connection_class)
+                queue_depths.append(((label, str(replica)), connection.depth))
+
+        return self.metrics.render(
+            gauges=(
+                render_gauge(
+                    "router_active_connections",
+                    "Connections to this router node by client class.",
+                    ("connection_class",),
+                    (
+                        ((connection_class.value,), count)
+                        for connection_class, count in connections.items()
+                    ),
+                ),
+                render_gauge(
+                    "router_send_queue_depth",
+                    "Frames waiting in the send queue of a connection.",
+                    ("client", "replica"),
+                    queue_depths,
+                ),
+                render_gauge(
+                    "router_send_lane_depth",
+                    "Frames waiting in the send queues of all connections by traffic class.",
+                    ("traffic_class",),
+                    (
+                        ((traffic_class.value,), depth)
+                        for traffic_class, depth in lane_depths.items()
+                    ),
+                ),
+                render_gauge(
+                    "router_pending_invocations",
+                    "Invocations waiting for a response of a local agent.",
+                    (),
+                    (((), len(self.tracker)),),
+                ),
+                render_gauge(
+                    "router_held_invocations",
+                    "Invocations held for agents expected to reconnect.",
+                    (),
+                    (((), len(self.replay)),),
+                ),
+                render_gauge(
+                    "router_client_rtt_seconds",
+                    "Smoothed heartbeat round trip time of a connection.",
+                    ("client", "connection_class"),
+                    (
+                        (
+                            (
+                                client_label(
+                                    liveness.client_id,
+                                    liveness.connection.connection_class,
+                                ),
+                                liveness.connection.connection_class.value,
+                            ),
+                            rtt,
+                        )
+                        for liveness, rtt in self.heartbeat.round_trip_times()
+                    ),
+                ),
+            )
+        )
+
+    async def is_active(self, client_id: str) -> bool:
+        """
+        Checks whether the client is connected to this or, in cluster mode, any other router node.
+
+        Args:
+            client_id (str): The client ID to look up.
+        """
+        if client_id in self.active_connections or self.replay.is_held(client_id):
+            return True
+        if self.registry:
+            return await self.registry.lookup(client_id) is not None
+        return False
 
     async def process_message(
-        self, client_id: str, message: str, agent_jwt: str
+        self,
+        client_id: str,
+        message: str,
+        agent_jwt: str,
+        websocket: Optional[WebSocket] = None,
     ) -> None:
         """
         Processes incoming messages from clients and routes them based on message type.
 
         Args:
             client_id (str): The ID of the client sending the message.
-            message (str): The message content as a JSON string.
+            message (str): The message content as a JSON string or an envelope frame.
+            websocket (Optional[WebSocket]): The socket the message was received on,
+                the frame proves the client behind it is alive.
         """
+        started = time.perf_counter()
+        if websocket is not None:
+            self.heartbeat.received(websocket)
+        message_type = await self._route_message(
+            client_id, message, agent_jwt, websocket
+        )
+        self.metrics.received(message_type, len(message), time.perf_counter() - started)
+
+    async def _route_message(
+        self,
+        client_id: str,
+        message: str,
+        agent_jwt: str,
+        websocket: Optional[WebSocket] = None,
+    ) -> Optional[str]:
+        """
+        Routes a received frame based on its message type.
+
+        Returns:
+            Optional[str]: The message type of the frame, None if it could not be decoded.
+        """
+        if is_envelope(message):
+            try:
+                if message_type := await self._route_envelope(client_id, message):
+                    return message_type
+                message = envelope_to_json(message)
+            except EnvelopeFormatError:
+                message = ""  # handled as invalid JSON below
+
         try:
             data = json.loads(message)
-            logging.debug(f"Received message: {data}")
+            logging.debug("Received message: %s", message)
         except json.JSONDecodeError:
+            self.metrics.json_decode_failures.inc()
             await self.send_message(
                 client_id=client_id,
                 message={
@@ -59,19 +311,25 @@ class WSConnectionManager:
 
             if message_type == WSMessageType.AGENT_REGISTER.value:
                 if client_id not in self.MASTER_SERVERS_API_KEY_MAPPING.values():
-                    request_payload = {
-                        "request_payload": {
-                            **payload,
-                            "agent_uuid": client_id,
-                            "agent_jwt": agent_jwt,
-                            "message_type": message_type,
-                        }
+                    # the verified identity is only ever set by the router, never by the agent
+                    payload.pop("agent_user_id", None)
+                    register_payload = {
+                        **payload,
+                        "agent_uuid": client_id,
+                        "agent_jwt": agent_jwt,
+                        "message_type": message_type,
                     }
+                    if app_settings.ROUTER_VERIFY_AGENT_JWT and (
+                        identity := self.jwt_verifier.verify(agent_jwt)
+                    ):
+                        register_payload["agent_user_id"] = identity.user_id
+                    request_payload = {"request_payload": register_payload}
 
                     # Register the agent in SQL Database
                     await self.send_message(
                         client_id=MasterServerName.MASTER_SERVER_BE.value,
                         message=request_payload,
+                        message_type=message_type,
                     )
 
             elif message_type in (
@@ -80,10 +338,14 @@ class WSConnectionManager:
             ):
                 invoked_by = data.pop("invoked_by", None)
                 data["message_type"] = message_type
-                logging.info(
-                    f"Got response: {data}, from: {client_id}, invoked_by: {invoked_by}"
+                log_payload(
+                    "Got response: %s, from: %s, invoked_by: %s",
+                    data,
+                    client_id,
+                    invoked_by,
                 )
-                await self.send_message(invoked_by, data)
+                if caller_id := self._complete_invocation(invoked_by, lambda: data):
+                    await self.send_message(caller_id, data, message_type=message_type)
 
             elif message_type == WSMessageType.AGENT_INVOKE.value:
                 if not payload and not agent_uuid:
@@ -97,7 +359,7 @@ class WSConnectionManager:
                         },
                     )
 
-                if agent_uuid not in self.active_connections:
+                if not await self.is_active(agent_uuid):
                     await self.send_message(
                         client_id=client_id,
                         message={
@@ -129,12 +391,48 @@ class WSConnectionManager:
                     ):
                         payload["message_type"] = WSMessageType.AGENT_ERROR.value
                         payload = {"error": payload}
-                        await self.send_message(agent_uuid, payload)
+                        await self.send_message(
+                            agent_uuid,
+                            payload,
+                            message_type=WSMessageType.AGENT_ERROR.value,
+                        )
+                    elif rejection := self._admit(client_id, agent_uuid):
+                        await self.send_message(
+                            client_id,
+                            rejection,
+                            message_type=WSMessageType.AGENT_ERROR.value,
+                        )
                     else:
-                        data["invoked_by"] = client_id
-                        await self.send_message(agent_uuid, data)
+                        metadata = data.get("request_metadata") or {}
+                        # genai_session's send() fills request_metadata on its own,
+                        # its callers pass the deadline in the payload instead
+                        timeout = timeout_until(
+                            metadata.get("deadline") or (payload or {}).get("deadline"),
+                            metadata.get("timeout"),
+                        )
+                        if timeout is not None and timeout <= 0:
+                            await self._reject_expired(client_id, agent_uuid)
+                            return message_type
+
+                        result = await self._dispatch_invocation(
+                            caller_id=client_id,
+                            agent_uuid=agent_uuid,
+                            build_frame=lambda invoked_by: json.dumps(
+                                {**data, "invoked_by": invoked_by}
+                            ),
+                            timeout=timeout,
+                        )
+                        if result == EnqueueResult.REJECTED:
+                            await self._reject_overloaded(client_id)
 
             elif message_type == WSMessageType.AGENT_LOG.value:
+                if app_settings.ROUTER_LOG_BATCHING:
+                    await self.log_batcher.add(
+                        MasterServerName.MASTER_SERVER_BE.value,
+                        {"agent_uuid": client_id, **data},
+                    )
+                    return message_type
+
                 await self.send_message(
                     client_id=MasterServerName.MASTER_SERVER_BE.value,
                     message={
@@ -144,8 +442,32 @@ class WSConnectionManager:
                             **data,
                         },
                     },
+                    message_type=message_type,
                 )
 
+            elif message_type == WSMessageType.AGENT_PROGRESS.value:
+                # only the master agent streams progress, into chats of the frontend;
+                # unlike logs it is forwarded right away, its latency is user-facing
+                if client_id != MasterServerName.MASTER_SERVER_ML.value:
+                    logging.warning(f"Dropping agent_progress frame from {client_id}")
+                    return message_type
+
+                await self.send_message(
+                    client_id=MasterServerName.MASTER_SERVER_BE.value,
+                    message={
+                        "request_payload": {
+                            "message_type": message_type,
+                            "agent_uuid": client_id,
+                            **data,
+                        },
+                    },
+                    message_type=message_type,
+                )
+
+            elif message_type == WSMessageType.ROUTER_PONG.value:
+                if websocket is not None:
+                    self.heartbeat.pong(websocket, data.get("ping_id"))
+
             else:
                 await self.send_message(
                     client_id=client_id,
@@ -156,62 +478,731 @@ class WSConnectionManager:
                         }
                     },
                 )
+            return message_type
+
+    async def _route_envelope(self, client_id: str, frame: str) -> Optional[str]:
+        """
+        Fast path for envelope frames: routes responses and invocations by the small
+        header only and forwards the body untouched, without decoding it.
+
+        Args:
+            client_id (str): The ID of the client sending the frame.
+            frame (str): The envelope frame.
+
+        Returns:
+            Optional[str]: The message type of the routed frame, None if the frame
+                needs the regular full decode path.
+
+        Raises:
+            EnvelopeFormatError: If the envelope header is malformed.
+        """
+        if not app_settings.ROUTER_ENVELOPE_ROUTING:
+            return None
+
+        header, body = decode_envelope(frame)
+        message_type = header.get("message_type")
+
+        if message_type in (
+            WSMessageType.AGENT_RESPONSE.value,
+            WSMessageType.AGENT_ERROR.value,
+        ):
+            if caller_id := self._complete_invocation(
+                header.get("invoked_by"),
+                lambda: {**json.loads(body), "message_type": message_type},
+            ):
+                await self.send_message(
+                    client_id=caller_id,
+                    message=encode_envelope({"message_type": message_type}, body),
+                    message_type=message_type,
+                )
+            return message_type
+
+        if message_type == WSMessageType.AGENT_INVOKE.value:
+            agent_uuid = header.get("agent_uuid")
+            if (
+                # invocations that may produce errors or come from Master BE take the full path
+                not agent_uuid
+                or agent_uuid == MasterServerName.MASTER_SERVER_ML.value
+                or client_id.startswith(app_settings.MASTER_BE_API_KEY)
+                or not await self.is_active(agent_uuid)
+            ):
+                return None
+
+            if rejection := self._admit(client_id, agent_uuid):
+                await self.send_message(
+                    client_id, rejection, message_type=WSMessageType.AGENT_ERROR.value
+                )
+                return message_type
+
+            timeout = timeout_until(header.get("deadline"), header.get("timeout"))
+            if timeout is not None and timeout <= 0:
+                await self._reject_expired(client_id, agent_uuid)
+                return message_type
+
+            result = await self._dispatch_invocation(
+                caller_id=client_id,
+                agent_uuid=agent_uuid,
+                build_frame=lambda invoked_by: encode_envelope(
+                    {"invoked_by": invoked_by}, body
+                ),
+                timeout=timeout,
+            )
+            if result == EnqueueResult.REJECTED:
+                await self._reject_overloaded(client_id)
+            return message_type
+
+        return None
+
+    def _admit(self, caller_id: str, agent_uuid: str) -> Optional[dict]:
+        """
+        Applies the rate and in-flight limits of the caller and the invoked agent.
+        Master servers and the invoke sessions they open relay the invocations of all
+        users and are only limited per agent.
+        In-flight limits count the invocations of agents connected to this node.
+
+        Args:
+            caller_id (str): The client ID sending the invocation.
+            agent_uuid (str): The invoked agent.
+
+        Returns:
+            Optional[dict]: The error frame to answer the caller with, None if admitted.
+        """
+        caller_key = admission_key(caller_id)
+        if caller_id in self.MASTER_SERVERS_API_KEY_MAPPING.values() or (
+            caller_id.startswith(
+                (app_settings.MASTER_BE_API_KEY, app_settings.MASTER_AGENT_API_KEY)
+            )
+        ):
+            caller_key = None
+
+        retry_after = self.admission.admit(
+            caller_key=caller_key,
+            agent_id=agent_uuid,
+            caller_in_flight=self.tracker.caller_in_flight(caller_key or caller_id),
+            agent_in_flight=self.tracker.agent_in_flight(agent_uuid),
+            now=time.monotonic(),
+        )
+        if retry_after is None:
+            return None
+        self.metrics.invocations_rate_limited.inc()
+        return {
+            "message_type": WSMessageType.AGENT_ERROR.value,
+            "error": {
+                "error_message": "Too many invocations, retry later",
+                "error_type": ErrorType.AGENT_RATE_LIMITED.value,
+                "retry_after": round(retry_after, 3),
+            },
+        }
+
+    async def _dispatch_invocation(
+        self,
+        caller_id: str,
+        agent_uuid: str,
+        build_frame: Callable[[str], str],
+        timeout: Optional[float] = None,
+    ) -> EnqueueResult:
+        """
+        Sends an invocation to a replica of the agent and records it in the invocation
+        tracker, so it can time out or fail when the replica disconnects.
+        Invocations of agents owned by another router node are forwarded untracked.
+
+        Args:
+            caller_id (str): The client ID waiting for the response.
+            agent_uuid (str): The invoked agent.
+            build_frame (Callable[[str], str]): Builds the frame for the `invoked_by` value.
+            timeout (Optional[float]): Deadline of the invocation in seconds.
+        """
+        if self.replay.is_held(agent_uuid):
+            if await self._connected_elsewhere(agent_uuid):
+                # reconnected to another router node within the grace period
+                await self._fail_held_invocations(
+                    self.replay.release(agent_uuid) or [],
+                    "Agent has reconnected to another router node, try again",
+                )
+            else:
+                invocation = self.tracker.add(
+                    caller_id=caller_id,
+                    agent_id=agent_uuid,
+                    timeout=timeout,
+                    caller_key=admission_key(caller_id),
+                )
+                return self._hold_invocation(
+                    invocation, build_frame(invocation.invoked_by)
+                )
+        if not (pool := self.active_connections.get(agent_uuid)):
+            return await self.send_message(
+                agent_uuid,
+                build_frame(caller_id),
+                message_type=WSMessageType.AGENT_INVOKE.value,
+            )
+        if not (connection := pool.pick()):
+            return EnqueueResult.DROPPED
+
+        invocation = self.tracker.add(
+            caller_id=caller_id,
+            agent_id=agent_uuid,
+            replica=connection,
+            timeout=timeout,
+            caller_key=admission_key(caller_id),
+        )
+        message = build_frame(invocation.invoked_by)
+        log_payload("Sending message: %s, to: %s", message, agent_uuid)
+        result = await self._enqueue(
+            connection, message, WSMessageType.AGENT_INVOKE.value
+        )
+        if result != EnqueueResult.ACCEPTED:
+            self.tracker.complete(invocation.request_id)
+        return result
+
+    def _hold_invocation(self, invocation: Invocation, message: str) -> EnqueueResult:
+        """
+        Buffers an invocation of an agent in its reconnect grace period.
+
+        Returns:
+            EnqueueResult: REJECTED if the replay buffer of the agent is full.
+        """
+        if self.replay.add(invocation.agent_id, invocation.request_id, message):
+            return EnqueueResult.ACCEPTED
+        self.tracker.complete(invocation.request_id)
+        return EnqueueResult.REJECTED
+
+    async def _replay_held_invocations(
+        self, connection: OutboundConnection, frames: List[Tuple[str, str]]
+    ) -> None:
+        """
+        Delivers invocations held during the grace period to the reconnected agent,
+        skipping the ones that have expired meanwhile.
+        """
+        for request_id, message in frames:
+            if not self.tracker.assign(request_id, connection):
+                continue
+            result = await self._enqueue(
+                connection, message, WSMessageType.AGENT_INVOKE.value
+            )
+            if result != EnqueueResult.ACCEPTED and (
+                invocation := self.tracker.complete(request_id)
+            ):
+                await self._notify_caller(
+                    invocation,
+                    error={
+                        "error_message": "Agent is overloaded, try again later",
+                        "error_type": ErrorType.AGENT_OVERLOADED.value,
+                    },
+                )
+
+    async def _release_held_agent(
+        self, agent_id: str, frames: List[Tuple[str, str]]
+    ) -> None:
+        """
+        Unregisters an agent that has not reconnected within the grace period
+        and fails the invocations held for it. An agent that has reconnected to
+        another router node in cluster mode stays registered.
+        """
+        notified = await self._fail_held_invocations(frames, "Agent is NOT active")
+        if await self._connected_elsewhere(agent_id):
+            return
+        await self._unregister(agent_id, notified)
+
+    async def _fail_held_invocations(
+        self, frames: List[Tuple[str, str]], error_message: str
+    ) -> Set[str]:
+        """
+        Fails invocations held for an agent that will not be replayed on this node.
+
+        Returns:
+            Set[str]: The callers that have been notified.
+        """
+        notified = set()
+        for request_id, _ in frames:
+            if invocation := self.tracker.complete(request_id):
+                await self._notify_caller(
+                    invocation,
+                    error={
+                        "error_message": error_message,
+                        "error_type": ErrorType.AGENT_NOT_ACTIVE.value,
+                    },
+                )
+                notified.add(invocation.caller_id)
+        return notified
+
+    async def _connected_elsewhere(self, client_id: str) -> bool:
+        """
+        Checks whether the client is connected to another router node (cluster mode only).
+        """
+        if not self.registry:
+            return False
+        node_id = await self.registry.lookup(client_id)
+        return node_id is not None and node_id != self.registry.node_id
+
+    def _complete_invocation(
+        self, invoked_by: Optional[str], decode_response: Callable[[], dict]
+    ) -> Optional[str]:
+        """
+        Removes the answered invocation from the tracker. The response of a caller
+        awaiting in-process is decoded and handed over to its future right away.
+
+        Args:
+            invoked_by (Optional[str]): The `invoked_by` field echoed by the agent.
+            decode_response (Callable[[], dict]): Returns the response as a dictionary.
+
+        Returns:
+            Optional[str]: The caller to deliver the response to, None if the invocation
+                has already timed out or failed, so the caller has been notified before,
+                or if the caller awaits in-process.
+        """
+        if not invoked_by:
+            return None
+        caller_id, request_id = split_invoked_by(invoked_by)
+        if not request_id:
+            return caller_id
+        if not (invocation := self.tracker.complete(request_id)):
+            logging.debug(f"Dropping response to expired request {request_id}")
+            return None
+        if invocation.future:
+            if not invocation.future.done():
+                invocation.future.set_result(decode_response())
+            return None
+        return caller_id
+
+    async def _notify_caller(self, invocation: Invocation, error: dict) -> None:
+        """
+        Delivers an error the router raised on behalf of the agent to the caller.
+        """
+        message = {"message_type": WSMessageType.AGENT_ERROR.value, "error": error}
+        if invocation.future:
+            if not invocation.future.done():
+                invocation.future.set_result(message)
+            return
+        await self.send_message(
+            client_id=invocation.caller_id,
+            message=message,
+            message_type=WSMessageType.AGENT_ERROR.value,
+        )
+
+    async def _expire_invocation(self, invocation: Invocation) -> None:
+        """
+        Notifies the caller that the agent has not responded before the deadline.
+        """
+        await self._notify_caller(
+            invocation,
+            error={
+                "error_message": "Agent has not responded in time",
+                "error_type": ErrorType.AGENT_TIMEOUT.value,
+                "agent_uuid": invocation.agent_id,
+            },
+        )
+
+    async def _fail_invocations(self, invocations: List[Invocation]) -> Set[str]:
+        """
+        Notifies the callers of invocations sent to a disconnected agent.
+
+        Returns:
+            Set[str]: The notified callers.
+        """
+        for invocation in invocations:
+            await self._notify_caller(
+                invocation,
+                error={
+                    "error_message": "Agent has been unregistered",
+                    "agent_uuid": invocation.agent_id,
+                },
+            )
+        return {invocation.caller_id for invocation in invocations}
+
+    async def invoke_and_wait(
+        self,
+        agent_uuid: str,
+        request_payload: dict,
+        request_metadata: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Invokes an agent connected to this router node and waits for its response.
+        The invocation is correlated through the invocation tracker, so pending calls
+        cost one future and one table entry each.
+
+        Args:
+            agent_uuid (str): The invoked agent.
+            request_payload (dict): Keyword arguments of the agent handler.
+            request_metadata (Optional[dict]): Metadata forwarded to the agent.
+            timeout (Optional[float]): Seconds to wait for the response, the default
+                invocation timeout if omitted.
+
+        Returns:
+            Dict[str, Any]: The `agent_response` or `agent_error` frame the caller would
+                receive over WebSocket, including the `request_id` of the invocation.
+        """
+        pool = self.active_connections.get(agent_uuid)
+        connection = pool.pick() if pool else None
+        if not connection and not self.replay.is_held(agent_uuid):
+            return {
+                "message_type": WSMessageType.AGENT_ERROR.value,
+                "error": {
+                    "error_message": "Agent is NOT active",
+                    "error_type": ErrorType.AGENT_NOT_ACTIVE.value,
+                },
+            }
+
+        if rejection := self._admit(HTTP_CALLER_ID, agent_uuid):
+            return rejection
+
+        timeout = timeout_until((request_metadata or {}).get("deadline"), timeout)
+        if timeout is not None and timeout <= 0:
+            self.metrics.invocations_expired.inc()
+            return self._expired_error(agent_uuid)
+
+        timeout = timeout or app_settings.ROUTER_INVOCATION_TIMEOUT_SECONDS
+        future = asyncio.get_running_loop().create_future()
+        invocation = self.tracker.add(
+            caller_id=HTTP_CALLER_ID,
+            agent_id=agent_uuid,
+            replica=connection,  # None while the agent is held for a reconnect
+            timeout=timeout,
+            future=future,
+        )
+        message = json.dumps(
+            {
+                "request_payload": request_payload,
+                "request_metadata": request_metadata or {},
+                "invoked_by": invocation.invoked_by,
+            }
+        )
+        log_payload("Sending message: %s, to: %s", message, agent_uuid)
+        if connection:
+            result = await self._enqueue(
+                connection, message, WSMessageType.AGENT_INVOKE.value
+            )
+        else:
+            result = self._hold_invocation(invocation, message)
+        try:
+            if result != EnqueueResult.ACCEPTED:
+                return {
+                    "message_type": WSMessageType.AGENT_ERROR.value,
+                    "error": {
+                        "error_message": "Agent is overloaded, try again later",
+                        "error_type": ErrorType.AGENT_OVERLOADED.value,
+                    },
+                }
+            # the sweeper resolves the future on the deadline, wait_for is a safety net
+            response = await asyncio.wait_for(
+                asyncio.shield(future), timeout + self.tracker.tick_seconds * 2
+            )
+        except asyncio.TimeoutError:
+            await self._expire_invocation(invocation)
+            response = future.result()
+        finally:
+            # no-op for answered invocations, cleans up failed and cancelled ones
+            self.tracker.complete(invocation.request_id)
+        return {**response, "request_id": invocation.request_id}
+
+    async def _send_log_batch(self, client_id: str, logs: List[dict]) -> None:
+        """
+        Sends log entries coalesced by the log batcher as a single frame.
+        """
+        await self.send_message(
+            client_id=client_id,
+            message={
+                "request_payload": {
+                    "message_type": WSMessageType.AGENT_LOG_BATCH.value,
+                    "logs": logs,
+                },
+            },
+            message_type=WSMessageType.AGENT_LOG.value,
+        )
+
+    async def _reject_overloaded(self, client_id: str) -> None:
+        """
+        Notifies the caller that its invocation was rejected by a full agent send queue.
+        """
+        await self.send_message(
+            client_id=client_id,
+            message={
+                "message_type": WSMessageType.AGENT_ERROR.value,
+                "error": {
+                    "error_message": "Agent is overloaded, try again later",
+                    "error_type": ErrorType.AGENT_OVERLOADED.value,
+                },
+            },
+            message_type=WSMessageType.AGENT_ERROR.value,
+        )
+
+    async def _reject_expired(self, client_id: str, agent_uuid: str) -> None:
+        """
+        Answers an invocation whose request deadline has already passed instead of
+        sending it to the agent, its caller has given up on the response.
+        """
+        self.metrics.invocations_expired.inc()
+        await self.send_message(
+            client_id=client_id,
+            message=self._expired_error(agent_uuid),
+            message_type=WSMessageType.AGENT_ERROR.value,
+        )
+
+    @staticmethod
+    def _expired_error(agent_uuid: str) -> dict:
+        return {
+            "message_type": WSMessageType.AGENT_ERROR.value,
+            "error": {
+                "error_message": "Request deadline has passed",
+                "error_type": ErrorType.AGENT_TIMEOUT.value,
+                "agent_uuid": agent_uuid,
+            },
+        }
 
-    async def send_message(self, client_id: str, message: str | dict):
+    async def _send_ping(self, liveness: Liveness) -> bool:
         """
-        Sends a message to the specified client if the connection exists.
+        Queues a heartbeat ping for the watched connection.
+
+        Returns:
+            bool: Whether the ping was accepted by the send queue.
+        """
+        result = await self._enqueue(
+            liveness.connection,
+            json.dumps(
+                {
+                    "message_type": WSMessageType.ROUTER_PING.value,
+                    "ping_id": liveness.ping_id,
+                }
+            ),
+            WSMessageType.ROUTER_PING.value,
+        )
+        return result == EnqueueResult.ACCEPTED
+
+    async def _evict_unresponsive(self, liveness: Liveness) -> None:
+        """
+        Disconnects a replica that stopped answering heartbeats like a closed one,
+        so its invocations fail right away and the backend learns it is gone.
+        """
+        logging.warning(
+            f"{liveness.client_id} missed {self.heartbeat.max_missed} heartbeats, evicting it"
+        )
+        websocket = liveness.connection.websocket
+        await self.disconnect(liveness.client_id, websocket)
+        try:
+            await websocket.close(
+                code=HEARTBEAT_TIMEOUT_CLOSE_CODE, reason="Heartbeat timeout"
+            )
+        except Exception:
+            pass  # the socket is most likely gone already
+
+    async def send_message(
+        self,
+        client_id: str,
+        message: str | dict,
+        message_type: Optional[str] = None,
+    ) -> EnqueueResult:
+        """
+        Queues a message for the specified client if the connection exists.
+        If the client has several replicas, one of them is picked by the balancing policy.
+        In cluster mode messages for clients owned by another node are forwarded to it.
 
         Args:
             client_id (str): The client ID to which the message should be sent.
             message (str | dict): The message content, can be a string or a dictionary.
+            message_type (Optional[str]): Type of the message, selects the overflow policy
+                applied when the send queue of the client is full.
+
+        Returns:
+            EnqueueResult: Outcome of queueing the message, DROPPED if the client is unknown.
         """
         message = json.dumps(message) if isinstance(message, dict) else message
-        logging.info(f"Sending message: {message}, to: {client_id}")
-        if websocket := self.active_connections.get(client_id):
-            await websocket.send_text(message)
+        log_payload("Sending message: %s, to: %s", message, client_id)
+        if pool := self.active_connections.get(client_id):
+            if not (connection := pool.pick()):
+                return EnqueueResult.DROPPED
+            return await self._enqueue(connection, message, message_type)
+        elif self.registry:
+            node_id = await self.registry.lookup(client_id)
+            if node_id and node_id != self.registry.node_id:
+                await self.registry.forward(node_id, client_id, message)
+                self.metrics.sent(message_type, len(message), direction="forwarded")
+                return EnqueueResult.ACCEPTED
+        return EnqueueResult.DROPPED
+
+    async def _deliver_local(self, client_id: str, message: str) -> None:
+        """
+        Delivers a frame forwarded by another router node to a local connection.
+        Forwarded frames are never forwarded again to avoid loops between nodes.
+        """
+        if (pool := self.active_connections.get(client_id)) and (
+            connection := pool.pick()
+        ):
+            await self._enqueue(connection, message)
+
+    async def _enqueue(
+        self,
+        connection: OutboundConnection,
+        message: str,
+        message_type: Optional[str] = None,
+    ) -> EnqueueResult:
+        """
+        Queues a serialized frame, converting envelopes for clients that do not read them.
+        """
+        if is_envelope(message) and not connection.accepts_envelope:
+            message = envelope_to_json(message)
+        self.metrics.sent(message_type, len(message))
+        return await connection.enqueue(message, message_type)
 
     async def connect(self, websocket: WebSocket) -> str:
         """
         Accepts a new WebSocket connection and assigns a client ID based on headers.
+        Connections sharing a client ID become replicas of one pool. Sessions opened via
+        `session.send` get a unique suffix, so concurrent sessions never share a pool
+        and responses always reach the socket that sent the invocation.
+        Connections without valid credentials are not accepted.
 
         Args:
             websocket (WebSocket): The WebSocket connection instance.
 
         Returns:
-            str: The resolved client ID.
+            str: The resolved client ID, None if the connection has to be rejected.
         """
         client_id = None
         agent_jwt = None
+        connection_class = ConnectionClass.AGENT
 
         if api_key := websocket.headers.get("api-key"):
             client_id = self.MASTER_SERVERS_API_KEY_MAPPING.get(api_key)
+            connection_class = (
+                ConnectionClass.MASTER_BE
+                if client_id == MasterServerName.MASTER_SERVER_BE.value
+                else ConnectionClass.MASTER_ML
+            )
 
         elif agent_jwt := websocket.headers.get("x-custom-authorization"):
-            try:
-                decoded = jwt.decode(
-                    agent_jwt, options={"verify_signature": False}, algorithms=["HS256"]
-                )
-                client_id = decoded.get("sub")
-            except jwt.DecodeError:
-                client_id = agent_jwt
+            if app_settings.ROUTER_VERIFY_AGENT_JWT:
+                if identity := self.jwt_verifier.verify(agent_jwt):
+                    client_id = identity.agent_id
+                else:
+                    logging.warning("Rejecting agent connection with an invalid JWT")
+            else:
+                try:
+                    decoded = jwt.decode(
+                        agent_jwt,
+                        options={"verify_signature": False},
+                        algorithms=["HS256"],
+                    )
+                    client_id = decoded.get("sub")
+                except jwt.DecodeError:
+                    client_id = agent_jwt
         elif invoke_key := websocket.headers.get("x-custom-invoke-key"):
-            client_id = invoke_key
+            client_id = f"{invoke_key}:{uuid4().hex}"
+            connection_class = ConnectionClass.INVOKE_SESSION
+
+        if not client_id:
+            return None, None
 
         await websocket.accept()
-        self.active_connections[client_id] = websocket
+        connection = OutboundConnection(
+            client_id=client_id,
+            websocket=websocket,
+            max_queue_size=app_settings.ROUTER_SEND_QUEUE_SIZE,
+            overflow_policies=self.overflow_policies,
+            block_timeout=app_settings.ROUTER_SEND_BLOCK_TIMEOUT_SECONDS,
+            accepts_envelope=websocket.headers.get("x-genai-envelope") == "1",
+            connection_class=connection_class,
+            metrics=self.metrics,
+        )
+        connection.start()
+        if websocket.headers.get("x-genai-heartbeat") == "1":
+            self.heartbeat.watch(client_id, connection)
+        if pool := self.active_connections.get(client_id):
+            pool.add(connection)
+        else:
+            pool = ReplicaPool(client_id, app_settings.ROUTER_BALANCING_POLICY)
+            pool.add(connection)
+            self.active_connections[client_id] = pool
+            if connection_class == ConnectionClass.INVOKE_SESSION:
+                # the invoke key is `<caller>:<invoked agent>`
+                agent_id = invoke_key.rpartition(":")[2]
+                self.sessions_by_agent.setdefault(agent_id, set()).add(client_id)
+                self.session_agents[client_id] = agent_id
+            if self.registry:
+                await self.registry.register(client_id)
+            if (held := self.replay.release(client_id)) is not None:
+                logging.info(
+                    f"{client_id} reconnected, replaying {len(held)} held invocations"
+                )
+                await self._replay_held_invocations(connection, held)
         return client_id, agent_jwt
 
-    async def disconnect(self, client_id: str):
+    async def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None):
         """
         Disconnects a client and notifies relevant parties about the unregistration.
+        If other replicas of the client are still alive, only the given replica is removed.
+        Master BE is only notified about agents that do not reconnect within the grace period.
 
         Args:
             client_id (str): The ID of the client to disconnect.
+            websocket (Optional[WebSocket]): The socket of the disconnected replica,
+                all replicas are removed if omitted.
         """
-        if client_id not in self.active_connections:
+        if not (pool := self.active_connections.get(client_id)):
             return
 
+        if websocket is None:
+            removed = list(pool.replicas)
+            pool.replicas.clear()
+        elif connection := pool.remove(websocket):
+            removed = [connection]
+        else:
+            return  # already evicted, the pool belongs to a newer connection
+        notified = set()
+        for connection in removed:
+            self.heartbeat.unwatch(connection.websocket)
+            await connection.close()
+            notified |= await self._fail_invocations(
+                self.tracker.fail_agent(client_id, replica=connection)
+            )
+        self.tracker.forget_caller(client_id)
+
+        if pool:
+            return  # other replicas keep the client registered
+
         del self.active_connections[client_id]
+        if (agent_id := self.session_agents.pop(client_id, None)) and (
+            sessions := self.sessions_by_agent.get(agent_id)
+        ):
+            sessions.discard(client_id)
+            if not sessions:
+                del self.sessions_by_agent[agent_id]
+        if self.registry:
+            await self.registry.unregister(client_id)
+        if await self._connected_elsewhere(client_id):
+            return  # already reconnected to another router node
+
+        if self.replay.enabled and removed[0].connection_class in (
+            ConnectionClass.AGENT,
+            ConnectionClass.MASTER_ML,
+        ):
+            # the agent may be back in a moment, e.g. during a deploy
+            self.replay.hold(client_id)
+            return
+        await self._unregister(client_id, notified)
+
+    async def _unregister(
+        self, client_id: str, notified: AbstractSet[str] = frozenset()
+    ) -> None:
+        """
+        Notifies Master BE and the sessions invoking the client that it is gone.
+
+        Args:
+            client_id (str): The client that is gone.
+            notified (AbstractSet[str]): Sessions already told by failing their invocations.
+        """
+        for session_id in self.sessions_by_agent.get(client_id, ()):
+            if session_id not in notified:
+                await self.send_message(
+                    client_id=session_id,
+                    message={
+                        "message_type": WSMessageType.AGENT_ERROR.value,
+                        "error": {
+                            "error_message": "Agent has been unregistered",
+                            "agent_uuid": client_id,
+                        },
+                    },
+                    message_type=WSMessageType.AGENT_ERROR.value,
+                )
 
         if not client_id.startswith(
             app_settings.MASTER_BE_API_KEY
@@ -224,19 +1215,5 @@ class WSConnectionManager:
                         "message_type": WSMessageType.AGENT_UNREGISTER.value,
                     }
                 },
+                message_type=WSMessageType.AGENT_UNREGISTER.value,
             )
-
-        for connection_id in (
-            self.active_connections
-        ):  # Clean up all connections created via session.send
-            if client_id in connection_id:
-                await self.send_message(
-                    client_id=connection_id,
-                    message={
-                        "message_type": WSMessageType.AGENT_ERROR.value,
-                        "error": {
-                            "error_message": "Agent has been unregistered",
-                            "agent_uuid": client_id,
-                        },
-                    },
-                )
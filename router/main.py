@@ -1,8 +1,45 @@
+import math
+import os
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from connectors.registry import get_presence_registry
 from connectors.ws_connector_manager import WSConnectionManager
-from utils.pydantic_models import Message, MessageResponse
+from utils.enums import ErrorType
+from utils.pydantic_models import (
+    InvocationResult,
+    Message,
+    MessageResponse,
+    QueueStats,
+    SyncInvocation,
+)
+
+# Manages WebSocket connections and routes messages
+ws_connection_manager = WSConnectionManager(registry=get_presence_registry())
+
+# HTTP status of errors the router raises for synchronous invocations,
+# errors raised by the agent itself are returned with 200
+SYNC_INVOCATION_ERROR_STATUS = {
+    ErrorType.AGENT_NOT_ACTIVE.value: 404,
+    ErrorType.AGENT_OVERLOADED.value: 503,
+    ErrorType.AGENT_TIMEOUT.value: 504,
+    ErrorType.AGENT_RATE_LIMITED.value: 429,
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts and stops cluster forwarding of the connection manager.
+    """
+    await ws_connection_manager.start()
+    yield
+    await ws_connection_manager.stop()
+
 
 app = FastAPI(
     title="Agent WebSocket API",
@@ -10,11 +47,9 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
-# Manages WebSocket connections and routes messages
-ws_connection_manager = WSConnectionManager()
-
 
 @app.websocket(path="/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -30,19 +65,23 @@ async def websocket_endpoint(websocket: WebSocket):
     client_id, agent_jwt = await ws_connection_manager.connect(websocket)
 
     if not client_id:
-        # Reject connection if no valid authorization header
+        # Reject connection if no valid authorization header, before it is accepted
         await websocket.close(code=4000, reason="Missing Authorization header")
     else:
         try:
-            # Continuously listen for messages
-            while True:
+            # Continuously listen for messages until the client disconnects
+            # or the router closes the socket after missed heartbeats
+            while websocket.application_state == WebSocketState.CONNECTED:
                 data = await websocket.receive_text()
                 await ws_connection_manager.process_message(
-                    client_id, data, agent_jwt=agent_jwt
+                    client_id, data, agent_jwt=agent_jwt, websocket=websocket
                 )
         except WebSocketDisconnect:
-            # Handle client disconnection
-            await ws_connection_manager.disconnect(client_id)
+            pass
+        finally:
+            # Handle client disconnection, no-op for already evicted replicas;
+            # also runs when routing a frame fails, so the socket is never leaked
+            await ws_connection_manager.disconnect(client_id, websocket)
 
 
 @app.post(
@@ -55,6 +94,55 @@ async def invoke_agent(message: Message) -> MessageResponse:
     return MessageResponse(detail=f"Message sent to client {message.client_id}")
 
 
+@app.post(
+    path="/invoke-agent/sync",
+    response_model=InvocationResult,
+    summary="Invoke a connected agent and wait for its response",
+)
+async def invoke_agent_sync(invocation: SyncInvocation) -> JSONResponse:
+    result = await ws_connection_manager.invoke_and_wait(
+        agent_uuid=invocation.agent_uuid,
+        request_payload=invocation.request_payload,
+        request_metadata=invocation.request_metadata,
+        timeout=invocation.timeout,
+    )
+    error = result.get("error") or {}
+    headers = None
+    if retry_after := error.get("retry_after"):
+        headers = {"Retry-After": str(math.ceil(retry_after))}
+    return JSONResponse(
+        content=InvocationResult(**result).model_dump(mode="json"),
+        status_code=SYNC_INVOCATION_ERROR_STATUS.get(error.get("error_type"), 200),
+        headers=headers,
+    )
+
+
+@app.get(
+    path="/queues",
+    response_model=dict[str, QueueStats],
+    summary="Send queue depth of every connected client",
+)
+async def queue_depths() -> dict[str, QueueStats]:
+    return ws_connection_manager.queue_depths()
+
+
+@app.get(
+    path="/metrics",
+    response_class=PlainTextResponse,
+    summary="Router metrics in the Prometheus text format",
+)
+async def metrics() -> str:
+    return ws_connection_manager.render_metrics()
+
+
 if __name__ == "__main__":
     # Run the FastAPI app using Uvicorn on port 8080 with auto-reload
-    uvicorn.run("main:app", port=8080, reload=True)
+    # transport-level pings detect dead peers that do not answer router heartbeats,
+    # configured like serve.py
+    uvicorn.run(
+        "main:app",
+        port=8080,
+        reload=True,
+        ws_ping_interval=float(os.environ.get("UVICORN_WS_PING_INTERVAL", 20.0)),
+        ws_ping_timeout=float(os.environ.get("UVICORN_WS_PING_TIMEOUT", 20.0)),
+    )
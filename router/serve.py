@@ -0,0 +1,170 @@
+"""
+Production entry point of the router.
+
+Runs `--workers` uvicorn worker processes. Every worker binds its own listening socket
+with SO_REUSEPORT, so the kernel spreads incoming connections across them. Workers run
+in cluster mode: unless another cluster backend is configured, the supervising process
+serves a `LocalClusterHub` that shares presence between the workers and forwards frames
+to the worker holding the recipient's socket. uvloop and httptools are used when they
+are installed (`performance` extra).
+
+    python serve.py --workers 4 --host 0.0.0.0 --port 8080
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from settings import get_settings
+
+app_settings = get_settings()
+
+
+def bind_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    """
+    Creates the listening socket of a worker.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+def run_worker(args: argparse.Namespace, env: Dict[str, str]) -> None:
+    """
+    Runs one uvicorn server, in the supervisor itself for a single worker.
+
+    Args:
+        args (argparse.Namespace): Command line arguments.
+        env (Dict[str, str]): Settings of the worker, applied before the app is imported.
+    """
+    os.environ.update(env)
+    get_settings.cache_clear()  # read again with the settings of the worker
+    import uvicorn
+
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    config = uvicorn.Config(
+        "main:app",
+        loop=loop,
+        http=http,
+        log_level=args.log_level,
+        ws_ping_interval=args.ws_ping_interval,
+        ws_ping_timeout=args.ws_ping_timeout,
+    )
+    sock = bind_socket(args.host, args.port, reuse_port=args.workers > 1)
+    logging.getLogger("uvicorn.error").info(
+        f"Router worker {os.getpid()} serving with {loop} and {http}"
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def start_hub(path: str) -> None:
+    """
+    Serves the cluster hub of the workers from a background thread of the supervisor.
+    """
+    from connectors.registry import LocalClusterHub
+
+    started = threading.Event()
+
+    async def serve() -> None:
+        hub = LocalClusterHub(path)
+        await hub.start()
+        started.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+    if not started.wait(timeout=10):
+        raise RuntimeError("Router cluster hub did not start")
+
+
+def supervise(args: argparse.Namespace) -> None:
+    """
+    Starts the workers and restarts the ones that exit until the supervisor is stopped.
+    """
+    cluster_env = {}
+    if not app_settings.ROUTER_CLUSTER_MODE:
+        hub_path = os.path.join(tempfile.mkdtemp(prefix="genai-router-"), "hub.sock")
+        start_hub(hub_path)
+        cluster_env = {
+            "ROUTER_CLUSTER_MODE": "True",
+            "ROUTER_CLUSTER_BACKEND": "local",
+            "ROUTER_CLUSTER_HUB_PATH": hub_path,
+        }
+
+    # workers import the app on their own, nothing is shared by forking
+    context = multiprocessing.get_context("spawn")
+
+    def start_worker(index: int) -> multiprocessing.Process:
+        env = {
+            **cluster_env,
+            "ROUTER_NODE_ID": f"{app_settings.ROUTER_NODE_ID}-{index}",
+        }
+        process = context.Process(
+            target=run_worker, args=(args, env), name=f"router-worker-{index}"
+        )
+        process.start()
+        return process
+
+    workers: List[multiprocessing.Process] = [
+        start_worker(index) for index in range(args.workers)
+    ]
+    stopping = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+
+    while not stopping.wait(timeout=1.0):
+        for index, process in enumerate(workers):
+            if not process.is_alive():
+                logging.warning(
+                    f"Router worker {index} exited with {process.exitcode}, restarting it"
+                )
+                workers[index] = start_worker(index)
+
+    for process in workers:
+        process.terminate()
+    deadline = time.monotonic() + 30
+    for process in workers:
+        process.join(timeout=max(deadline - time.monotonic(), 0))
+        if process.is_alive():
+            process.kill()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--workers", type=int, default=app_settings.ROUTER_WORKERS)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--log-level", default="info")
+    # same variables as the uvicorn command line
+    parser.add_argument(
+        "--ws-ping-interval",
+        type=float,
+        default=float(os.environ.get("UVICORN_WS_PING_INTERVAL", 20.0)),
+    )
+    parser.add_argument(
+        "--ws-ping-timeout",
+        type=float,
+        default=float(os.environ.get("UVICORN_WS_PING_TIMEOUT", 20.0)),
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        supervise(args)
+    else:
+        run_worker(args, {})
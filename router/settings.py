@@ -1,4 +1,8 @@
 from functools import lru_cache
+from typing import Literal
+from uuid import uuid4
+
+from utils.enums import BalancingPolicy, OverflowPolicy
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -20,6 +24,123 @@ class Settings(BaseSettings):
         alias="MASTER_BE_API_KEY",
     )
 
+    # Agent JWTs are verified with the key the backend signs them with
+    SECRET_KEY: str = Field(
+        default="c41302ce0f1758f4ae5dcc65729fd50a", alias="SECRET_KEY"
+    )
+    HASH_ALGORITHM: str = Field(default="HS256", alias="HASH_ALGORITHM")
+    ROUTER_VERIFY_AGENT_JWT: bool = Field(
+        default=False, alias="ROUTER_VERIFY_AGENT_JWT"
+    )
+    ROUTER_JWT_CACHE_SIZE: int = Field(default=10_000, alias="ROUTER_JWT_CACHE_SIZE")
+
+    # Cluster mode: several router nodes sharing one presence registry
+    ROUTER_CLUSTER_MODE: bool = Field(default=False, alias="ROUTER_CLUSTER_MODE")
+    ROUTER_CLUSTER_BACKEND: Literal["memory", "redis", "local"] = Field(
+        default="redis", alias="ROUTER_CLUSTER_BACKEND"
+    )
+    ROUTER_NODE_ID: str = Field(
+        default_factory=lambda: str(uuid4()), alias="ROUTER_NODE_ID"
+    )
+    ROUTER_REDIS_URI: str = Field(
+        default="redis://genai-redis:6379/1", alias="ROUTER_REDIS_URI"
+    )
+    ROUTER_PRESENCE_TTL_SECONDS: int = Field(
+        default=30, alias="ROUTER_PRESENCE_TTL_SECONDS"
+    )
+    # Unix socket of the hub connecting the workers started by `serve.py`
+    ROUTER_CLUSTER_HUB_PATH: str = Field(
+        default="/tmp/genai-router-hub.sock", alias="ROUTER_CLUSTER_HUB_PATH"
+    )
+    # Worker processes started by `serve.py`
+    ROUTER_WORKERS: int = Field(default=1, alias="ROUTER_WORKERS")
+
+    # Outbound send queue of every connection
+    ROUTER_SEND_QUEUE_SIZE: int = Field(default=1000, alias="ROUTER_SEND_QUEUE_SIZE")
+    ROUTER_SEND_BLOCK_TIMEOUT_SECONDS: float = Field(
+        default=5.0, alias="ROUTER_SEND_BLOCK_TIMEOUT_SECONDS"
+    )
+    ROUTER_LOG_OVERFLOW_POLICY: OverflowPolicy = Field(
+        default=OverflowPolicy.DROP, alias="ROUTER_LOG_OVERFLOW_POLICY"
+    )
+    ROUTER_INVOKE_OVERFLOW_POLICY: OverflowPolicy = Field(
+        default=OverflowPolicy.REJECT, alias="ROUTER_INVOKE_OVERFLOW_POLICY"
+    )
+    ROUTER_DEFAULT_OVERFLOW_POLICY: OverflowPolicy = Field(
+        default=OverflowPolicy.BLOCK, alias="ROUTER_DEFAULT_OVERFLOW_POLICY"
+    )
+
+    # Route envelope frames by their header only, without decoding the body
+    ROUTER_ENVELOPE_ROUTING: bool = Field(default=True, alias="ROUTER_ENVELOPE_ROUTING")
+
+    # How invocations are spread across replicas of the same agent
+    ROUTER_BALANCING_POLICY: BalancingPolicy = Field(
+        default=BalancingPolicy.ROUND_ROBIN, alias="ROUTER_BALANCING_POLICY"
+    )
+
+    # Deadline of invocations that do not carry their own `timeout`
+    ROUTER_INVOCATION_TIMEOUT_SECONDS: float = Field(
+        default=600.0, alias="ROUTER_INVOCATION_TIMEOUT_SECONDS"
+    )
+    ROUTER_TIMER_WHEEL_TICK_SECONDS: float = Field(
+        default=1.0, alias="ROUTER_TIMER_WHEEL_TICK_SECONDS"
+    )
+
+    # Demotes per-frame payload logging from INFO to sampled DEBUG
+    ROUTER_SAMPLED_PAYLOAD_LOGGING: bool = Field(
+        default=False, alias="ROUTER_SAMPLED_PAYLOAD_LOGGING"
+    )
+    ROUTER_PAYLOAD_LOG_SAMPLE_RATE: float = Field(
+        default=0.01, alias="ROUTER_PAYLOAD_LOG_SAMPLE_RATE"
+    )
+
+    # Agent logs are forwarded to Master BE in batches
+    ROUTER_LOG_BATCHING: bool = Field(default=True, alias="ROUTER_LOG_BATCHING")
+    ROUTER_LOG_BATCH_SIZE: int = Field(default=100, alias="ROUTER_LOG_BATCH_SIZE")
+    ROUTER_LOG_BATCH_DELAY_SECONDS: float = Field(
+        default=0.05, alias="ROUTER_LOG_BATCH_DELAY_SECONDS"
+    )
+
+    # Clients connecting with `x-genai-heartbeat: 1` are pinged when idle and evicted
+    # after missing pongs, the timeout adapts to the measured round trip time
+    ROUTER_HEARTBEAT_INTERVAL_SECONDS: float = Field(
+        default=2.0, alias="ROUTER_HEARTBEAT_INTERVAL_SECONDS"
+    )
+    ROUTER_HEARTBEAT_MIN_TIMEOUT_SECONDS: float = Field(
+        default=1.0, alias="ROUTER_HEARTBEAT_MIN_TIMEOUT_SECONDS"
+    )
+    ROUTER_HEARTBEAT_MAX_TIMEOUT_SECONDS: float = Field(
+        default=10.0, alias="ROUTER_HEARTBEAT_MAX_TIMEOUT_SECONDS"
+    )
+    ROUTER_HEARTBEAT_MAX_MISSED: int = Field(
+        default=2, alias="ROUTER_HEARTBEAT_MAX_MISSED"
+    )
+
+    # Admission control of invocations, rate limits are token buckets refilled with
+    # the given amount of invocations per second, 0 disables a limit
+    ROUTER_CALLER_RATE_LIMIT: float = Field(default=0, alias="ROUTER_CALLER_RATE_LIMIT")
+    ROUTER_CALLER_BURST: int = Field(default=20, alias="ROUTER_CALLER_BURST")
+    ROUTER_CALLER_MAX_IN_FLIGHT: int = Field(
+        default=0, alias="ROUTER_CALLER_MAX_IN_FLIGHT"
+    )
+    ROUTER_AGENT_RATE_LIMIT: float = Field(default=0, alias="ROUTER_AGENT_RATE_LIMIT")
+    ROUTER_AGENT_BURST: int = Field(default=50, alias="ROUTER_AGENT_BURST")
+    ROUTER_AGENT_MAX_IN_FLIGHT: int = Field(
+        default=0, alias="ROUTER_AGENT_MAX_IN_FLIGHT"
+    )
+    ROUTER_IN_FLIGHT_RETRY_AFTER_SECONDS: float = Field(
+        default=1.0, alias="ROUTER_IN_FLIGHT_RETRY_AFTER_SECONDS"
+    )
+
+    # Invocations of an agent that disconnected are held until it reconnects, the
+    # backend only learns about the disconnect after the grace period; 0 disables it
+    ROUTER_RECONNECT_GRACE_SECONDS: float = Field(
+        default=0.0, alias="ROUTER_RECONNECT_GRACE_SECONDS"
+    )
+    ROUTER_REPLAY_BUFFER_SIZE: int = Field(
+        default=100, alias="ROUTER_REPLAY_BUFFER_SIZE"
+    )
+
 
 @lru_cache
 def get_settings() -> Settings:
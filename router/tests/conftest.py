@@ -0,0 +1,65 @@
+import asyncio
+from typing import List
+
+import pytest
+import pytest_asyncio
+
+from connectors.ws_connector_manager import WSConnectionManager
+
+
+class FakeWebSocket:
+    """
+    Stand-in for an accepted Starlette WebSocket recording the frames written to it.
+    Writes wait while `writable` is cleared, like a consumer that stopped reading.
+    """
+
+    def __init__(self, headers: dict | None = None, fail: bool = False):
+        self.headers = headers or {}
+        self.sent: List[str] = []
+        self.fail = fail
+        self.closed = False
+        self.writable = asyncio.Event()
+        self.writable.set()
+
+    async def accept(self) -> None:
+        pass
+
+    async def close(self, code: int = 1000, reason: str | None = None) -> None:
+        self.closed = True
+
+    async def send_text(self, message: str) -> None:
+        await self.writable.wait()
+        if self.fail:
+            raise ConnectionError("socket is gone")
+        self.sent.append(message)
+
+
+async def wait_until(predicate, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.005)
+
+
+@pytest.fixture
+def fake_websocket():
+    return FakeWebSocket
+
+
+@pytest.fixture
+def eventually():
+    return wait_until
+
+
+@pytest_asyncio.fixture
+async def manager():
+    """
+    Connection manager of a single router node, its background tasks are started.
+    """
+    manager = WSConnectionManager()
+    await manager.start()
+    yield manager
+    for pool in manager.active_connections.values():
+        for connection in pool.replicas:
+            await connection.close()
+    await manager.stop()
@@ -0,0 +1,68 @@
+import dataclasses
+import time
+
+import jwt
+
+from connectors.auth import AgentJWTVerifier
+
+SECRET_KEY = "c41302ce0f1758f4ae5dcc65729fd50a"
+
+
+def sign(secret: str = SECRET_KEY, **claims) -> str:
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+def make_verifier(cache_size: int = 10) -> AgentJWTVerifier:
+    return AgentJWTVerifier(SECRET_KEY, "HS256", cache_size=cache_size)
+
+
+def test_valid_token_yields_the_agent_identity():
+    identity = make_verifier().verify(sign(sub="agent-1", user_id="user-1"))
+    assert identity.agent_id == "agent-1"
+    assert identity.user_id == "user-1"
+    assert identity.expires_at == float("inf")
+
+
+def test_invalid_tokens_are_rejected():
+    verifier = make_verifier()
+    assert verifier.verify(sign(secret="0" * 32, sub="agent-1")) is None
+    assert verifier.verify(sign(sub="agent-1", exp=int(time.time()) - 10)) is None
+    assert verifier.verify(sign(user_id="user-1")) is None
+    assert verifier.verify("not-a-jwt") is None
+
+
+def test_verified_tokens_are_cached():
+    verifier = make_verifier()
+    token = sign(sub="agent-1", user_id="user-1")
+    identity = verifier.verify(token)
+
+    verifier.secret_key = "1" * 32  # a cache hit skips the signature check
+    assert verifier.verify(token) is identity
+
+
+def test_expired_cache_entries_are_verified_again():
+    verifier = make_verifier()
+    token = sign(sub="agent-1", exp=int(time.time()) + 1)
+    assert verifier.verify(token)
+
+    # let the cached identity expire without waiting for it
+    key = next(iter(verifier._cache))
+    verifier._cache[key] = dataclasses.replace(
+        verifier._cache[key], expires_at=time.time() - 1
+    )
+    verifier.secret_key = "1" * 32
+    assert verifier.verify(token) is None
+    assert not verifier._cache
+
+
+def test_cache_evicts_the_least_recently_used_token():
+    verifier = make_verifier(cache_size=2)
+    first, second, third = (sign(sub=f"agent-{i}") for i in range(3))
+    verifier.verify(first)
+    verifier.verify(second)
+    verifier.verify(first)
+    verifier.verify(third)
+
+    verifier.secret_key = "1" * 32
+    assert verifier.verify(first) is not None
+    assert verifier.verify(second) is None
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+import uvicorn
+
+from benchmarks.throughput import free_port, percentile, run_case
+from main import app
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 50) is None
+
+
+@pytest.mark.asyncio
+async def test_throughput_benchmark_smoke_run():
+    """A short run against the in-process router completes invocations without errors"""
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        result = await run_case(
+            url=f"ws://127.0.0.1:{port}/ws",
+            agents=1,
+            callers=2,
+            payload_size=16,
+            duration=0.3,
+            warmup=0,
+            connection_per_call=False,
+        )
+    finally:
+        server.should_exit = True
+        await server_task
+
+    assert result.invocations > 0
+    assert result.errors == 0
+    assert result.latency_ms["p50"] <= result.latency_ms["max"]
@@ -0,0 +1,79 @@
+import json
+import time
+
+import pytest
+
+from connectors.tracker import timeout_until
+from utils.enums import ErrorType
+
+
+def test_timeout_until_takes_whichever_ends_first():
+    assert timeout_until(None) is None
+    assert timeout_until(None, 5.0) == 5.0
+    assert timeout_until(time.time() + 100, 5.0) == 5.0
+    assert timeout_until(time.time() + 2) == pytest.approx(2.0, abs=0.1)
+    assert timeout_until(str(time.time() + 2), 5.0) == pytest.approx(2.0, abs=0.1)
+    assert timeout_until(time.time() - 1, 5.0) < 0
+
+
+def invoke(**fields) -> str:
+    return json.dumps(
+        {"message_type": "agent_invoke", "agent_uuid": "agent-1", **fields}
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {"request_metadata": {"deadline": 1.0}, "request_payload": {}},
+        {"request_payload": {"deadline": 1.0}},
+    ],
+)
+async def test_invocation_past_its_deadline_is_not_sent(
+    manager, fake_websocket, eventually, fields
+):
+    agent_socket = fake_websocket({"x-custom-authorization": "agent-1"})
+    caller_socket = fake_websocket({"x-custom-authorization": "caller-1"})
+    await manager.connect(agent_socket)
+    await manager.connect(caller_socket)
+
+    await manager.process_message("caller-1", invoke(**fields), agent_jwt="caller-1")
+    await eventually(lambda: caller_socket.sent)
+    error = json.loads(caller_socket.sent[0])["error"]
+    assert error["error_type"] == ErrorType.AGENT_TIMEOUT.value
+    assert error["agent_uuid"] == "agent-1"
+    assert not agent_socket.sent
+    assert len(manager.tracker) == 0
+    assert manager.metrics.invocations_expired.values[()] == 1
+
+
+@pytest.mark.asyncio
+async def test_invocation_expires_with_its_request_deadline(
+    manager, fake_websocket, eventually
+):
+    agent_socket = fake_websocket({"x-custom-authorization": "agent-1"})
+    caller_socket = fake_websocket({"x-custom-authorization": "caller-1"})
+    await manager.connect(agent_socket)
+    await manager.connect(caller_socket)
+
+    deadline = time.time() + 30
+    await manager.process_message(
+        "caller-1",
+        invoke(request_metadata={"deadline": deadline}, request_payload={}),
+        agent_jwt="caller-1",
+    )
+    await eventually(lambda: agent_socket.sent)
+    assert json.loads(agent_socket.sent[0])["request_metadata"]["deadline"] == deadline
+    (invocation,) = manager.tracker.pending.values()
+    assert invocation.deadline == pytest.approx(time.monotonic() + 30, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_invoke_and_wait_past_its_deadline(manager, fake_websocket):
+    await manager.connect(fake_websocket({"x-custom-authorization": "agent-1"}))
+    response = await manager.invoke_and_wait(
+        "agent-1", {}, request_metadata={"deadline": time.time() - 1}
+    )
+    assert response["error"]["error_type"] == ErrorType.AGENT_TIMEOUT.value
+    assert len(manager.tracker) == 0
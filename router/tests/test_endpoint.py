@@ -0,0 +1,39 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+
+
+def test_socket_is_released_when_routing_fails(monkeypatch):
+    async def process_message(*args, **kwargs):
+        raise RuntimeError("routing failed")
+
+    monkeypatch.setattr(main.ws_connection_manager, "process_message", process_message)
+    with TestClient(app) as client:
+        try:
+            with client.websocket_connect(
+                "/ws", headers={"x-custom-authorization": "agent-1"}
+            ) as websocket:
+                assert "agent-1" in main.ws_connection_manager.active_connections
+                websocket.send_text(json.dumps({"message_type": "agent_log"}))
+                websocket.receive_text()
+        except RuntimeError:
+            pass
+        assert "agent-1" not in main.ws_connection_manager.active_connections
+
+
+def test_frames_with_invalid_message_types_are_counted_as_unknown():
+    with TestClient(app) as client:
+        with client.websocket_connect(
+            "/ws", headers={"x-custom-authorization": "agent-1"}
+        ) as websocket:
+            for message_type in ({"x": 1}, "made-up"):
+                websocket.send_text(json.dumps({"message_type": message_type}))
+                assert "AgentGeneralError" in websocket.receive_text()
+            # the socket is still served after both frames
+            websocket.send_text("not json")
+            assert "Invalid JSON format" in websocket.receive_text()
+        metrics = client.get("/metrics").text
+    assert 'direction="received",message_type="unknown"} 3.0' in metrics
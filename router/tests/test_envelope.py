@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from utils.envelope import (
+    EnvelopeFormatError,
+    decode_envelope,
+    encode_envelope,
+    envelope_to_json,
+    is_envelope,
+    splice_fields,
+)
+
+
+def test_envelope_round_trip_keeps_the_body_untouched():
+    body = '{"request_payload": {"text": "caf\\u00e9"}, "a": [1, 2]}'
+    frame = encode_envelope({"message_type": "agent_invoke", "agent_uuid": "a1"}, body)
+
+    assert is_envelope(frame)
+    assert not is_envelope(body)
+    header, decoded_body = decode_envelope(frame)
+    assert header == {"message_type": "agent_invoke", "agent_uuid": "a1"}
+    assert decoded_body == body
+
+
+def test_envelope_without_body_decodes_to_empty_object():
+    header, body = decode_envelope(encode_envelope({"message_type": "x"}, ""))
+    assert header == {"message_type": "x"}
+    assert body == "{}"
+
+
+@pytest.mark.parametrize("header", ["not json", "[1, 2]"])
+def test_invalid_envelope_header_is_rejected(header):
+    with pytest.raises(EnvelopeFormatError):
+        decode_envelope(f"\x1e{header}\n{{}}")
+
+
+def test_spliced_fields_win_over_duplicates():
+    spliced = splice_fields('{"invoked_by": "forged", "x": 1}', {"invoked_by": "a:1"})
+    assert json.loads(spliced) == {"invoked_by": "a:1", "x": 1}
+
+
+def test_splice_into_empty_object_and_without_fields():
+    assert json.loads(splice_fields(" {} ", {"a": 1})) == {"a": 1}
+    assert splice_fields(' {"a": 1} ', {}) == '{"a": 1}'
+
+
+def test_splice_rejects_non_object_body():
+    with pytest.raises(EnvelopeFormatError):
+        splice_fields("[1]", {"a": 1})
+
+
+def test_envelope_to_json_merges_header_into_body():
+    frame = encode_envelope({"invoked_by": "caller"}, '{"response": 42}')
+    assert json.loads(envelope_to_json(frame)) == {
+        "response": 42,
+        "invoked_by": "caller",
+    }
+    assert json.loads(envelope_to_json(frame, header={})) == {"response": 42}
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from connectors.heartbeat import HeartbeatMonitor, Liveness
+
+
+class FakeConnection:
+    def __init__(self, websocket):
+        self.websocket = websocket
+
+
+def make_liveness(websocket=None):
+    return Liveness("client", FakeConnection(websocket or object()))
+
+
+def test_first_sample_seeds_the_estimate():
+    liveness = make_liveness()
+    liveness.observe_rtt(0.2)
+    assert liveness.srtt == pytest.approx(0.2)
+    assert liveness.rttvar == pytest.approx(0.1)
+
+
+def test_samples_are_smoothed():
+    liveness = make_liveness()
+    liveness.observe_rtt(0.2)
+    liveness.observe_rtt(0.6)
+    assert liveness.rttvar == pytest.approx(0.75 * 0.1 + 0.25 * 0.4)
+    assert liveness.srtt == pytest.approx(0.875 * 0.2 + 0.125 * 0.6)
+
+
+def test_timeout_follows_the_estimate_within_bounds():
+    liveness = make_liveness()
+    assert liveness.timeout(1.0, 30.0) == 30.0
+    liveness.observe_rtt(0.01)
+    assert liveness.timeout(1.0, 30.0) == 1.0
+    liveness.observe_rtt(100.0)
+    assert liveness.timeout(1.0, 30.0) == 30.0
+    liveness.srtt, liveness.rttvar = 2.0, 0.5
+    assert liveness.timeout(1.0, 30.0) == pytest.approx(4.0)
+
+
+def test_only_the_pending_ping_is_measured():
+    monitor = HeartbeatMonitor(
+        interval=1.0, min_timeout=1.0, max_timeout=5.0, max_missed=2
+    )
+    websocket = object()
+    monitor.watch("client", FakeConnection(websocket))
+    liveness = monitor.watched[websocket]
+    liveness.ping_id, liveness.ping_sent_at = "ping", 0.0
+
+    monitor.pong(websocket, "stale")
+    assert liveness.srtt is None
+
+    monitor.pong(websocket, "ping")
+    assert liveness.srtt is not None
+    assert liveness.ping_id is None
+    assert list(monitor.round_trip_times()) == [(liveness, liveness.srtt)]
+
+
+@pytest.mark.asyncio
+async def test_unresponsive_client_is_pinged_then_evicted(eventually):
+    monitor = HeartbeatMonitor(
+        interval=0.02, min_timeout=0.02, max_timeout=0.05, max_missed=2
+    )
+    pings, evicted = [], []
+
+    async def send_ping(liveness):
+        pings.append(liveness.ping_id)
+        return True
+
+    async def evict(liveness):
+        evicted.append(liveness.client_id)
+
+    websocket = object()
+    monitor.watch("client", FakeConnection(websocket))
+    monitor.start(send_ping, evict)
+    try:
+        await eventually(lambda: evicted)
+    finally:
+        await monitor.stop()
+
+    assert evicted == ["client"]
+    assert len(pings) == 2
+    assert websocket not in monitor.watched
+
+
+@pytest.mark.asyncio
+async def test_answering_client_is_kept(eventually):
+    monitor = HeartbeatMonitor(
+        interval=0.02, min_timeout=0.02, max_timeout=0.05, max_missed=2
+    )
+    websocket = object()
+    evicted = []
+
+    async def send_ping(liveness):
+        monitor.received(websocket)
+        monitor.pong(websocket, liveness.ping_id)
+        return True
+
+    async def evict(liveness):
+        evicted.append(liveness.client_id)
+
+    monitor.watch("client", FakeConnection(websocket))
+    monitor.start(send_ping, evict)
+    try:
+        await eventually(lambda: monitor.watched[websocket].srtt is not None)
+        await asyncio.sleep(0.2)
+    finally:
+        await monitor.stop()
+
+    assert not evicted
+    assert websocket in monitor.watched
@@ -0,0 +1,79 @@
+import pytest
+
+from connectors.limiter import AdmissionController, RateLimiter, admission_key
+from settings import get_settings
+from utils.enums import ErrorType
+
+app_settings = get_settings()
+
+
+def make_admission(**limits):
+    return AdmissionController(
+        **{
+            "caller_rate": 0,
+            "caller_burst": 1,
+            "caller_max_in_flight": 0,
+            "agent_rate": 0,
+            "agent_burst": 1,
+            "agent_max_in_flight": 0,
+            "in_flight_retry_after": 0.5,
+            **limits,
+        }
+    )
+
+
+def test_invoke_sessions_are_limited_with_their_caller():
+    assert admission_key("agent-1") == "agent-1"
+    assert admission_key("caller:agent-2:session") == "caller"
+    assert admission_key("user:key:agent-2:session") == "user:key"
+
+
+def test_bucket_allows_a_burst_then_refills():
+    limiter = RateLimiter(rate=2, burst=2)
+    for _ in range(2):
+        assert limiter.retry_after("caller", now=0.0) == 0.0
+        limiter.consume("caller", now=0.0)
+    assert limiter.retry_after("caller", now=0.0) == pytest.approx(0.5)
+    assert limiter.retry_after("caller", now=0.5) == 0.0
+
+
+def test_least_recently_used_bucket_is_dropped():
+    limiter = RateLimiter(rate=1, burst=1, max_keys=2)
+    limiter.consume("a", now=0.0)
+    limiter.consume("b", now=0.0)
+    limiter.retry_after("a", now=0.0)
+    limiter.consume("c", now=0.0)
+    assert list(limiter._buckets) == ["a", "c"]
+
+
+def test_rejected_invocation_takes_no_token():
+    admission = make_admission(caller_rate=1, agent_rate=1, agent_burst=2)
+    assert admission.admit("caller", "agent", 0, 0, now=0.0) is None
+    assert admission.admit("caller", "agent", 0, 0, now=0.0) == pytest.approx(1.0)
+    # the agent bucket kept its second token for another caller
+    assert admission.admit("other", "agent", 0, 0, now=0.0) is None
+
+
+def test_in_flight_limits():
+    admission = make_admission(caller_max_in_flight=2, agent_max_in_flight=3)
+    assert admission.admit("caller", "agent", 1, 2, now=0.0) is None
+    assert admission.admit("caller", "agent", 2, 0, now=0.0) == 0.5
+    assert admission.admit("caller", "agent", 0, 3, now=0.0) == 0.5
+    # exempt callers are only limited per agent
+    assert admission.admit(None, "agent", 100, 0, now=0.0) is None
+
+
+@pytest.mark.asyncio
+async def test_master_sessions_are_exempt_from_caller_limits(manager):
+    manager.admission = make_admission(caller_rate=1)
+    for caller in (
+        f"{app_settings.MASTER_BE_API_KEY}:agent:session",
+        f"{app_settings.MASTER_AGENT_API_KEY}:agent:session",
+    ):
+        for _ in range(3):
+            assert manager._admit(caller, "agent") is None
+
+    assert manager._admit("user:agent:session", "agent") is None
+    rejection = manager._admit("user:agent:other-session", "agent")
+    assert rejection["error"]["error_type"] == ErrorType.AGENT_RATE_LIMITED.value
+    assert manager.metrics.invocations_rate_limited.values[()] == 1
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from connectors.log_batcher import LogBatcher
+
+
+class Destination:
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, destination: str, entries: list) -> None:
+        if self.fail:
+            raise ConnectionError("backend is gone")
+        self.batches.append((destination, entries))
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_flushed_right_away():
+    sink = Destination()
+    batcher = LogBatcher(flush=sink, max_batch_size=3, max_delay=60)
+    for i in range(4):
+        await batcher.add("backend", {"i": i})
+
+    assert sink.batches == [("backend", [{"i": 0}, {"i": 1}, {"i": 2}])]
+    await batcher.stop()
+    assert sink.batches[-1] == ("backend", [{"i": 3}])
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_is_flushed_after_the_delay(eventually):
+    sink = Destination()
+    batcher = LogBatcher(flush=sink, max_batch_size=100, max_delay=0.02)
+    await batcher.add("a", {"i": 0})
+    await batcher.add("b", {"i": 1})
+    await batcher.add("a", {"i": 2})
+    assert sink.batches == []
+
+    await eventually(lambda: len(sink.batches) == 2)
+    assert dict(sink.batches) == {"a": [{"i": 0}, {"i": 2}], "b": [{"i": 1}]}
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_logged_and_dropped():
+    batcher = LogBatcher(flush=Destination(fail=True), max_batch_size=1, max_delay=1)
+    await batcher.add("backend", {"i": 0})
+    await asyncio.sleep(0)
+    await batcher.stop()
@@ -0,0 +1,90 @@
+from utils.enums import ConnectionClass
+from utils.metrics import (
+    Counter,
+    Histogram,
+    RouterMetrics,
+    client_label,
+    message_type_label,
+    render_gauge,
+)
+
+
+def test_counter_renders_labelled_series():
+    counter = Counter("frames_total", "Frames.", ("direction",))
+    counter.inc("sent")
+    counter.inc("sent", amount=2)
+    counter.inc('quo"te')
+
+    assert counter.render() == [
+        "# HELP frames_total Frames.",
+        "# TYPE frames_total counter",
+        'frames_total{direction="sent"} 3.0',
+        'frames_total{direction="quo\\"te"} 1.0',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3):
+        histogram.observe(value)
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_sum 4.25" in lines
+    assert "latency_seconds_count 4" in lines
+
+
+def test_render_gauge_without_labels():
+    assert render_gauge("pending", "Pending.", (), [((), 3)])[-1] == "pending 3"
+
+
+def test_router_metrics_render_counts_received_frames():
+    metrics = RouterMetrics()
+    metrics.received("agent_invoke", 10, 0.001)
+    metrics.received(None, 5, 0.001)
+    metrics.sent("agent_invoke", 10, direction="forwarded")
+
+    rendered = metrics.render()
+    assert (
+        'router_messages_total{direction="received",message_type="agent_invoke"} 1.0'
+        in rendered
+    )
+    assert (
+        'router_messages_total{direction="received",message_type="unknown"} 1.0'
+        in rendered
+    )
+    assert (
+        'router_message_bytes_total{direction="forwarded",message_type="agent_invoke"} 10.0'
+        in rendered
+    )
+    assert rendered.endswith("\n")
+
+
+def test_message_type_label_is_bounded_to_known_types():
+    assert message_type_label("agent_invoke") == "agent_invoke"
+    for message_type in ({"x": 1}, ["agent_invoke"], 5, None, "made-up"):
+        assert message_type_label(message_type) == "unknown"
+
+    metrics = RouterMetrics()
+    metrics.received({"x": 1}, 5, 0.001)
+    metrics.sent("made-up", 5)
+    assert set(metrics.messages.values) == {
+        ("received", "unknown"),
+        ("sent", "unknown"),
+    }
+
+
+def test_client_label_hides_ids_of_non_agent_clients():
+    assert client_label("agent-1", ConnectionClass.AGENT) == "agent-1"
+
+    label = client_label("secret-key:agent-1:abc", ConnectionClass.INVOKE_SESSION)
+    assert label.startswith("invoke_session:")
+    assert "secret-key" not in label
+    assert label == client_label(
+        "secret-key:agent-1:abc", ConnectionClass.INVOKE_SESSION
+    )
+    assert label != client_label(
+        "secret-key:agent-1:def", ConnectionClass.INVOKE_SESSION
+    )
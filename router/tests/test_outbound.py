@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from connectors.outbound import OutboundConnection
+from utils.enums import EnqueueResult, OverflowPolicy, TrafficClass, WSMessageType
+from utils.metrics import RouterMetrics
+
+INVOKE = WSMessageType.AGENT_INVOKE.value
+RESPONSE = WSMessageType.AGENT_RESPONSE.value
+LOG = WSMessageType.AGENT_LOG.value
+
+
+def make_connection(websocket, max_queue_size=10, block_timeout=0.05, **policies):
+    return OutboundConnection(
+        client_id="client",
+        websocket=websocket,
+        max_queue_size=max_queue_size,
+        overflow_policies={None: OverflowPolicy.BLOCK, **policies},
+        block_timeout=block_timeout,
+        metrics=RouterMetrics(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_frames_of_one_lane_are_written_in_order(fake_websocket, eventually):
+    websocket = fake_websocket()
+    connection = make_connection(websocket)
+    connection.start()
+    for i in range(5):
+        assert await connection.enqueue(f"frame-{i}", INVOKE) == EnqueueResult.ACCEPTED
+
+    await eventually(lambda: len(websocket.sent) == 5)
+    assert websocket.sent == [f"frame-{i}" for i in range(5)]
+    assert connection.depth == 0
+    await connection.close()
+
+
+@pytest.mark.asyncio
+async def test_overflow_policies(fake_websocket):
+    """A full queue rejects, drops or blocks frames according to their message type"""
+    connection = make_connection(
+        fake_websocket(),
+        max_queue_size=1,
+        **{INVOKE: OverflowPolicy.REJECT, RESPONSE: OverflowPolicy.DROP},
+    )
+    assert await connection.enqueue("first", RESPONSE) == EnqueueResult.ACCEPTED
+
+    assert await connection.enqueue("invoke", INVOKE) == EnqueueResult.REJECTED
+    assert await connection.enqueue("response", RESPONSE) == EnqueueResult.DROPPED
+    # the writer is not running, so a blocking frame times out
+    assert await connection.enqueue("other", None) == EnqueueResult.DROPPED
+    assert (connection.rejected, connection.dropped) == (1, 2)
+    assert connection.depth == 1
+
+
+@pytest.mark.asyncio
+async def test_blocking_frame_waits_for_free_space(fake_websocket, eventually):
+    websocket = fake_websocket()
+    websocket.writable.clear()
+    connection = make_connection(websocket, max_queue_size=1, block_timeout=2)
+    connection.start()
+    await connection.enqueue("first", None)
+    await eventually(lambda: connection.depth == 0)  # taken by the stalled writer
+    await connection.enqueue("second", None)
+
+    pending = asyncio.create_task(connection.enqueue("third", None))
+    await asyncio.sleep(0.05)
+    assert not pending.done()
+
+    websocket.writable.set()
+    assert await pending == EnqueueResult.ACCEPTED
+    await eventually(lambda: len(websocket.sent) == 3)
+    await connection.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_evicts_the_oldest_log_first(fake_websocket):
+    connection = make_connection(
+        fake_websocket(), max_queue_size=2, **{INVOKE: OverflowPolicy.REJECT}
+    )
+    await connection.enqueue("log-1", LOG)
+    await connection.enqueue("log-2", LOG)
+
+    assert await connection.enqueue("invoke", INVOKE) == EnqueueResult.ACCEPTED
+    assert connection.lane_depths()[TrafficClass.TELEMETRY] == 1
+    assert connection.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_closed_connection_drops_frames(fake_websocket):
+    connection = make_connection(fake_websocket())
+    connection.start()
+    await connection.close()
+    assert await connection.enqueue("frame", INVOKE) == EnqueueResult.DROPPED
+    assert connection.depth == 0
+
+
+@pytest.mark.asyncio
+async def test_write_failure_stops_the_writer(fake_websocket, eventually):
+    connection = make_connection(fake_websocket(fail=True))
+    connection.start()
+    await connection.enqueue("frame", INVOKE)
+    await eventually(lambda: connection.closed)
+    assert connection.depth == 0
+    await connection.close()
+
+
+@pytest.mark.asyncio
+async def test_responses_overtake_queued_logs(fake_websocket, eventually):
+    websocket = fake_websocket()
+    connection = make_connection(websocket)
+    for i in range(3):
+        await connection.enqueue(f"log-{i}", LOG)
+    await connection.enqueue("response", RESPONSE)
+    await connection.enqueue("invoke", INVOKE)
+
+    connection.start()
+    await eventually(lambda: len(websocket.sent) == 5)
+    assert websocket.sent == ["response", "invoke", "log-0", "log-1", "log-2"]
+    await connection.close()
+
+
+@pytest.mark.asyncio
+async def test_weighted_lanes_never_starve_lower_classes(fake_websocket, eventually):
+    """A response burst lets one log through after every 8 responses"""
+    websocket = fake_websocket()
+    connection = make_connection(websocket, max_queue_size=100)
+    for i in range(20):
+        await connection.enqueue(f"response-{i}", RESPONSE)
+    for i in range(2):
+        await connection.enqueue(f"log-{i}", LOG)
+
+    connection.start()
+    await eventually(lambda: len(websocket.sent) == 22)
+    assert websocket.sent.index("log-0") == 8
+    assert websocket.sent.index("log-1") == 17
+    await connection.close()
+
+
+@pytest.mark.asyncio
+async def test_lane_depths_by_traffic_class(fake_websocket):
+    connection = make_connection(fake_websocket())
+    await connection.enqueue("ping", WSMessageType.ROUTER_PING.value)
+    await connection.enqueue("register", WSMessageType.AGENT_REGISTER.value)
+
+    depths = connection.lane_depths()
+    assert depths[TrafficClass.RESPONSE] == 1
+    assert depths[TrafficClass.CONTROL] == 1
+    assert connection.depth == 2
@@ -0,0 +1,59 @@
+import pytest
+
+from connectors.outbound import OutboundConnection
+from connectors.pool import ReplicaPool
+from utils.enums import BalancingPolicy, OverflowPolicy
+
+
+def make_pool(policy, fake_websocket, replicas=3):
+    pool = ReplicaPool("agent-1", policy)
+    for _ in range(replicas):
+        pool.add(
+            OutboundConnection(
+                client_id="agent-1",
+                websocket=fake_websocket(),
+                max_queue_size=10,
+                overflow_policies={None: OverflowPolicy.DROP},
+                block_timeout=0,
+            )
+        )
+    return pool
+
+
+def test_round_robin_spreads_across_replicas(fake_websocket):
+    pool = make_pool(BalancingPolicy.ROUND_ROBIN, fake_websocket)
+    picked = [pool.pick() for _ in range(6)]
+    assert picked == pool.replicas * 2
+
+
+def test_least_outstanding_picks_the_least_busy_replica(fake_websocket):
+    pool = make_pool(BalancingPolicy.LEAST_OUTSTANDING, fake_websocket)
+    for outstanding, connection in zip((3, 1, 2), pool.replicas):
+        connection.outstanding = outstanding
+    assert pool.pick() is pool.replicas[1]
+
+
+def test_power_of_two_picks_the_less_busy_of_two(fake_websocket):
+    pool = make_pool(BalancingPolicy.POWER_OF_TWO, fake_websocket, replicas=2)
+    pool.replicas[0].outstanding = 5
+    assert all(pool.pick() is pool.replicas[1] for _ in range(10))
+
+
+@pytest.mark.parametrize("policy", list(BalancingPolicy))
+def test_closed_replicas_are_skipped(policy, fake_websocket):
+    pool = make_pool(policy, fake_websocket)
+    pool.replicas[0].closed = True
+    pool.replicas[1].closed = True
+    assert all(pool.pick() is pool.replicas[2] for _ in range(5))
+
+    pool.replicas[2].closed = True
+    assert pool.pick() is None
+
+
+def test_remove_replica_by_socket(fake_websocket):
+    pool = make_pool(BalancingPolicy.ROUND_ROBIN, fake_websocket, replicas=2)
+    first = pool.replicas[0]
+
+    assert pool.remove(first.websocket) is first
+    assert pool.remove(first.websocket) is None
+    assert len(pool) == 1 and pool.get(first.websocket) is None
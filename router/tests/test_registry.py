@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from connectors.registry import (
+    InMemoryClusterHub,
+    InMemoryPresenceRegistry,
+    LocalClusterHub,
+    LocalPresenceRegistry,
+    get_presence_registry,
+)
+from settings import Settings
+
+
+class Inbox:
+    def __init__(self):
+        self.frames = []
+        self.received = asyncio.Event()
+
+    async def __call__(self, client_id: str, message: str) -> None:
+        self.frames.append((client_id, message))
+        self.received.set()
+
+
+@pytest.mark.asyncio
+async def test_in_memory_registry_forwards_to_owner():
+    """A node looks up the owner of a client and forwards the frame to it"""
+    hub = InMemoryClusterHub()
+    node_a = InMemoryPresenceRegistry("a", hub)
+    node_b = InMemoryPresenceRegistry("b", hub)
+    inbox_a, inbox_b = Inbox(), Inbox()
+    await node_a.start(inbox_a)
+    await node_b.start(inbox_b)
+
+    await node_b.register("agent-1")
+    assert await node_a.lookup("agent-1") == "b"
+
+    await node_a.forward("b", "agent-1", "frame")
+    assert inbox_b.frames == [("agent-1", "frame")]
+    assert inbox_a.frames == []
+
+
+@pytest.mark.asyncio
+async def test_in_memory_registry_unregister_keeps_newer_owner():
+    """A node that lost a client to another node does not release its presence"""
+    hub = InMemoryClusterHub()
+    node_a = InMemoryPresenceRegistry("a", hub)
+    node_b = InMemoryPresenceRegistry("b", hub)
+
+    await node_a.register("agent-1")
+    await node_b.register("agent-1")
+    await node_a.unregister("agent-1")
+    assert await node_a.lookup("agent-1") == "b"
+
+    await node_b.unregister("agent-1")
+    assert await node_a.lookup("agent-1") is None
+
+
+@pytest.mark.asyncio
+async def test_in_memory_registry_stop_releases_owned_clients():
+    hub = InMemoryClusterHub()
+    node_a = InMemoryPresenceRegistry("a", hub)
+    node_b = InMemoryPresenceRegistry("b", hub)
+    await node_a.start(Inbox())
+    await node_a.register("agent-1")
+    await node_b.register("agent-2")
+
+    await node_a.stop()
+    assert await node_b.lookup("agent-1") is None
+    assert await node_b.lookup("agent-2") == "b"
+    assert "a" not in hub.nodes
+
+
+@pytest.mark.asyncio
+async def test_local_cluster_hub_replicates_presence_and_forwards(tmp_path, eventually):
+    """Workers of one instance share presence and forward frames through the hub"""
+    hub = LocalClusterHub(str(tmp_path / "hub.sock"))
+    await hub.start()
+    worker_a = LocalPresenceRegistry("a", hub.path)
+    worker_b = LocalPresenceRegistry("b", hub.path)
+    inbox_a, inbox_b = Inbox(), Inbox()
+    await worker_a.start(inbox_a)
+    await worker_b.start(inbox_b)
+    try:
+        await worker_b.register("agent-1")
+        await eventually(lambda: worker_a.presence.get("agent-1") == "b")
+
+        await worker_a.forward("b", "agent-1", "frame")
+        await asyncio.wait_for(inbox_b.received.wait(), timeout=2)
+        assert inbox_b.frames == [("agent-1", "frame")]
+
+        # the presence of a worker that exits is released right away
+        await worker_b.stop()
+        await eventually(lambda: "agent-1" not in worker_a.presence)
+    finally:
+        await worker_a.stop()
+        await hub.stop()
+
+
+def test_get_presence_registry_is_disabled_by_default():
+    assert get_presence_registry(Settings()) is None
+
+
+def test_get_presence_registry_builds_configured_backend():
+    settings = Settings(
+        ROUTER_CLUSTER_MODE=True, ROUTER_CLUSTER_BACKEND="memory", ROUTER_NODE_ID="a"
+    )
+    registry = get_presence_registry(settings)
+    assert isinstance(registry, InMemoryPresenceRegistry)
+    assert registry.node_id == "a"
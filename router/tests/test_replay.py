@@ -0,0 +1,177 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+
+from connectors.registry import InMemoryClusterHub, InMemoryPresenceRegistry
+from connectors.replay import ReplayBuffer
+from connectors.ws_connector_manager import WSConnectionManager
+from settings import get_settings
+
+app_settings = get_settings()
+
+
+class Expired:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, agent_id, frames):
+        self.calls.append((agent_id, frames))
+
+
+def invoke(agent_id: str = "agent-1") -> str:
+    return json.dumps(
+        {
+            "message_type": "agent_invoke",
+            "agent_uuid": agent_id,
+            "request_payload": {"text": "hi"},
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_held_frames_are_released_in_order():
+    buffer = ReplayBuffer(grace_seconds=10, max_frames=2, on_expire=Expired())
+    assert not buffer.add("agent-1", "r0", "frame")
+
+    buffer.hold("agent-1")
+    assert buffer.add("agent-1", "r1", "first")
+    assert buffer.add("agent-1", "r2", "second")
+    assert not buffer.add("agent-1", "r3", "third")
+    assert len(buffer) == 2
+
+    assert buffer.release("agent-1") == [("r1", "first"), ("r2", "second")]
+    assert buffer.release("agent-1") is None
+    await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_grace_period_expires(eventually):
+    expired = Expired()
+    buffer = ReplayBuffer(grace_seconds=0.01, max_frames=2, on_expire=expired)
+    buffer.hold("agent-1")
+    buffer.add("agent-1", "r1", "frame")
+
+    await eventually(lambda: expired.calls)
+    assert expired.calls == [("agent-1", [("r1", "frame")])]
+    assert not buffer.is_held("agent-1")
+    await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_invocations_reach_the_reconnected_agent(
+    manager, fake_websocket, eventually
+):
+    manager.replay.grace_seconds = 10
+    headers = {"x-custom-authorization": "agent-1"}
+    backend_socket = fake_websocket({"api-key": app_settings.MASTER_BE_API_KEY})
+    first = fake_websocket(headers)
+    await manager.connect(backend_socket)
+    await manager.connect(first)
+    await manager.connect(fake_websocket({"x-custom-authorization": "caller-1"}))
+
+    await manager.disconnect("agent-1", first)
+    assert await manager.is_active("agent-1")
+    await manager.process_message("caller-1", invoke(), agent_jwt="caller-1")
+    assert len(manager.replay) == 1
+
+    second = fake_websocket(headers)
+    await manager.connect(second)
+    await eventually(lambda: second.sent)
+    assert json.loads(second.sent[0])["request_payload"] == {"text": "hi"}
+    assert not first.sent
+    assert not any("agent_unregister" in frame for frame in backend_socket.sent)
+
+
+@pytest.mark.asyncio
+async def test_agent_is_released_after_the_grace_period(
+    manager, fake_websocket, eventually
+):
+    manager.replay.grace_seconds = 0.05
+    backend_socket = fake_websocket({"api-key": app_settings.MASTER_BE_API_KEY})
+    agent_socket = fake_websocket({"x-custom-authorization": "agent-1"})
+    caller_socket = fake_websocket({"x-custom-authorization": "caller-1"})
+    await manager.connect(backend_socket)
+    await manager.connect(agent_socket)
+    await manager.connect(caller_socket)
+
+    await manager.disconnect("agent-1", agent_socket)
+    await manager.process_message("caller-1", invoke(), agent_jwt="caller-1")
+
+    await eventually(lambda: caller_socket.sent)
+    assert "Agent is NOT active" in caller_socket.sent[0]
+    await eventually(
+        lambda: any("agent_unregister" in frame for frame in backend_socket.sent)
+    )
+    assert not await manager.is_active("agent-1")
+
+
+@pytest_asyncio.fixture
+async def cluster():
+    """
+    Two router nodes sharing an in-memory presence registry.
+    """
+    hub = InMemoryClusterHub()
+    nodes = [
+        WSConnectionManager(registry=InMemoryPresenceRegistry(node_id, hub))
+        for node_id in ("a", "b")
+    ]
+    for node in nodes:
+        node.replay.grace_seconds = 0.2
+        await node.start()
+    yield nodes
+    for node in nodes:
+        for pool in node.active_connections.values():
+            for connection in pool.replicas:
+                await connection.close()
+        await node.stop()
+
+
+@pytest.mark.asyncio
+async def test_agent_reconnecting_to_another_node(cluster, fake_websocket, eventually):
+    """The node holding the agent hands over to the node it has reconnected to"""
+    node_a, node_b = cluster
+    headers = {"x-custom-authorization": "agent-1"}
+    backend_socket = fake_websocket({"api-key": app_settings.MASTER_BE_API_KEY})
+    first = fake_websocket(headers)
+    caller_socket = fake_websocket({"x-custom-authorization": "caller-1"})
+    await node_a.connect(backend_socket)
+    await node_a.connect(first)
+    await node_a.connect(caller_socket)
+
+    await node_a.disconnect("agent-1", first)
+    await node_a.process_message("caller-1", invoke(), agent_jwt="caller-1")
+    second = fake_websocket(headers)
+    await node_b.connect(second)
+
+    # the held invocation is failed, the next one is forwarded to node b
+    await node_a.process_message("caller-1", invoke(), agent_jwt="caller-1")
+    await eventually(lambda: caller_socket.sent and second.sent)
+    assert "reconnected to another router node" in caller_socket.sent[0]
+    assert json.loads(second.sent[0])["request_payload"] == {"text": "hi"}
+    assert not node_a.replay.is_held("agent-1")
+
+    await asyncio.sleep(0.3)
+    assert not any("agent_unregister" in frame for frame in backend_socket.sent)
+    assert await node_a.is_active("agent-1")
+
+
+@pytest.mark.asyncio
+async def test_expired_hold_keeps_an_agent_owned_by_another_node(
+    cluster, fake_websocket, eventually
+):
+    node_a, node_b = cluster
+    headers = {"x-custom-authorization": "agent-1"}
+    backend_socket = fake_websocket({"api-key": app_settings.MASTER_BE_API_KEY})
+    first = fake_websocket(headers)
+    await node_a.connect(backend_socket)
+    await node_a.connect(first)
+
+    await node_a.disconnect("agent-1", first)
+    await node_b.connect(fake_websocket(headers))
+
+    await eventually(lambda: not node_a.replay.is_held("agent-1"))
+    await asyncio.sleep(0.05)
+    assert not any("agent_unregister" in frame for frame in backend_socket.sent)
+    assert await node_a.is_active("agent-1")
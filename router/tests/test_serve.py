@@ -0,0 +1,37 @@
+import socket
+
+import pytest
+
+from serve import bind_socket
+
+
+def test_workers_share_the_port_with_reuse_port():
+    first = bind_socket("127.0.0.1", 0, reuse_port=True)
+    port = first.getsockname()[1]
+    second = bind_socket("127.0.0.1", port, reuse_port=True)
+    try:
+        assert second.getsockname()[1] == port
+    finally:
+        first.close()
+        second.close()
+
+
+def test_single_worker_owns_the_port():
+    first = bind_socket("127.0.0.1", 0, reuse_port=False)
+    first.listen()
+    try:
+        with pytest.raises(OSError):
+            bind_socket("127.0.0.1", first.getsockname()[1], reuse_port=False)
+    finally:
+        first.close()
+
+
+def test_ipv6_hosts_bind_an_ipv6_socket():
+    if not socket.has_ipv6:
+        pytest.skip("IPv6 is not available")
+    try:
+        sock = bind_socket("::1", 0, reuse_port=False)
+    except OSError:
+        pytest.skip("IPv6 loopback is not available")
+    with sock:
+        assert sock.family == socket.AF_INET6
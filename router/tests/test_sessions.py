@@ -0,0 +1,44 @@
+import pytest
+
+from settings import get_settings
+
+app_settings = get_settings()
+
+
+def invoke_key(agent_id: str) -> dict:
+    return {"x-custom-invoke-key": f"{app_settings.MASTER_AGENT_API_KEY}:{agent_id}"}
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_indexed_by_invoked_agent(manager, fake_websocket):
+    first, _ = await manager.connect(fake_websocket(invoke_key("agent-1")))
+    second, _ = await manager.connect(fake_websocket(invoke_key("agent-1")))
+    other, _ = await manager.connect(fake_websocket(invoke_key("agent-2")))
+
+    assert manager.sessions_by_agent == {
+        "agent-1": {first, second},
+        "agent-2": {other},
+    }
+    assert manager.session_agents[first] == "agent-1"
+
+    await manager.disconnect(first)
+    await manager.disconnect(other)
+    assert manager.sessions_by_agent == {"agent-1": {second}}
+    assert first not in manager.session_agents
+
+
+@pytest.mark.asyncio
+async def test_only_sessions_of_the_unregistered_agent_are_told(
+    manager, fake_websocket, eventually
+):
+    agent_socket = fake_websocket({"x-custom-authorization": "agent-1"})
+    session_socket = fake_websocket(invoke_key("agent-1"))
+    other_socket = fake_websocket(invoke_key("agent-2"))
+    await manager.connect(agent_socket)
+    await manager.connect(session_socket)
+    await manager.connect(other_socket)
+
+    await manager.disconnect("agent-1", agent_socket)
+    await eventually(lambda: session_socket.sent)
+    assert "Agent has been unregistered" in session_socket.sent[0]
+    assert not other_socket.sent
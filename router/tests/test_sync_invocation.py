@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+async def answer_first_invocation(manager, websocket, eventually, **fields):
+    await eventually(lambda: websocket.sent)
+    invocation = json.loads(websocket.sent[0])
+    await manager.process_message(
+        "agent-1",
+        json.dumps(
+            {
+                "message_type": "agent_response",
+                "invoked_by": invocation["invoked_by"],
+                **fields,
+            }
+        ),
+        agent_jwt="agent-1",
+    )
+    return invocation
+
+
+@pytest.mark.asyncio
+async def test_invoke_and_wait_returns_the_agent_response(
+    manager, fake_websocket, eventually
+):
+    agent_socket = fake_websocket({"x-custom-authorization": "agent-1"})
+    await manager.connect(agent_socket)
+
+    call = asyncio.create_task(
+        manager.invoke_and_wait(
+            agent_uuid="agent-1",
+            request_payload={"text": "hi"},
+            request_metadata={"trace": "1"},
+            timeout=2,
+        )
+    )
+    invocation = await answer_first_invocation(
+        manager, agent_socket, eventually, response="hello"
+    )
+    result = await call
+
+    assert invocation["request_payload"] == {"text": "hi"}
+    assert invocation["request_metadata"] == {"trace": "1"}
+    assert result["message_type"] == "agent_response"
+    assert result["response"] == "hello"
+    assert result["request_id"] == invocation["invoked_by"].rpartition("#")[2]
+    assert len(manager.tracker) == 0
+
+
+@pytest.mark.asyncio
+async def test_invoke_and_wait_fails_when_the_agent_disconnects(
+    manager, fake_websocket, eventually
+):
+    agent_socket = fake_websocket({"x-custom-authorization": "agent-1"})
+    await manager.connect(agent_socket)
+
+    call = asyncio.create_task(
+        manager.invoke_and_wait(agent_uuid="agent-1", request_payload={}, timeout=2)
+    )
+    await eventually(lambda: agent_socket.sent)
+    await manager.disconnect("agent-1", agent_socket)
+
+    result = await call
+    assert result["message_type"] == "agent_error"
+    assert result["error"] == {
+        "error_message": "Agent has been unregistered",
+        "agent_uuid": "agent-1",
+    }
+
+
+@pytest.mark.asyncio
+async def test_invoke_and_wait_of_unknown_agent(manager):
+    result = await manager.invoke_and_wait(agent_uuid="missing", request_payload={})
+    assert result["error"]["error_type"] == "AgentNotActive"
+
+
+def test_sync_endpoint_maps_router_errors_to_http_status():
+    with TestClient(app) as client:
+        response = client.post(
+            "/invoke-agent/sync", json={"agent_uuid": "missing", "request_payload": {}}
+        )
+    assert response.status_code == 404
+    assert response.json()["error"]["error_type"] == "AgentNotActive"
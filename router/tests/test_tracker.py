@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from connectors.tracker import InvocationTracker, split_invoked_by
+
+
+class Expired:
+    def __init__(self):
+        self.invocations = []
+
+    async def __call__(self, invocation) -> None:
+        self.invocations.append(invocation)
+
+
+class Replica:
+    outstanding = 0
+
+
+def test_split_invoked_by():
+    assert split_invoked_by("caller:session#abc") == ("caller:session", "abc")
+    assert split_invoked_by("caller") == ("caller", None)
+
+
+def test_complete_updates_indexes_and_counters():
+    tracker = InvocationTracker(default_timeout=10)
+    replica = Replica()
+    first = tracker.add("caller-1", "agent-1", replica=replica, caller_key="caller")
+    tracker.add("caller-2", "agent-1", caller_key="caller")
+
+    assert first.invoked_by == f"caller-1#{first.request_id}"
+    assert tracker.caller_in_flight("caller") == 2
+    assert tracker.agent_in_flight("agent-1") == 2
+    assert replica.outstanding == 1
+
+    assert tracker.complete(first.request_id) is first
+    assert tracker.complete(first.request_id) is None
+    assert tracker.caller_in_flight("caller") == 1
+    assert replica.outstanding == 0
+    assert "caller-1" not in tracker.by_caller
+
+
+def test_fail_agent_only_fails_invocations_of_the_replica():
+    tracker = InvocationTracker(default_timeout=10)
+    lost, alive = Replica(), Replica()
+    failed = tracker.add("caller", "agent-1", replica=lost)
+    tracker.add("caller", "agent-1", replica=alive)
+    tracker.add("caller", "agent-2")
+
+    assert tracker.fail_agent("agent-1", replica=lost) == [failed]
+    assert tracker.agent_in_flight("agent-1") == 1
+    assert len(tracker.fail_agent("agent-1")) == 1
+    assert len(tracker) == 1
+
+
+def test_forget_caller_drops_its_invocations():
+    tracker = InvocationTracker(default_timeout=10)
+    tracker.add("caller-1", "agent-1")
+    tracker.add("caller-1", "agent-2")
+    kept = tracker.add("caller-2", "agent-1")
+
+    tracker.forget_caller("caller-1")
+    assert list(tracker.pending) == [kept.request_id]
+
+
+@pytest.mark.asyncio
+async def test_timer_wheel_expires_invocations_past_their_deadline():
+    tracker = InvocationTracker(default_timeout=10, tick_seconds=0.01)
+    expired = Expired()
+    tracker.start(on_timeout=expired)
+    try:
+        short = tracker.add("caller", "agent-1", timeout=0.03)
+        long = tracker.add("caller", "agent-1", timeout=5)
+        await asyncio.sleep(0.1)
+    finally:
+        await tracker.stop()
+
+    assert expired.invocations == [short]
+    assert list(tracker.pending) == [long.request_id]
+
+
+@pytest.mark.asyncio
+async def test_deadlines_beyond_one_wheel_round_are_not_expired_early():
+    tracker = InvocationTracker(default_timeout=10, tick_seconds=0.01, wheel_size=4)
+    expired = Expired()
+    tracker.start(on_timeout=expired)
+    try:
+        invocation = tracker.add("caller", "agent-1", timeout=0.15)
+        await asyncio.sleep(0.08)
+        assert expired.invocations == []
+        await asyncio.sleep(0.2)
+    finally:
+        await tracker.stop()
+
+    assert expired.invocations == [invocation]
@@ -0,0 +1,262 @@
+import json
+
+import jwt
+import pytest
+
+from settings import get_settings
+from utils.envelope import decode_envelope, encode_envelope
+
+app_settings = get_settings()
+
+
+@pytest.mark.asyncio
+async def test_queue_depths_do_not_expose_api_keys(manager, fake_websocket):
+    """Agents are listed by UUID, sessions carrying an API key by a hash only"""
+    agent_id, _ = await manager.connect(
+        fake_websocket({"x-custom-authorization": "agent-1"})
+    )
+    session_id, _ = await manager.connect(
+        fake_websocket(
+            {"x-custom-invoke-key": f"{app_settings.MASTER_AGENT_API_KEY}:agent-1"}
+        )
+    )
+
+    depths = manager.queue_depths()
+    assert agent_id == "agent-1" and "agent-1" in depths
+    assert session_id not in depths
+    assert not any(app_settings.MASTER_AGENT_API_KEY in label for label in depths)
+    assert any(label.startswith("invoke_session:") for label in depths)
+
+
+@pytest.mark.asyncio
+async def test_envelope_invocation_round_trip(manager, fake_websocket, eventually):
+    """An envelope invocation reaches a plain JSON agent and its response comes back"""
+    agent_socket = fake_websocket({"x-custom-authorization": "agent-1"})
+    caller_socket = fake_websocket(
+        {"x-custom-authorization": "caller-1", "x-genai-envelope": "1"}
+    )
+    await manager.connect(agent_socket)
+    await manager.connect(caller_socket)
+
+    body = json.dumps({"request_payload": {"text": "hi"}})
+    await manager.process_message(
+        "caller-1",
+        encode_envelope(
+            {"message_type": "agent_invoke", "agent_uuid": "agent-1"}, body
+        ),
+        agent_jwt="caller-1",
+    )
+    await eventually(lambda: agent_socket.sent)
+    invocation = json.loads(agent_socket.sent[0])
+    assert invocation["request_payload"] == {"text": "hi"}
+    assert invocation["invoked_by"].startswith("caller-1")
+
+    await manager.process_message(
+        "agent-1",
+        json.dumps(
+            {
+                "message_type": "agent_response",
+                "invoked_by": invocation["invoked_by"],
+                "response": "hello",
+            }
+        ),
+        agent_jwt="agent-1",
+    )
+    await eventually(lambda: caller_socket.sent)
+    # answers of plain JSON agents take the regular path
+    response = json.loads(caller_socket.sent[0])
+    assert response["message_type"] == "agent_response"
+    assert response["response"] == "hello"
+    assert len(manager.tracker) == 0
+
+
+@pytest.mark.asyncio
+async def test_envelope_response_is_forwarded_untouched(
+    manager, fake_websocket, eventually
+):
+    envelope_headers = {"x-genai-envelope": "1"}
+    agent_socket = fake_websocket(
+        {"x-custom-authorization": "agent-1", **envelope_headers}
+    )
+    caller_socket = fake_websocket(
+        {"x-custom-authorization": "caller-1", **envelope_headers}
+    )
+    await manager.connect(agent_socket)
+    await manager.connect(caller_socket)
+
+    await manager.process_message(
+        "caller-1",
+        encode_envelope(
+            {"message_type": "agent_invoke", "agent_uuid": "agent-1"}, "{}"
+        ),
+        agent_jwt="caller-1",
+    )
+    await eventually(lambda: agent_socket.sent)
+    header, _ = decode_envelope(agent_socket.sent[0])
+
+    body = '{"response": "hello"}'
+    await manager.process_message(
+        "agent-1",
+        encode_envelope(
+            {"message_type": "agent_response", "invoked_by": header["invoked_by"]}, body
+        ),
+        agent_jwt="agent-1",
+    )
+    await eventually(lambda: caller_socket.sent)
+    header, response = decode_envelope(caller_socket.sent[0])
+    assert header == {"message_type": "agent_response"}
+    assert response == body
+
+
+@pytest.mark.asyncio
+async def test_agent_stays_registered_while_a_replica_is_alive(
+    manager, fake_websocket, eventually
+):
+    backend_socket = fake_websocket({"api-key": app_settings.MASTER_BE_API_KEY})
+    first = fake_websocket({"x-custom-authorization": "agent-1"})
+    second = fake_websocket({"x-custom-authorization": "agent-1"})
+    await manager.connect(backend_socket)
+    await manager.connect(first)
+    await manager.connect(second)
+    assert len(manager.active_connections["agent-1"]) == 2
+
+    await manager.disconnect("agent-1", first)
+    assert await manager.is_active("agent-1")
+    assert not any("agent_unregister" in frame for frame in backend_socket.sent)
+
+    await manager.disconnect("agent-1", second)
+    assert not await manager.is_active("agent-1")
+    await eventually(
+        lambda: any("agent_unregister" in frame for frame in backend_socket.sent)
+    )
+
+
+@pytest.mark.asyncio
+async def test_metrics_do_not_expose_api_keys(manager, fake_websocket):
+    await manager.connect(fake_websocket({"api-key": app_settings.MASTER_BE_API_KEY}))
+    await manager.connect(
+        fake_websocket({"x-custom-invoke-key": f"{app_settings.MASTER_BE_API_KEY}:a"})
+    )
+    await manager.connect(fake_websocket({"x-custom-authorization": "agent-1"}))
+
+    rendered = manager.render_metrics()
+    assert app_settings.MASTER_BE_API_KEY not in rendered
+    assert 'router_send_queue_depth{client="agent-1",replica="0"} 0' in rendered
+    assert 'router_active_connections{connection_class="invoke_session"} 1' in rendered
+
+
+@pytest.mark.asyncio
+async def test_agent_logs_reach_the_backend_in_one_batch(
+    manager, fake_websocket, eventually
+):
+    backend_socket = fake_websocket({"api-key": app_settings.MASTER_BE_API_KEY})
+    await manager.connect(backend_socket)
+    await manager.connect(fake_websocket({"x-custom-authorization": "agent-1"}))
+
+    for i in range(2):
+        await manager.process_message(
+            "agent-1",
+            json.dumps(
+                {
+                    "message_type": "agent_log",
+                    "log_message": f"step {i}",
+                    "log_level": "info",
+                }
+            ),
+            agent_jwt="agent-1",
+        )
+    await eventually(lambda: backend_socket.sent)
+
+    batch = json.loads(backend_socket.sent[0])["request_payload"]
+    assert batch["message_type"] == "agent_log_batch"
+    assert [log["log_message"] for log in batch["logs"]] == ["step 0", "step 1"]
+    assert all(log["agent_uuid"] == "agent-1" for log in batch["logs"])
+
+
+async def register_agent(manager, fake_websocket, eventually, headers, payload):
+    backend_socket = fake_websocket({"api-key": app_settings.MASTER_BE_API_KEY})
+    await manager.connect(backend_socket)
+    client_id, agent_jwt = await manager.connect(fake_websocket(headers))
+    await manager.process_message(
+        client_id,
+        json.dumps({"message_type": "agent_register", "request_payload": payload}),
+        agent_jwt=agent_jwt,
+    )
+    await eventually(lambda: backend_socket.sent)
+    return json.loads(backend_socket.sent[0])["request_payload"]
+
+
+@pytest.mark.asyncio
+async def test_register_drops_agent_supplied_user_id(
+    manager, fake_websocket, eventually
+):
+    register = await register_agent(
+        manager,
+        fake_websocket,
+        eventually,
+        headers={"x-custom-authorization": "agent-1"},
+        payload={"agent_name": "agent", "agent_user_id": "someone-else"},
+    )
+    assert register["agent_uuid"] == "agent-1"
+    assert register["agent_name"] == "agent"
+    assert "agent_user_id" not in register
+
+
+@pytest.mark.asyncio
+async def test_register_carries_the_verified_user_id(
+    manager, fake_websocket, eventually, monkeypatch
+):
+    monkeypatch.setattr(app_settings, "ROUTER_VERIFY_AGENT_JWT", True)
+    token = jwt.encode(
+        {"sub": "agent-1", "user_id": "user-1"},
+        app_settings.SECRET_KEY,
+        algorithm=app_settings.HASH_ALGORITHM,
+    )
+    register = await register_agent(
+        manager,
+        fake_websocket,
+        eventually,
+        headers={"x-custom-authorization": token},
+        payload={"agent_name": "agent", "agent_user_id": "someone-else"},
+    )
+    assert register["agent_uuid"] == "agent-1"
+    assert register["agent_user_id"] == "user-1"
+
+
+@pytest.mark.asyncio
+async def test_invalid_agent_jwt_is_rejected_when_verification_is_on(
+    manager, fake_websocket, monkeypatch
+):
+    monkeypatch.setattr(app_settings, "ROUTER_VERIFY_AGENT_JWT", True)
+    websocket = fake_websocket({"x-custom-authorization": "agent-1"})
+    assert await manager.connect(websocket) == (None, None)
+    assert not manager.active_connections
+
+
+@pytest.mark.asyncio
+async def test_progress_of_the_master_agent_reaches_the_backend(
+    manager, fake_websocket, eventually
+):
+    backend_socket = fake_websocket({"api-key": app_settings.MASTER_BE_API_KEY})
+    master_agent_id, _ = await manager.connect(
+        fake_websocket({"api-key": app_settings.MASTER_AGENT_API_KEY})
+    )
+    await manager.connect(backend_socket)
+    await manager.connect(fake_websocket({"x-custom-authorization": "agent-1"}))
+
+    progress = {
+        "message_type": "agent_progress",
+        "session_id": "session",
+        "request_id": "request",
+        "event": {"type": "token", "delta": "Hi"},
+    }
+    # agents can not stream into chats
+    await manager.process_message("agent-1", json.dumps(progress), agent_jwt="agent-1")
+    await manager.process_message(
+        master_agent_id, json.dumps(progress), agent_jwt=master_agent_id
+    )
+
+    await eventually(lambda: backend_socket.sent)
+    assert len(backend_socket.sent) == 1
+    forwarded = json.loads(backend_socket.sent[0])["request_payload"]
+    assert forwarded == {**progress, "agent_uuid": master_agent_id}
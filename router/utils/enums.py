@@ -8,7 +8,11 @@ class WSMessageType(Enum):
     AGENT_RESPONSE = "agent_response"
     AGENT_ERROR = "agent_error"
     AGENT_LOG = "agent_log"
+    AGENT_LOG_BATCH = "agent_log_batch"
+    AGENT_PROGRESS = "agent_progress"
     ML_INVOKE = "ml_invoke"
+    ROUTER_PING = "router_ping"
+    ROUTER_PONG = "router_pong"
 
 
 class MasterServerName(Enum):
@@ -22,3 +26,39 @@ class ErrorType(Enum):
     AGENT_NOT_ACTIVE = "AgentNotActive"
     INVALID_JSON_REQUEST_FORMAT = "InvalidJSONRequestFormat"
     NO_REQUEST_PAYLOAD = "NoRequestPayload"
+    AGENT_OVERLOADED = "AgentOverloaded"
+    AGENT_TIMEOUT = "AgentTimeout"
+    AGENT_RATE_LIMITED = "AgentRateLimited"
+
+
+class OverflowPolicy(Enum):
+    DROP = "drop"
+    REJECT = "reject"
+    BLOCK = "block"
+
+
+class EnqueueResult(Enum):
+    ACCEPTED = "accepted"
+    DROPPED = "dropped"
+    REJECTED = "rejected"
+
+
+class BalancingPolicy(Enum):
+    ROUND_ROBIN = "round_robin"
+    LEAST_OUTSTANDING = "least_outstanding"
+    POWER_OF_TWO = "power_of_two"
+
+
+class ConnectionClass(Enum):
+    AGENT = "agent"
+    MASTER_BE = "master_be"
+    MASTER_ML = "master_ml"
+    INVOKE_SESSION = "invoke_session"
+
+
+class TrafficClass(Enum):
+    # ordered by scheduling priority
+    RESPONSE = "response"
+    INVOKE = "invoke"
+    CONTROL = "control"
+    TELEMETRY = "telemetry"
@@ -0,0 +1,89 @@
+import json
+from typing import Optional, Tuple
+
+# ASCII record separator, can never start a regular JSON frame
+ENVELOPE_MARKER = "\x1e"
+
+# Header fields the router needs for routing, everything else stays in the body
+ENVELOPE_HEADER_FIELDS = ("message_type", "agent_uuid", "invoked_by")
+
+
+class EnvelopeFormatError(ValueError):
+    pass
+
+
+def is_envelope(frame: str) -> bool:
+    """
+    Checks whether the frame uses the envelope format:
+    `<marker><header JSON>\\n<body JSON object>`.
+    """
+    return frame.startswith(ENVELOPE_MARKER)
+
+
+def encode_envelope(header: dict, body: str) -> str:
+    """
+    Builds an envelope frame from a routing header and an already serialized body.
+
+    Args:
+        header (dict): Routing fields, see `ENVELOPE_HEADER_FIELDS`.
+        body (str): JSON object text forwarded untouched.
+    """
+    return f"{ENVELOPE_MARKER}{json.dumps(header, separators=(',', ':'))}\n{body}"
+
+
+def decode_envelope(frame: str) -> Tuple[dict, str]:
+    """
+    Reads only the routing header of an envelope frame.
+
+    Returns:
+        Tuple[dict, str]: The decoded header and the raw body.
+
+    Raises:
+        EnvelopeFormatError: If the header is not a valid JSON object.
+    """
+    header_text, _, body = frame[1:].partition("\n")
+    try:
+        header = json.loads(header_text)
+    except json.JSONDecodeError as e:
+        raise EnvelopeFormatError("Invalid envelope header") from e
+    if not isinstance(header, dict):
+        raise EnvelopeFormatError("Envelope header must be a JSON object")
+    return header, body or "{}"
+
+
+def splice_fields(body: str, fields: dict) -> str:
+    """
+    Appends fields to a serialized JSON object without decoding it.
+    Fields are appended after the body's own keys, so they win over duplicates
+    when the frame is decoded by the recipient.
+
+    Args:
+        body (str): JSON object text.
+        fields (dict): Fields to add.
+
+    Raises:
+        EnvelopeFormatError: If the body is not a JSON object.
+    """
+    stripped = body.strip()
+    if not (stripped.startswith("{") and stripped.endswith("}")):
+        raise EnvelopeFormatError("Envelope body must be a JSON object")
+    if not fields:
+        return stripped
+
+    extra = json.dumps(fields, separators=(",", ":"))[1:-1]
+    inner = stripped[1:-1]
+    separator = "," if inner.strip() else ""
+    return f"{{{inner}{separator}{extra}}}"
+
+
+def envelope_to_json(frame: str, header: Optional[dict] = None) -> str:
+    """
+    Converts an envelope frame into a regular JSON frame for clients that do not
+    understand envelopes.
+
+    Args:
+        frame (str): Envelope frame.
+        header (Optional[dict]): Header to use instead of the one stored in the frame.
+    """
+    frame_header, body = decode_envelope(frame)
+    return splice_fields(body, frame_header if header is None else header)
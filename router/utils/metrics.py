@@ -0,0 +1,276 @@
+import bisect
+import hashlib
+import logging
+import random
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from settings import get_settings
+from utils.enums import ConnectionClass, WSMessageType
+
+app_settings = get_settings()
+
+# Routing a frame normally takes microseconds, slow consumers push it to seconds
+LATENCY_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+# message types are read from client frames, anything else is counted as unknown
+KNOWN_MESSAGE_TYPES = frozenset(message_type.value for message_type in WSMessageType)
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str]) -> str:
+    if not labelnames:
+        return ""
+    pairs = (
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in zip(labelnames, labelvalues)
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """
+    Monotonic counter rendered in the Prometheus text format.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self.values[labelvalues] += amount
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for labelvalues, value in self.values.items():
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}"
+            )
+        return lines
+
+
+class Histogram:
+    """
+    Histogram with fixed buckets rendered in the Prometheus text format.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # per label set: counts of every bucket (the last one is +Inf) and the sum
+        self.values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        if not (series := self.values.get(labelvalues)):
+            series = self.values[labelvalues] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        bucket_labelnames = self.labelnames + ("le",)
+        for labelvalues, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                labels = _format_labels(bucket_labelnames, (*labelvalues, bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {total[0]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def message_type_label(message_type: Any) -> str:
+    """
+    Bounds the message type label to the known message types, a client can send
+    anything, including values that are not strings.
+    """
+    if isinstance(message_type, str) and message_type in KNOWN_MESSAGE_TYPES:
+        return message_type
+    return "unknown"
+
+
+def client_label(client_id: str, connection_class: ConnectionClass) -> str:
+    """
+    Identifies a connection in metrics without exposing credentials: agents are
+    labelled by their UUID, every other client, whose ID may carry an API key,
+    by its connection class and a short hash of the ID.
+
+    Args:
+        client_id (str): The client ID of the connection.
+        connection_class (ConnectionClass): The kind of client behind the connection.
+    """
+    if connection_class == ConnectionClass.AGENT:
+        return client_id
+    digest = hashlib.sha256(client_id.encode()).hexdigest()[:12]
+    return f"{connection_class.value}:{digest}"
+
+
+def render_gauge(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str],
+    samples: Iterable[Tuple[Sequence[str], float]],
+) -> List[str]:
+    """
+    Renders a gauge whose samples are computed at scrape time.
+
+    Args:
+        name (str): Metric name.
+        documentation (str): Help text.
+        labelnames (Sequence[str]): Names of the labels.
+        samples (Iterable[Tuple[Sequence[str], float]]): Label values and value of every sample.
+    """
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    for labelvalues, value in samples:
+        lines.append(f"{name}{_format_labels(labelnames, labelvalues)} {value}")
+    return lines
+
+
+class RouterMetrics:
+    """
+    Message counters and latency histograms of the router.
+    Frame sizes are measured in characters of the text frame, which equals bytes
+    for JSON serialized with the default ASCII escaping.
+    """
+
+    def __init__(self):
+        self.messages = Counter(
+            "router_messages_total",
+            "Frames handled by the router.",
+            ("direction", "message_type"),
+        )
+        self.message_bytes = Counter(
+            "router_message_bytes_total",
+            "Size of frames handled by the router.",
+            ("direction", "message_type"),
+        )
+        self.forward_latency = Histogram(
+            "router_forward_latency_seconds",
+            "Time from receiving a frame until it is queued for its recipient.",
+            ("message_type",),
+        )
+        self.json_decode_failures = Counter(
+            "router_json_decode_failures_total",
+            "Received frames that are not valid JSON or have a malformed envelope header.",
+        )
+        self.frames_written = Counter(
+            "router_frames_written_total",
+            "Frames written to client sockets.",
+            ("traffic_class",),
+        )
+        self.frames_dropped = Counter(
+            "router_frames_dropped_total",
+            "Frames dropped or rejected because a send queue was full.",
+            ("traffic_class",),
+        )
+        self.invocations_rate_limited = Counter(
+            "router_invocations_rate_limited_total",
+            "Invocations rejected by a rate or in-flight limit.",
+        )
+        self.invocations_expired = Counter(
+            "router_invocations_expired_total",
+            "Invocations dropped because the deadline of their request had passed.",
+        )
+        self.queue_wait = Histogram(
+            "router_queue_wait_seconds",
+            "Time frames spend in a send queue before they are written.",
+            ("traffic_class",),
+        )
+
+    def received(self, message_type: Any, size: int, latency: float) -> None:
+        """
+        Records a frame received from a client and the time it took to route it.
+        """
+        message_type = message_type_label(message_type)
+        self.messages.inc("received", message_type)
+        self.message_bytes.inc("received", message_type, amount=size)
+        self.forward_latency.observe(latency, message_type)
+
+    def sent(self, message_type: Any, size: int, direction: str = "sent") -> None:
+        """
+        Records a frame queued for a local client or forwarded to another router node.
+        """
+        message_type = message_type_label(message_type)
+        self.messages.inc(direction, message_type)
+        self.message_bytes.inc(direction, message_type, amount=size)
+
+    def render(self, gauges: Iterable[List[str]] = ()) -> str:
+        """
+        Renders all metrics in the Prometheus text exposition format.
+
+        Args:
+            gauges (Iterable[List[str]]): Already rendered gauges, see `render_gauge`.
+        """
+        lines = [
+            *self.messages.render(),
+            *self.message_bytes.render(),
+            *self.forward_latency.render(),
+            *self.json_decode_failures.render(),
+            *self.frames_written.render(),
+            *self.frames_dropped.render(),
+            *self.queue_wait.render(),
+            *self.invocations_rate_limited.render(),
+            *self.invocations_expired.render(),
+        ]
+        for gauge in gauges:
+            lines.extend(gauge)
+        return "\n".join(lines) + "\n"
+
+
+def log_payload(template: str, *args) -> None:
+    """
+    Logs a message carrying a frame payload.
+
+    With `ROUTER_SAMPLED_PAYLOAD_LOGGING` enabled, payloads are logged at DEBUG level
+    for a sample of `ROUTER_PAYLOAD_LOG_SAMPLE_RATE` frames only, and the message is not
+    formatted at all for frames that are not logged.
+
+    Args:
+        template (str): `%`-style format string.
+        args: Values of the format string.
+    """
+    if not app_settings.ROUTER_SAMPLED_PAYLOAD_LOGGING:
+        logging.info(template, *args)
+    elif (
+        logging.getLogger().isEnabledFor(logging.DEBUG)
+        and random.random() < app_settings.ROUTER_PAYLOAD_LOG_SAMPLE_RATE
+    ):
+        logging.debug(template, *args)
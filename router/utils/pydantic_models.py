@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Any, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Message(BaseModel):
@@ -8,3 +10,29 @@ class Message(BaseModel):
 
 class MessageResponse(BaseModel):
     detail: str
+
+
+class SyncInvocation(BaseModel):
+    agent_uuid: str
+    request_payload: dict
+    request_metadata: dict = Field(default_factory=dict)
+    timeout: Optional[float] = Field(
+        default=None, gt=0, description="Seconds to wait for the agent response"
+    )
+
+
+class InvocationResult(BaseModel):
+    # agents may add their own fields next to `response`
+    model_config = ConfigDict(extra="allow")
+
+    message_type: str
+    request_id: Optional[str] = None
+    response: Any = None
+    error: Optional[dict] = None
+
+
+class QueueStats(BaseModel):
+    replicas: int
+    depth: int
+    dropped: int
+    rejected: int